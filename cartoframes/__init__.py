@@ -1,3 +1,5 @@
+import importlib
+
 from ._version import __version__
 from .utils.utils import check_package
 from .io.carto import read_carto, to_carto, has_table, delete_table, rename_table, \
@@ -9,6 +11,15 @@ check_package('carto', '>=1.8.3')
 check_package('pandas', '>=0.23.0')
 check_package('geopandas', '>=0.6.0')
 
+# Subpackages imported on the first access, e.g. `cartoframes.viz`
+LAZY_SUBPACKAGES = ['analysis', 'data', 'viz']
+
+
+def __getattr__(name):
+    if name in LAZY_SUBPACKAGES:
+        return importlib.import_module('.' + name, __name__)
+    raise AttributeError("module '{0}' has no attribute '{1}'".format(__name__, name))
+
 
 __all__ = [
     '__version__',
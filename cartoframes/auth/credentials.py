@@ -3,8 +3,6 @@
 import os
 
 from urllib.parse import urlparse
-from carto.auth import APIKeyAuthClient
-from carto.do_token import DoTokenManager
 
 from .. import __version__
 from ..utils.logger import log
@@ -235,11 +233,14 @@ class Credentials:
     @check_do_enabled
     def get_do_credentials(self):
         """Returns the Data Observatory v2 credentials"""
+        from carto.do_token import DoTokenManager
         do_token_manager = DoTokenManager(self.get_api_key_auth_client())
         return do_token_manager.get()
 
     def get_api_key_auth_client(self):
         if not self._api_key_auth_client:
+            # Imported here to load carto.auth only when it is used
+            from carto.auth import APIKeyAuthClient
             self._api_key_auth_client = APIKeyAuthClient(
                 base_url=self._base_url,
                 api_key=self.api_key,
@@ -1,4 +1,5 @@
-from ...io.managers.context_manager import ContextManager
+from ...io.managers.context_manager import get_context_manager
+from ...utils.utils import is_sql_query
 
 
 class SQLClient:
@@ -18,7 +19,7 @@ class SQLClient:
 
     """
     def __init__(self, credentials=None):
-        self._context_manager = ContextManager(credentials)
+        self._context_manager = get_context_manager(credentials)
 
     def query(self, query, verbose=False):
         """Run a SQL query. It returns a `list` with content of the response.
@@ -32,13 +33,19 @@ class SQLClient:
             verbose (bool, optional): flag to return all the response. Default False.
 
         """
-        response = self._context_manager.execute_query(query.strip())
+        query = query.strip()
+        try:
+            response = self._context_manager.execute_query(query)
+        finally:
+            if not is_sql_query(query):
+                # The query may have changed the tables, or their columns
+                self._context_manager.invalidate_metadata()
         if not verbose:
             return response.get('rows')
         else:
             return response
 
-    def execute(self, query):
+    def execute(self, query, wait=True, depends_on=None):
         """Run a long running query. It returns an object with the
         status and information of the job. For more information check the `Batch API
         documentation
@@ -46,9 +53,21 @@ class SQLClient:
 
         Args:
             query (str): SQL query.
+            wait (bool, optional): wait for the job. If False, the job is queued in a
+                pipeline that runs many jobs concurrently and a `concurrent.futures.Future`
+                of the job is returned. Default True.
+            depends_on (Future or list of Future, optional): with `wait=False`, jobs
+                that must finish successfully before this one is submitted.
 
         """
-        return self._context_manager.execute_long_running_query(query.strip())
+        if not wait:
+            future = self._context_manager.submit_long_running_query(query.strip(), depends_on)
+            future.add_done_callback(lambda _: self._context_manager.invalidate_metadata())
+            return future
+        try:
+            return self._context_manager.execute_long_running_query(query.strip())
+        finally:
+            self._context_manager.invalidate_metadata()
 
     def distinct(self, table_name, column_name):
         """Get the distict values and their count in a table
@@ -2,7 +2,6 @@ import pandas as pd
 
 from abc import ABC
 
-from ...clients.bigquery_client import BigQueryClient
 from ....utils.logger import log
 from ....exceptions import DOError
 
@@ -155,6 +154,8 @@ class CatalogEntity(ABC):
 
 
 def _get_bigquery_client(credentials):
+    # Imported here to load the BigQuery packages only when they are used
+    from ...clients.bigquery_client import BigQueryClient
     return BigQueryClient(credentials)
 
 
@@ -7,7 +7,6 @@ from collections import defaultdict
 from ..catalog.variable import Variable
 from ..catalog.dataset import Dataset
 from ..catalog.geography import Geography
-from ...clients import bigquery_client
 from ....auth import get_default_credentials
 from ....exceptions import EnrichmentError
 from ....utils.logger import log
@@ -28,8 +27,10 @@ class EnrichmentService(object):
     """Base class for the Enrichment utility with commons auxiliary methods"""
 
     def __init__(self, credentials=None):
+        from ...clients.bigquery_client import BigQueryClient
+
         self.credentials = credentials = credentials or get_default_credentials()
-        self.bq_client = bigquery_client.BigQueryClient(credentials)
+        self.bq_client = BigQueryClient(credentials)
         self.bq_dataset = self.bq_client.bq_dataset
         self.bq_project = self.bq_client.bq_project
         self.bq_public_project = self.bq_client.bq_public_project
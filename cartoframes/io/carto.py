@@ -1,12 +1,19 @@
 """Functions to interact with the CARTO platform"""
 
+import time
+
+from concurrent.futures import Future, ThreadPoolExecutor
+
 from pandas import DataFrame
 from geopandas import GeoDataFrame
 
 from carto.exceptions import CartoException
 
-from .managers.context_manager import ContextManager
-from ..utils.geom_utils import set_geometry, has_geometry
+from .managers.cache_manager import CacheManager
+from .managers.resume_manager import ResumeManager
+from .managers.context_manager import get_context_manager
+from .managers.transfer_stats import NULL_STATS, get_transfer_stats
+from ..utils.geom_utils import set_geometry, has_geometry, decode_geometry
 from ..utils.logger import log
 from ..utils.utils import is_valid_str, is_sql_query
 from ..utils.metrics import send_metrics
@@ -15,10 +22,13 @@ from ..utils.metrics import send_metrics
 GEOM_COLUMN_NAME = 'the_geom'
 
 IF_EXISTS_OPTIONS = ['fail', 'replace', 'append']
+UPLOAD_IF_EXISTS_OPTIONS = IF_EXISTS_OPTIONS + ['upsert', 'sync']
 
 
 @send_metrics('data_downloaded')
-def read_carto(source, credentials=None, limit=None, retry_times=3, schema=None, index_col=None, decode_geom=True):
+def read_carto(source, credentials=None, limit=None, retry_times=3, schema=None, index_col=None, decode_geom=True,
+               parallel=None, chunksize=None, format='csv', cache=False, columns=None, where=None, bbox=None,
+               resume=False, stats=None):
     """Read a table or a SQL query from the CARTO account.
 
     Args:
@@ -33,21 +43,95 @@ def read_carto(source, credentials=None, limit=None, retry_times=3, schema=None,
             `current_schema()` using the credentials.
         index_col (str, optional): name of the column to be loaded as index. It can be used also to set the index name.
         decode_geom (bool, optional): convert the "the_geom" column into a valid geometry column.
+        parallel (int, optional): number of concurrent downloads of a table. The table is split into
+            `parallel` disjoint `cartodb_id` ranges and the rows are returned ordered by `cartodb_id`.
+            Queries and tables without `cartodb_id` are downloaded in a single request, as their row
+            order could not be kept. Default is to download all rows in a single request.
+        chunksize (int, optional): number of rows per chunk. If it is set, an iterator of
+            GeoDataFrames is returned instead, so the data is decoded chunk by chunk while it is
+            being downloaded. It can not be combined with `parallel`.
+        format (str, optional): transport format of the download: "csv" or "binary". The "binary"
+            format uses the PostgreSQL binary COPY, which avoids parsing the values as text.
+            Types without a binary decoder are cast to text in the server. Default is "csv".
+        cache (bool or :py:class:`CacheManager <cartoframes.io.managers.cache_manager.CacheManager>`, optional):
+            store the result in a local Parquet cache and reuse it while the tables of the source
+            are not updated. True uses the default cache directory, size (1 GB) and no TTL. A
+            CacheManager instance can be passed to set them. It is ignored if `chunksize` is set.
+            It requires pyarrow. Default is False.
+        columns (list of str, optional): names of the columns to download, in order.
+            Default is to download all the columns.
+        where (str, optional): SQL condition to filter the rows in the server, for example
+            "pop > 1000". It can use any column of the source.
+        bbox (tuple, optional): (west, south, east, north) bounding box in EPSG:4326. Only
+            the rows whose "the_geom" intersects it are downloaded. It uses the spatial index.
+        resume (bool or str, optional): download the rows ordered by `cartodb_id` and, if the
+            download fails with a connection, server or rate limit error, continue after the last
+            row received instead of starting again, up to `retry_times`. A directory path stores the
+            progress there, so a download of the same query interrupted by a crash continues in the
+            next call. It requires pyarrow. It can not be combined with `limit`, `parallel` or
+            `chunksize`. Default is False.
+        stats (:py:class:`TransferStats <cartoframes.io.managers.transfer_stats.TransferStats>` or function,
+            optional): measure the rows, bytes and time of each stage of the download. A TransferStats
+            instance is filled in, and a function is called with the TransferStats when the download finishes.
 
     Returns:
-        geopandas.GeoDataFrame
+        geopandas.GeoDataFrame, or an iterator of geopandas.GeoDataFrame if `chunksize` is set.
 
     Raises:
         ValueError: if the source is not a valid table_name or SQL query.
 
+    Example:
+        >>> for gdf in read_carto('table_name', chunksize=10000):
+        ...     process(gdf)
+
+        >>> gdf = read_carto('table_name', columns=['the_geom', 'name'], where='pop > 1000',
+        ...                  bbox=(-74.1, 40.6, -73.8, 40.9))
+
     """
     if not is_valid_str(source):
         raise ValueError('Wrong source. You should provide a valid table_name or SQL query.')
 
-    context_manager = ContextManager(credentials)
+    if chunksize is not None and parallel is not None:
+        raise ValueError('The `parallel` and `chunksize` parameters can not be used together.')
+
+    if chunksize is not None and resume is not False:
+        raise ValueError('The `resume` and `chunksize` parameters can not be used together.')
+
+    context_manager = get_context_manager(credentials)
+
+    if cache is True:
+        cache = CacheManager()
+    elif cache is False:
+        cache = None
+
+    if resume is True:
+        resume = ResumeManager()
+    elif resume is False:
+        resume = None
+    else:
+        resume = ResumeManager(resume)
+
+    stats = get_transfer_stats(stats)
+    stats.start('read')
+
+    df = context_manager.copy_to(
+        source, schema, limit, retry_times, parallel, chunksize, format, cache, columns, where, bbox, resume, stats)
+
+    if chunksize is not None:
+        return _prepare_chunks(df, index_col, decode_geom, stats)
+
+    gdf = _prepare_gdf(df, index_col, decode_geom, stats)
+    stats.finish()
+    return gdf
+
 
-    df = context_manager.copy_to(source, schema, limit, retry_times)
+def _prepare_chunks(chunks, index_col, decode_geom, stats):
+    for chunk in chunks:
+        yield _prepare_gdf(chunk, index_col, decode_geom, stats)
+    stats.finish()
 
+
+def _prepare_gdf(df, index_col, decode_geom, stats=NULL_STATS):
     gdf = GeoDataFrame(df, crs='epsg:4326')
 
     if index_col:
@@ -58,14 +142,16 @@ def read_carto(source, credentials=None, limit=None, retry_times=3, schema=None,
 
     if decode_geom and GEOM_COLUMN_NAME in gdf:
         # Decode geometry column
-        set_geometry(gdf, GEOM_COLUMN_NAME, inplace=True)
+        with stats.stage('decode_geometry'):
+            set_geometry(gdf, GEOM_COLUMN_NAME, inplace=True)
 
     return gdf
 
 
 @send_metrics('data_uploaded')
 def to_carto(dataframe, table_name, credentials=None, if_exists='fail', geom_col=None, index=False, index_label=None,
-             cartodbfy=True, log_enabled=True):
+             cartodbfy=True, log_enabled=True, chunksize=None, workers=None, retry_times=3, compress=True, key=None,
+             bulk_load=False, indexes=None, stats=None):
     """Upload a DataFrame to CARTO.
 
     Args:
@@ -73,13 +159,39 @@ def to_carto(dataframe, table_name, credentials=None, if_exists='fail', geom_col
         table_name (str): name of the table to upload the data.
         credentials (:py:class:`Credentials <cartoframes.auth.Credentials>`, optional):
             instance of Credentials (username, api_key, etc).
-        if_exists (str, optional): 'fail', 'replace', 'append'. Default is 'fail'.
+        if_exists (str, optional): 'fail', 'replace', 'append', 'upsert', 'sync'. Default is 'fail'.
+            'upsert' updates the rows of the table with the same `key` and inserts the rest.
+            'sync' makes the table equal to the dataframe uploading only the rows inserted,
+            updated or deleted since the last sync. The table stores a hash of each row in
+            the "cartoframes_hash" column, which is added if needed.
         geom_col (str, optional): name of the geometry column of the dataframe.
         index (bool, optional): write the index in the table. Default is False.
         index_label (str, optional): name of the index column in the table. By default it
             uses the name of the index from the dataframe.
         cartodbfy (bool, optional): convert the table to CARTO format. Default True. More info
             `here <https://carto.com/developers/sql-api/guides/creating-tables/#create-tables>`.
+        chunksize (int, optional): number of rows per upload request. If it is set, the data is
+            split in chunks that are encoded and uploaded concurrently into a staging table, and
+            appended to the table at once when all of them succeed. A chunk is retried individually
+            after a connection, server or rate limit error. Default is to upload all rows in a single request.
+        workers (int, optional): number of concurrent upload requests when `chunksize` is set.
+            Default is 1.
+        retry_times (int, optional): number of times to retry a failed chunk. Default is 3.
+        compress (bool or int, optional): gzip the upload stream chunk by chunk. An integer
+            from 1 (fastest) to 9 (smallest) sets the compression level. False can be faster
+            for data that does not compress, such as random numbers. Default is True.
+        key (str or list of str, optional): columns that identify the rows for
+            if_exists='upsert' or 'sync'. The data is uploaded to a staging table and merged in a single
+            transaction, so the cost depends on the size of the dataframe, not of the table.
+            An index on the key columns of the table is recommended.
+        bulk_load (bool, optional): when the table is created, upload the data to an unlogged
+            staging table without indexes and replace the table with it in a single transaction,
+            where it is cartodbfied, indexed and analyzed once. Faster for large dataframes. Default is False.
+        indexes (str or list of str, optional): columns to index when the table is created, with GiST
+            for geometries and B-tree for the rest. The indexes are built after the data is uploaded.
+        stats (:py:class:`TransferStats <cartoframes.io.managers.transfer_stats.TransferStats>` or function,
+            optional): measure the rows, bytes and time of each stage of the upload. A TransferStats
+            instance is filled in, and a function is called with the TransferStats when the upload finishes.
 
     Raises:
         ValueError: if the dataframe or table name provided are wrong or the if_exists param is not valid.
@@ -91,24 +203,56 @@ def to_carto(dataframe, table_name, credentials=None, if_exists='fail', geom_col
     if not is_valid_str(table_name):
         raise ValueError('Wrong table name. You should provide a valid table name.')
 
-    if if_exists not in IF_EXISTS_OPTIONS:
+    if if_exists not in UPLOAD_IF_EXISTS_OPTIONS:
         raise ValueError('Wrong option for the `if_exists` param. You should provide: {}.'.format(
-            ', '.join(IF_EXISTS_OPTIONS)))
+            ', '.join(UPLOAD_IF_EXISTS_OPTIONS)))
+
+    if if_exists in ('upsert', 'sync') and key is None:
+        raise ValueError('The `key` parameter is required with if_exists="{}".'.format(if_exists))
+
+    context_manager = get_context_manager(credentials)
+
+    stats = get_transfer_stats(stats)
+    stats.start('upload')
 
-    context_manager = ContextManager(credentials)
+    gdf = _prepare_upload_gdf(dataframe, index, index_label, geom_col, stats)
 
-    gdf = GeoDataFrame(dataframe, copy=True)
+    start = time.time()
+    table_name = context_manager.copy_from(
+        gdf, table_name, if_exists, cartodbfy, chunksize, workers, retry_times, compress, key, bulk_load, indexes,
+        stats)
+    stats.finish()
+
+    if log_enabled:
+        log.info('Success! Data uploaded to table "{}" correctly'.format(table_name))
+        if chunksize is not None:
+            elapsed = time.time() - start
+            log.info('{0} rows uploaded in {1:.2f} s ({2:.0f} rows/s)'.format(
+                len(gdf), elapsed, len(gdf) / elapsed if elapsed > 0 else 0))
+
+
+def _prepare_upload_gdf(dataframe, index, index_label, geom_col, stats=NULL_STATS):
+    """GeoDataFrame to upload that shares the column data of `dataframe`.
+    It is a shallow copy: columns are only added, dropped and renamed, the
+    values of the existing columns are never written, so the input frame is
+    not modified and its data is not duplicated."""
+    gdf = GeoDataFrame(dataframe.copy(deep=False), copy=False)
 
     if index:
         index_name = index_label or gdf.index.name
         if index_name is not None and index_name != '':
             # Append the index as a column
-            gdf[index_name] = gdf.index
+            _replace_column(gdf, index_name, gdf.index)
         else:
             raise ValueError('Wrong index name. You should provide a valid index label.')
 
     if geom_col in gdf:
-        set_geometry(gdf, geom_col, inplace=True, drop=True)
+        # Same as `set_geometry(gdf, geom_col, drop=True)`
+        with stats.stage('decode_geometry'):
+            geometry = decode_geometry(gdf[geom_col])
+        del gdf[geom_col]
+        _replace_column(gdf, gdf._geometry_column_name, geometry)
+        gdf.set_geometry(gdf._geometry_column_name, inplace=True)
     elif has_geometry(dataframe):
         gdf.set_geometry(dataframe.geometry.name, inplace=True)
 
@@ -116,10 +260,16 @@ def to_carto(dataframe, table_name, credentials=None, if_exists='fail', geom_col
         # Prepare geometry column for the upload
         gdf.rename_geometry(GEOM_COLUMN_NAME, inplace=True)
 
-    table_name = context_manager.copy_from(gdf, table_name, if_exists, cartodbfy)
+    return gdf
 
-    if log_enabled:
-        log.info('Success! Data uploaded to table "{}" correctly'.format(table_name))
+
+def _replace_column(df, name, values):
+    # Deleting and inserting the column replaces the shared array
+    # instead of writing the new values into it
+    loc = df.columns.get_loc(name) if name in df else len(df.columns)
+    if name in df:
+        del df[name]
+    df.insert(loc, name, values)
 
 
 def has_table(table_name, credentials=None, schema=None):
@@ -142,8 +292,8 @@ def has_table(table_name, credentials=None, schema=None):
     if not is_valid_str(table_name):
         raise ValueError('Wrong table name. You should provide a valid table name.')
 
-    context_manager = ContextManager(credentials)
-    return context_manager.has_table(table_name, schema)
+    context_manager = get_context_manager(credentials)
+    return context_manager.has_table(table_name, schema, cached=False)
 
 
 def delete_table(table_name, credentials=None, log_enabled=True):
@@ -161,7 +311,7 @@ def delete_table(table_name, credentials=None, log_enabled=True):
     if not is_valid_str(table_name):
         raise ValueError('Wrong table name. You should provide a valid table name.')
 
-    context_manager = ContextManager(credentials)
+    context_manager = get_context_manager(credentials)
     result = context_manager.delete_table(table_name)
 
     if log_enabled:
@@ -196,14 +346,15 @@ def rename_table(table_name, new_table_name, credentials=None, if_exists='fail',
         raise ValueError('Wrong option for the `if_exists` param. You should provide: {}.'.format(
             ', '.join(IF_EXISTS_OPTIONS)))
 
-    context_manager = ContextManager(credentials)
+    context_manager = get_context_manager(credentials)
     new_table_name = context_manager.rename_table(table_name, new_table_name, if_exists)
 
     if log_enabled:
         log.info('Success! Table "{0}" renamed to table "{1}" correctly'.format(table_name, new_table_name))
 
 
-def copy_table(table_name, new_table_name, credentials=None, if_exists='fail', log_enabled=True):
+def copy_table(table_name, new_table_name, credentials=None, if_exists='fail', log_enabled=True, wait=True,
+               depends_on=None):
     """Copy a table into a new table in the CARTO account.
 
     Args:
@@ -212,6 +363,14 @@ def copy_table(table_name, new_table_name, credentials=None, if_exists='fail', l
         credentials (:py:class:`Credentials <cartoframes.auth.Credentials>`, optional):
             instance of Credentials (username, api_key, etc).
         if_exists (str, optional): 'fail', 'replace', 'append'. Default is 'fail'.
+        wait (bool, optional): wait for the Batch SQL job. If False, the job is queued in
+            a pipeline that runs many jobs concurrently and a Future of the job is returned.
+            Default is True.
+        depends_on (Future or list of Future, optional): with `wait=False`, jobs that must
+            finish successfully before this one is submitted.
+
+    Returns:
+        concurrent.futures.Future, if `wait` is False.
 
     Raises:
         ValueError: if the table names provided are wrong or the if_exists param is not valid.
@@ -229,14 +388,14 @@ def copy_table(table_name, new_table_name, credentials=None, if_exists='fail', l
 
     query = 'SELECT * FROM {}'.format(table_name)
 
-    context_manager = ContextManager(credentials)
-    new_table_name = context_manager.create_table_from_query(query, new_table_name, if_exists)
-
-    if log_enabled:
-        log.info('Success! Table "{0}" copied to table "{1}" correctly'.format(table_name, new_table_name))
+    context_manager = get_context_manager(credentials)
+    return _create_table_from_query(
+        context_manager, query, new_table_name, if_exists, log_enabled, wait, depends_on,
+        lambda name: 'Success! Table "{0}" copied to table "{1}" correctly'.format(table_name, name))
 
 
-def create_table_from_query(query, new_table_name, credentials=None, if_exists='fail', log_enabled=True):
+def create_table_from_query(query, new_table_name, credentials=None, if_exists='fail', log_enabled=True, wait=True,
+                            depends_on=None):
     """Create a new table from an SQL query in the CARTO account.
 
     Args:
@@ -245,10 +404,22 @@ def create_table_from_query(query, new_table_name, credentials=None, if_exists='
         credentials (:py:class:`Credentials <cartoframes.auth.Credentials>`, optional):
             instance of Credentials (username, api_key, etc).
         if_exists (str, optional): 'fail', 'replace', 'append'. Default is 'fail'.
+        wait (bool, optional): wait for the Batch SQL job. If False, the job is queued in
+            a pipeline that runs many jobs concurrently and a Future of the job is returned.
+            Default is True.
+        depends_on (Future or list of Future, optional): with `wait=False`, jobs that must
+            finish successfully before this one is submitted.
+
+    Returns:
+        concurrent.futures.Future, if `wait` is False.
 
     Raises:
         ValueError: if the query or table name provided is wrong or the if_exists param is not valid.
 
+    Example:
+        >>> futures = [create_table_from_query(query, name, wait=False) for query, name in jobs]
+        >>> [future.result() for future in futures]
+
     """
     if not is_sql_query(query):
         raise ValueError('Wrong query. You should provide a valid SQL query.')
@@ -260,14 +431,37 @@ def create_table_from_query(query, new_table_name, credentials=None, if_exists='
         raise ValueError('Wrong option for the `if_exists` param. You should provide: {}.'.format(
             ', '.join(IF_EXISTS_OPTIONS)))
 
-    context_manager = ContextManager(credentials)
-    new_table_name = context_manager.create_table_from_query(query, new_table_name, if_exists)
+    context_manager = get_context_manager(credentials)
+    return _create_table_from_query(
+        context_manager, query, new_table_name, if_exists, log_enabled, wait, depends_on,
+        lambda name: 'Success! Table "{0}" created correctly'.format(name))
 
-    if log_enabled:
-        log.info('Success! Table "{0}" created correctly'.format(new_table_name))
 
+def _create_table_from_query(context_manager, query, new_table_name, if_exists, log_enabled, wait, depends_on,
+                             success_message):
+    if wait:
+        new_table_name = context_manager.create_table_from_query(query, new_table_name, if_exists)
+        if log_enabled:
+            log.info(success_message(new_table_name))
+        return None
+
+    new_table_name, future = context_manager.create_table_from_query(
+        query, new_table_name, if_exists, wait=False, depends_on=depends_on)
+
+    if future is None:
+        # Nothing to run for if_exists='append'
+        future = Future()
+        future.set_result(None)
+
+    def log_success(future):
+        if log_enabled and not future.cancelled() and future.exception() is None:
+            log.info(success_message(new_table_name))
+
+    future.add_done_callback(log_success)
+    return future
 
-def describe_table(table_name, credentials=None, schema=None):
+
+def describe_table(table_name, credentials=None, schema=None, approximate=False):
     """Describe the table in the CARTO account.
 
     Args:
@@ -276,6 +470,10 @@ def describe_table(table_name, credentials=None, schema=None):
             instance of Credentials (username, api_key, etc).
         schema (str, optional):prefix of the table. By default, it gets the
             `current_schema()` using the credentials.
+        approximate (bool, optional): estimate the `num_rows` from the table statistics
+            and the `geom_type` from a sample of the table, instead of scanning the whole
+            table. It falls back to the exact values if the table has no statistics.
+            Default False.
 
     Returns:
         A dict with the `privacy`, `num_rows` and `geom_type` of the table.
@@ -287,21 +485,19 @@ def describe_table(table_name, credentials=None, schema=None):
     if not is_valid_str(table_name):
         raise ValueError('Wrong table name. You should provide a valid table name.')
 
-    context_manager = ContextManager(credentials)
+    context_manager = get_context_manager(credentials)
     query = context_manager.compute_query(table_name, schema)
 
-    try:
-        privacy = context_manager.get_privacy(table_name)
-    except CartoException:
-        # There is an issue with ghost tables when
-        # the table is created for the first time
-        log.debug('We can not retrieve the privacy from the metadata')
-        privacy = ''
+    # The three lookups are independent requests
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        privacy = executor.submit(_get_privacy, context_manager, table_name)
+        num_rows = executor.submit(context_manager.get_num_rows, query, approximate)
+        geom_type = executor.submit(context_manager.get_geom_type, query, approximate)
 
     return {
-        'privacy': privacy,
-        'num_rows': context_manager.get_num_rows(query),
-        'geom_type': context_manager.get_geom_type(query)
+        'privacy': privacy.result(),
+        'num_rows': num_rows.result(),
+        'geom_type': geom_type.result()
     }
 
 
@@ -326,8 +522,18 @@ def update_privacy_table(table_name, privacy, credentials=None, log_enabled=True
     if privacy.upper() not in valid_privacy_values:
         raise ValueError('Wrong privacy. Valid names are {}'.format(', '.join(valid_privacy_values)))
 
-    context_manager = ContextManager(credentials)
+    context_manager = get_context_manager(credentials)
     context_manager.update_privacy_table(table_name, privacy)
 
     if log_enabled:
         log.info('Success! Table "{}" privacy updated correctly'.format(table_name))
+
+
+def _get_privacy(context_manager, table_name):
+    try:
+        return context_manager.get_privacy(table_name)
+    except CartoException:
+        # There is an issue with ghost tables when
+        # the table is created for the first time
+        log.debug('We can not retrieve the privacy from the metadata')
+        return ''
@@ -0,0 +1,213 @@
+import time
+import threading
+
+from concurrent.futures import Future, wait as wait_futures
+
+from carto.exceptions import CartoException
+
+from ...utils.logger import log
+
+DEFAULT_MAX_JOBS = 10
+DEFAULT_POLL_INTERVAL = 0.5
+DEFAULT_MAX_POLL_INTERVAL = 10
+MAX_POLL_ERRORS = 3
+
+PENDING_STATUSES = ['pending', 'running']
+FAILED_STATUSES = ['failed', 'cancelled', 'unknown']
+
+
+class BatchJobPipeline:
+    """Non-blocking runner of Batch SQL jobs.
+
+    Each query is submitted as a Batch SQL job and a `concurrent.futures.Future`
+    is returned at once. Its result is the job information when the job is done,
+    and a CartoException is raised if the job fails. A background thread submits
+    the queued jobs, keeping at most `max_jobs` jobs in the server, and polls all
+    of them in each round. The polling interval starts at `poll_interval` and is
+    doubled up to `max_poll_interval` while no job finishes.
+
+    A job can depend on other futures: it is submitted when all of them are done,
+    and it fails without being submitted if any of them fails.
+
+    Args:
+        batch_sql_client (:py:class:`BatchSQLClient <carto.sql.BatchSQLClient>`): client of the Batch API.
+        max_jobs (int, optional): maximum number of jobs submitted and not finished. Default is 10.
+        poll_interval (float, optional): initial seconds between polls. Default is 0.5.
+        max_poll_interval (float, optional): maximum seconds between polls. Default is 10.
+
+    Example:
+        >>> pipeline = BatchJobPipeline(batch_sql_client)
+        >>> create = pipeline.submit('CREATE TABLE a AS SELECT 1')
+        >>> futures = [pipeline.submit(query, depends_on=create) for query in queries]
+        >>> pipeline.wait()
+
+    """
+    def __init__(self, batch_sql_client, max_jobs=DEFAULT_MAX_JOBS, poll_interval=DEFAULT_POLL_INTERVAL,
+                 max_poll_interval=DEFAULT_MAX_POLL_INTERVAL):
+        if not isinstance(max_jobs, int) or max_jobs < 1:
+            raise ValueError("`max_jobs` parameter must an integer >= 1")
+
+        self.batch_sql_client = batch_sql_client
+        self.max_jobs = max_jobs
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+
+        self._queue = []
+        self._running = {}
+        self._futures = set()
+        self._condition = threading.Condition()
+        self._notified = False
+        self._thread = None
+
+    def submit(self, query, depends_on=None):
+        """Queue a Batch SQL job. It returns a Future of the job information.
+
+        Args:
+            query (str): SQL query of the job.
+            depends_on (Future or list of Future, optional): futures that must be
+                done successfully before the job is submitted.
+
+        """
+        if isinstance(depends_on, Future):
+            depends_on = [depends_on]
+        job = _Job(query, list(depends_on or []))
+
+        with self._condition:
+            self._queue.append(job)
+            self._futures.add(job.future)
+            self._notify()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='BatchJobPipeline', daemon=True)
+                self._thread.start()
+
+        for dependency in job.dependencies:
+            dependency.add_done_callback(lambda _: self._wake_up())
+        job.future.add_done_callback(self._discard)
+
+        return job.future
+
+    def wait(self, futures=None, timeout=None):
+        """Wait for the given futures, by default all the pending jobs. It returns
+        the (done, not_done) sets of `concurrent.futures.wait`."""
+        if futures is None:
+            with self._condition:
+                futures = list(self._futures)
+        return wait_futures(futures, timeout)
+
+    def _run(self):
+        interval = self.poll_interval
+        next_poll_at = 0
+
+        while True:
+            if self._submit_ready_jobs():
+                interval = self.poll_interval
+                next_poll_at = min(next_poll_at, time.time() + interval)
+
+            finished = False
+            if self._running and time.time() >= next_poll_at:
+                finished = self._poll_running_jobs()
+                interval = self.poll_interval if finished else min(interval * 2, self.max_poll_interval)
+                next_poll_at = time.time() + interval
+
+            with self._condition:
+                if not self._queue and not self._running:
+                    self._thread = None
+                    return
+                # Finished jobs make room for the queued ones
+                if not self._notified and not finished:
+                    self._condition.wait(max(next_poll_at - time.time(), 0) if self._running else None)
+                self._notified = False
+
+    def _submit_ready_jobs(self):
+        ready_jobs = []
+        failed_jobs = []
+        with self._condition:
+            for job in list(self._queue):
+                if not all(dependency.done() for dependency in job.dependencies):
+                    continue
+                if any(_has_failed(dependency) for dependency in job.dependencies):
+                    failed_jobs.append(job)
+                elif len(self._running) + len(ready_jobs) < self.max_jobs:
+                    ready_jobs.append(job)
+                else:
+                    continue
+                self._queue.remove(job)
+
+        for job in failed_jobs:
+            if job.future.set_running_or_notify_cancel():
+                job.future.set_exception(CartoException('Batch SQL job not submitted: a dependency failed'))
+
+        for job in ready_jobs:
+            if not job.future.set_running_or_notify_cancel():
+                continue
+            try:
+                data = self.batch_sql_client.create(job.query)
+            except Exception as err:
+                job.future.set_exception(err)
+                continue
+            log.debug('Batch SQL job created with job_id: {}'.format(data['job_id']))
+            if data['status'] in PENDING_STATUSES:
+                with self._condition:
+                    self._running[data['job_id']] = job
+            else:
+                _finish(job, data)
+
+        return len(ready_jobs) > 0
+
+    def _poll_running_jobs(self):
+        with self._condition:
+            running = list(self._running.items())
+
+        finished = False
+        for job_id, job in running:
+            try:
+                data = self.batch_sql_client.read(job_id)
+            except CartoException as err:
+                job.poll_errors += 1
+                if job.poll_errors < MAX_POLL_ERRORS:
+                    log.debug('Batch SQL job {0} status not available: {1}'.format(job_id, err))
+                    continue
+                data = None
+                job.future.set_exception(err)
+            if data is not None and data['status'] in PENDING_STATUSES:
+                continue
+
+            with self._condition:
+                del self._running[job_id]
+            if data is not None:
+                _finish(job, data)
+            finished = True
+
+        return finished
+
+    def _notify(self):
+        self._notified = True
+        self._condition.notify()
+
+    def _wake_up(self):
+        with self._condition:
+            self._notify()
+
+    def _discard(self, future):
+        with self._condition:
+            self._futures.discard(future)
+
+
+class _Job:
+
+    def __init__(self, query, dependencies):
+        self.query = query
+        self.dependencies = dependencies
+        self.future = Future()
+        self.poll_errors = 0
+
+
+def _has_failed(future):
+    return future.cancelled() or future.exception() is not None
+
+
+def _finish(job, data):
+    if data['status'] in FAILED_STATUSES:
+        job.future.set_exception(CartoException('Batch SQL job failed with result: {}'.format(data)))
+    else:
+        job.future.set_result(data)
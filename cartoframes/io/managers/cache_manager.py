@@ -0,0 +1,170 @@
+import os
+import re
+import json
+import time
+import shutil
+import hashlib
+import appdirs
+
+from pandas import read_parquet
+
+from ...utils.logger import log
+from ...utils.utils import check_package
+
+DEFAULT_CACHE_DIR = appdirs.user_cache_dir('cartoframes')
+DEFAULT_CACHE_SIZE = 1024 ** 3  # 1 GB
+
+DATA_FILENAME = 'data.parquet'
+META_FILENAME = 'meta.json'
+
+
+class CacheManager:
+    """Local cache of the results downloaded by `read_carto`.
+
+    Each result is stored as a Parquet file, keyed by the credentials, the
+    normalized query and the column set. An entry is discarded when it is older
+    than `ttl` or when the tables of the query have been updated in the server
+    (`CDB_TableMetadata.updated_at`). Results from tables without metadata are
+    only reused if a `ttl` is set. When the cache exceeds `max_size` bytes the
+    least recently used entries are removed.
+
+    Args:
+        path (str, optional): cache directory. Default is the user cache directory.
+        max_size (int, optional): size budget in bytes. Default is 1 GB.
+        ttl (int, optional): maximum age of the entries in seconds. Default is no limit.
+
+    """
+
+    def __init__(self, path=None, max_size=DEFAULT_CACHE_SIZE, ttl=None):
+        check_package('pyarrow', is_optional=True)
+
+        if not isinstance(max_size, int) or max_size < 0:
+            raise ValueError('`max_size` parameter must an integer >= 0')
+
+        if ttl is not None and (not isinstance(ttl, (int, float)) or ttl < 0):
+            raise ValueError('`ttl` parameter must a number >= 0')
+
+        self.path = path or DEFAULT_CACHE_DIR
+        self.max_size = max_size
+        self.ttl = ttl
+
+    def get_key(self, credentials, query, columns, format='csv'):
+        content = json.dumps([
+            format,
+            credentials.base_url,
+            credentials.username,
+            credentials.api_key,
+            _normalize_query(query),
+            [[column.name, column.pgtype] for column in columns]
+        ])
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def get(self, key, updated_at=None):
+        meta = self._read_meta(key)
+
+        if meta is None:
+            return None
+
+        if not self._is_valid(meta, updated_at):
+            log.debug('Cache entry "{}" expired'.format(key))
+            self.remove(key)
+            return None
+
+        try:
+            df = read_parquet(os.path.join(self.path, key, DATA_FILENAME))
+        except Exception as e:
+            log.debug('Cache entry "{0}" can not be read: {1}'.format(key, e))
+            self.remove(key)
+            return None
+
+        meta['accessed_at'] = time.time()
+        self._write_meta(key, meta)
+
+        log.debug('Cache hit "{}"'.format(key))
+        return df
+
+    def put(self, key, df, updated_at=None):
+        if updated_at is None and self.ttl is None:
+            return
+
+        entry_path = os.path.join(self.path, key)
+        tmp_path = '{0}.{1}.tmp'.format(entry_path, os.getpid())
+
+        try:
+            if not os.path.exists(tmp_path):
+                os.makedirs(tmp_path)
+            df.to_parquet(os.path.join(tmp_path, DATA_FILENAME), index=False)
+            now = time.time()
+            meta = {
+                'created_at': now,
+                'accessed_at': now,
+                'updated_at': updated_at,
+                'size': os.path.getsize(os.path.join(tmp_path, DATA_FILENAME))
+            }
+            with open(os.path.join(tmp_path, META_FILENAME), 'w') as f:
+                json.dump(meta, f)
+            self.remove(key)
+            os.rename(tmp_path, entry_path)
+        except Exception as e:
+            log.debug('Result can not be cached: {}'.format(e))
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            return
+
+        self.evict()
+
+    def remove(self, key):
+        shutil.rmtree(os.path.join(self.path, key), ignore_errors=True)
+
+    def clear(self):
+        """Remove all the entries of the cache."""
+        for key in self._keys():
+            self.remove(key)
+
+    def evict(self):
+        """Remove the least recently used entries until the cache fits in `max_size`."""
+        entries = []
+        for key in self._keys():
+            meta = self._read_meta(key)
+            if meta is None:
+                self.remove(key)
+            else:
+                entries.append((meta['accessed_at'], meta['size'], key))
+
+        size = sum(entry[1] for entry in entries)
+        for _, entry_size, key in sorted(entries):
+            if size <= self.max_size:
+                break
+            log.debug('Cache entry "{}" evicted'.format(key))
+            self.remove(key)
+            size -= entry_size
+
+    def _is_valid(self, meta, updated_at):
+        if self.ttl is not None:
+            if time.time() - meta['created_at'] > self.ttl:
+                return False
+        elif updated_at is None:
+            return False
+
+        return meta['updated_at'] == updated_at
+
+    def _keys(self):
+        if not os.path.isdir(self.path):
+            return []
+        return [name for name in os.listdir(self.path) if not name.endswith('.tmp')]
+
+    def _read_meta(self, key):
+        try:
+            with open(os.path.join(self.path, key, META_FILENAME), 'r') as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+
+    def _write_meta(self, key, meta):
+        with open(os.path.join(self.path, key, META_FILENAME), 'w') as f:
+            json.dump(meta, f)
+
+
+def _normalize_query(query):
+    # Collapse the whitespace out of the string literals
+    parts = query.strip().rstrip(';').split('\'')
+    return '\''.join(re.sub(r'\s+', ' ', part) if i % 2 == 0 else part for i, part in enumerate(parts)).strip()
@@ -1,22 +1,74 @@
+import re
 import time
-
-from pandas import read_csv
+import uuid
+import threading
+import requests
+
+from concurrent.futures import ThreadPoolExecutor
+from math import isfinite
+from pandas import DataFrame, concat, read_csv
+from pandas.util import hash_pandas_object
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ProtocolError, ReadTimeoutError
+from urllib3.util.retry import Retry
 from warnings import warn
 
-from carto.auth import APIKeyAuthClient
 from carto.exceptions import CartoException, CartoRateLimitException
 from carto.sql import SQLClient, BatchSQLClient, CopySQLClient
 
+from .batch_pipeline import BatchJobPipeline
+from .rate_limiter import get_rate_limiter, rate_limited_session
+from .transfer_stats import NULL_STATS
 from ..dataset_info import DatasetInfo
 from ... import __version__
 from ...auth.defaults import get_default_credentials
 from ...utils.logger import log
-from ...utils.geom_utils import encode_geometry_ewkb
-from ...utils.utils import is_sql_query, check_credentials, encode_row, map_geom_type, PG_NULL
-from ...utils.columns import Column, get_dataframe_columns_info, obtain_converters, \
-                      date_columns_names, normalize_name
+from ...utils.binary_copy import binary_column_expression, read_binary_copy
+from ...utils.geom_utils import encode_geometries_ewkb
+from ...utils.utils import is_sql_query, check_credentials, encode_column, map_geom_type, PG_NULL
+from ...utils.columns import Column, ColumnInfo, get_dataframe_columns_info, obtain_converters, obtain_dtypes, \
+                      obtain_na_values, date_columns_names, object_columns_names, normalize_name
 
 DEFAULT_RETRY_TIMES = 3
+DEFAULT_RETRY_WAIT = 1
+DEFAULT_HTTP_RETRIES = 3
+DEFAULT_POOL_SIZE = 16
+DEFAULT_METADATA_TTL = 60
+DEFAULT_CHUNK_SIZE = 10000
+BINARY_BLOCK_SIZE = 1024 * 1024
+COPY_FORMATS = ['csv', 'binary']
+SAMPLE_PERCENTAGE = 1
+RESUME_KEY = 'cartodb_id'
+RESUME_CHUNK_SIZE = 100000
+SYNC_HASH_COLUMN = 'cartoframes_hash'
+CHUNK_ID_COLUMN = 'cartoframes_chunk_id'
+TABLE_QUERY_REGEX = re.compile(r'^SELECT \* FROM "([^"]+)"\."([^"]+)"$')
+
+# Errors, or causes of the client errors, that are retried
+TRANSIENT_ERRORS = (requests.RequestException, ProtocolError, ReadTimeoutError)
+
+_context_managers = {}
+_context_managers_lock = threading.Lock()
+
+
+def get_context_manager(credentials):
+    """Get the ContextManager shared by all the calls with the same credentials.
+    It reuses the HTTP connections of its session. Thread-safe."""
+    credentials = credentials or get_default_credentials()
+    check_credentials(credentials)
+
+    key = (credentials.base_url, credentials.username, credentials.api_key, id(credentials.session))
+    with _context_managers_lock:
+        context_manager = _context_managers.get(key)
+        if context_manager is None:
+            context_manager = ContextManager(credentials)
+            _context_managers[key] = context_manager
+        return context_manager
+
+
+def clear_context_managers():
+    with _context_managers_lock:
+        _context_managers.clear()
 
 
 class ContextManager:
@@ -25,10 +77,29 @@ class ContextManager:
         self.credentials = credentials or get_default_credentials()
         check_credentials(self.credentials)
 
-        self.auth_client = _create_auth_client(self.credentials)
+        self.rate_limiter = get_rate_limiter(self.credentials)
+        self.session = rate_limited_session(
+            self.credentials.session or _create_session(), self.rate_limiter, self.credentials.base_url)
+        self.auth_client = _create_auth_client(self.credentials, session=self.session)
         self.sql_client = SQLClient(self.auth_client)
         self.copy_client = CopySQLClient(self.auth_client)
         self.batch_sql_client = BatchSQLClient(self.auth_client)
+        self.batch_pipeline = BatchJobPipeline(self.batch_sql_client)
+
+        self._schema = None
+        self._metadata = {}
+        self._metadata_lock = threading.Lock()
+
+    def __deepcopy__(self, memo):
+        # The clients, the metadata cache and the Batch pipeline are shared, as with get_context_manager
+        return self
+
+    def __getstate__(self):
+        # Locks and threads can not be pickled: the clients are created again from the credentials
+        return {'credentials': self.credentials}
+
+    def __setstate__(self, state):
+        self.__init__(state['credentials'])
 
     def execute_query(self, query, parse_json=True, do_post=True, format=None, **request_args):
         return self.sql_client.send(query.strip(), parse_json, do_post, format, **request_args)
@@ -36,38 +107,143 @@ class ContextManager:
     def execute_long_running_query(self, query):
         return self.batch_sql_client.create_and_wait_for_completion(query.strip())
 
-    def copy_to(self, source, schema, limit=None, retry_times=DEFAULT_RETRY_TIMES):
-        query = self.compute_query(source, schema)
-        columns = self._get_query_columns_info(query)
-        copy_query = self._get_copy_query(query, columns, limit)
-        return self._copy_to(copy_query, columns, retry_times)
+    def submit_long_running_query(self, query, depends_on=None):
+        """Submit a Batch SQL job without waiting for it. It returns a Future of the job."""
+        return self.batch_pipeline.submit(query.strip(), depends_on)
+
+    def copy_to(self, source, schema, limit=None, retry_times=DEFAULT_RETRY_TIMES, parallel=None, chunksize=None,
+                format='csv', cache=None, columns=None, where=None, bbox=None, resume=None, stats=NULL_STATS):
+        if format not in COPY_FORMATS:
+            raise ValueError("`format` parameter must be one of {}".format(COPY_FORMATS))
+
+        with stats.stage('metadata'):
+            query = self.compute_query(source, schema)
+            columns = _select_columns(self._get_query_columns_info(query), columns)
+        copy_query = self._get_copy_query(query, columns, limit, format, where, bbox)
+
+        if chunksize is not None:
+            if not isinstance(chunksize, int) or chunksize < 1:
+                raise ValueError("`chunksize` parameter must an integer >= 1")
+            return self._copy_to(copy_query, columns, retry_times, chunksize, format, stats)
+
+        if parallel is not None:
+            if not isinstance(parallel, int) or parallel < 1:
+                raise ValueError("`parallel` parameter must be an integer >= 1")
+
+        if resume is not None:
+            if limit is not None or parallel is not None:
+                raise ValueError("`resume` parameter can not be used with `limit` or `parallel`")
+            if RESUME_KEY not in [column.name for column in columns]:
+                raise ValueError("`resume` parameter requires a `{}` column".format(RESUME_KEY))
+
+        if cache is None:
+            return self._download(source, copy_query, columns, limit, retry_times, parallel, format, resume, stats)
+
+        key = cache.get_key(self.credentials, copy_query, columns, format)
+        with stats.stage('metadata'):
+            updated_at = self.get_updated_at(query)
+        with stats.stage('cache'):
+            df = cache.get(key, updated_at)
+        if df is None:
+            df = self._download(source, copy_query, columns, limit, retry_times, parallel, format, resume, stats)
+            with stats.stage('cache'):
+                cache.put(key, df, updated_at)
+        else:
+            stats.add_rows(len(df))
+        return df
 
-    def copy_from(self, gdf, table_name, if_exists='fail', cartodbfy=True):
-        schema = self.get_schema()
+    def copy_from(self, gdf, table_name, if_exists='fail', cartodbfy=True, chunksize=None, workers=None,
+                  retry_times=DEFAULT_RETRY_TIMES, compress=True, key=None, bulk_load=False, indexes=None,
+                  stats=NULL_STATS):
+        if chunksize is not None:
+            if not isinstance(chunksize, int) or chunksize < 1:
+                raise ValueError("`chunksize` parameter must be an integer >= 1")
+
+        if workers is not None:
+            if not isinstance(workers, int) or workers < 1:
+                raise ValueError("`workers` parameter must be an integer >= 1")
+
+        if not isinstance(compress, bool) and (not isinstance(compress, int) or not 1 <= compress <= 9):
+            raise ValueError("`compress` parameter must a boolean or an integer between 1 and 9")
+
+        with stats.stage('metadata'):
+            schema = self.get_schema()
         table_name = self.normalize_table_name(table_name)
         columns = get_dataframe_columns_info(gdf)
 
-        if if_exists == 'replace' or not self.has_table(table_name, schema):
+        if if_exists in ('upsert', 'sync'):
+            key_columns = _select_key_columns(gdf, columns, key)
+
+        index_columns = _select_index_columns(columns, indexes) if indexes is not None else []
+        if cartodbfy:
+            # CDB_CartodbfyTable already indexes the_geom
+            index_columns = [column for column in index_columns if column.dbname != 'the_geom']
+
+        if if_exists == 'sync':
+            columns = [column for column in columns if column.name != SYNC_HASH_COLUMN]
+            with stats.stage('encode'):
+                hashes = _compute_row_hashes(gdf, columns)
+            # Shallow copy to add the column without copying or modifying the data
+            gdf = gdf.copy(deep=False)
+            if SYNC_HASH_COLUMN in gdf:
+                del gdf[SYNC_HASH_COLUMN]
+            gdf[SYNC_HASH_COLUMN] = hashes
+            columns.append(ColumnInfo(SYNC_HASH_COLUMN, SYNC_HASH_COLUMN, 'bigint', False))
+
+        with stats.stage('metadata'):
+            create_table = if_exists == 'replace' or not self.has_table(table_name, schema, cached=False)
+
+        if create_table:
+            if bulk_load:
+                self._bulk_load(gdf, table_name, schema, columns, cartodbfy, index_columns, chunksize, workers,
+                                retry_times, compress, stats)
+                return table_name
             log.debug('Creating table "{}"'.format(table_name))
-            self._create_table_from_columns(table_name, columns, schema, cartodbfy)
+            with stats.stage('ddl'):
+                self._create_table_from_columns(table_name, columns, schema, cartodbfy)
+            self._upload(gdf, table_name, columns, chunksize, workers, retry_times, compress, stats)
+            if index_columns:
+                with stats.stage('ddl'):
+                    self.execute_long_running_query('BEGIN; {}; COMMIT;'.format('; '.join(
+                        [_create_index_query(table_name, column) for column in index_columns] +
+                        [_analyze_table_query(table_name)])))
+            return table_name
         elif if_exists == 'fail':
             raise Exception('Table "{schema}.{table_name}" already exists in your CARTO account. '
                             'Please choose a different `table_name` or use '
                             'if_exists="replace" to overwrite it.'.format(
                                 table_name=table_name, schema=schema))
+        elif if_exists == 'upsert':
+            self._upsert(gdf, table_name, columns, key_columns, chunksize, workers, retry_times, compress,
+                         stats=stats)
+            return table_name
+        elif if_exists == 'sync':
+            self._sync(gdf, table_name, schema, columns, key_columns, chunksize, workers, retry_times, compress,
+                       stats)
+            return table_name
         else:  # 'append'
             pass
 
-        self._copy_from(gdf, table_name, columns)
+        self._upload(gdf, table_name, columns, chunksize, workers, retry_times, compress, stats)
         return table_name
 
-    def create_table_from_query(self, query, table_name, if_exists, cartodbfy=True):
+    def create_table_from_query(self, query, table_name, if_exists, cartodbfy=True, wait=True, depends_on=None):
+        """Create the table `table_name` from the query. If `wait` is False, the
+        Batch SQL job is submitted to the pipeline after the `depends_on` futures
+        and it returns the table name and the Future of the job (None if there is
+        no job to run)."""
         schema = self.get_schema()
         table_name = self.normalize_table_name(table_name)
+        future = None
 
-        if if_exists == 'replace' or not self.has_table(table_name, schema):
+        if if_exists == 'replace' or not self.has_table(table_name, schema, cached=False):
             log.debug('Creating table "{}"'.format(table_name))
-            self._create_table_from_query(query, table_name, schema, cartodbfy)
+            if wait:
+                self._create_table_from_query(query, table_name, schema, cartodbfy)
+            else:
+                future = self.submit_long_running_query(
+                    _create_table_from_query_job(query, table_name, schema, cartodbfy), depends_on)
+                future.add_done_callback(lambda _: self.invalidate_metadata())
         elif if_exists == 'fail':
             raise Exception('Table "{schema}.{table_name}" already exists in your CARTO account. '
                             'Please choose a different `table_name` or use '
@@ -76,15 +252,20 @@ class ContextManager:
         else:  # 'append'
             pass
 
+        if not wait:
+            return table_name, future
         return table_name
 
-    def has_table(self, table_name, schema=None):
+    def has_table(self, table_name, schema=None, cached=True):
+        """Check if the table exists. With `cached` False the answer is not taken from the
+        metadata cache: it must be fresh when it decides to (re)create a table."""
         query = self.compute_query(table_name, schema)
-        return self._check_exists(query)
+        return self._get_metadata(('exists', query), lambda: self._check_exists(query), cached)
 
     def delete_table(self, table_name):
         query = _drop_table_query(table_name)
         output = self.execute_query(query)
+        self.invalidate_metadata()
         return not('notices' in output and 'does not exist' in output['notices'][0])
 
     def rename_table(self, table_name, new_table_name, if_exists='fail'):
@@ -118,30 +299,69 @@ class ContextManager:
 
     def get_schema(self):
         """Get user schema from current credentials"""
-        query = 'SELECT current_schema()'
-        result = self.execute_query(query, do_post=False)
-        return result['rows'][0]['current_schema']
+        if self._schema is None:
+            query = 'SELECT current_schema()'
+            result = self.execute_query(query, do_post=False)
+            self._schema = result['rows'][0]['current_schema']
+        return self._schema
+
+    def invalidate_metadata(self):
+        """Clear the cached table existence and column info. It is called after
+        the DDL queries run by the ContextManager and the SQLClient."""
+        with self._metadata_lock:
+            self._metadata.clear()
+
+    def _get_metadata(self, key, fetch, cached=True):
+        """Metadata cached for DEFAULT_METADATA_TTL seconds, to cover the
+        changes made by other clients. With `cached` False it is fetched again."""
+        with self._metadata_lock:
+            entry = self._metadata.get(key) if cached else None
+        if entry is not None and time.time() - entry[0] < DEFAULT_METADATA_TTL:
+            return entry[1]
+
+        value = fetch()
+        with self._metadata_lock:
+            self._metadata[key] = (time.time(), value)
+        return value
+
+    def get_geom_type(self, query, approximate=False):
+        """Fetch geom type of a remote table or query. With `approximate`, the
+        geometries of a table are read from a sample of its pages."""
+        table = _get_table_from_query(query) if approximate else None
+        if table is not None:
+            geom_type = self._get_sampled_geom_type(*table)
+            if geom_type is not None:
+                return geom_type
 
-    def get_geom_type(self, query):
-        """Fetch geom type of a remote table or query"""
         distict_query = '''
             SELECT distinct ST_GeometryType(the_geom) AS geom_type
             FROM ({}) q
             LIMIT 5
         '''.format(query)
         response = self.execute_query(distict_query, do_post=False)
-        if response and response.get('rows') and len(response.get('rows')) > 0:
-            st_geom_type = response.get('rows')[0].get('geom_type')
-            if st_geom_type:
-                return map_geom_type(st_geom_type[3:])
-        return None
+        return _get_geom_type_from_response(response)
+
+    def get_num_rows(self, query, approximate=False):
+        """Get the number of rows in the query. With `approximate`, the number
+        of rows of a table is estimated from the planner statistics."""
+        table = _get_table_from_query(query) if approximate else None
+        if table is not None:
+            num_rows = self._get_estimated_num_rows(*table)
+            if num_rows is not None:
+                return num_rows
 
-    def get_num_rows(self, query):
-        """Get the number of rows in the query"""
         result = self.execute_query("SELECT COUNT(*) FROM ({query}) _query".format(query=query))
         return result.get('rows')[0].get('count')
 
-    def get_bounds(self, query):
+    def get_bounds(self, query, approximate=False):
+        """Get the bounds of the query. With `approximate`, the bounds of a
+        table are estimated from the planner statistics."""
+        table = _get_table_from_query(query) if approximate else None
+        if table is not None:
+            bounds = self._get_estimated_bounds(*table)
+            if bounds is not None:
+                return bounds
+
         extent_query = '''
             SELECT ARRAY[
                 ARRAY[st_xmin(geom_env), st_ymin(geom_env)],
@@ -156,6 +376,56 @@ class ContextManager:
             return response.get('rows')[0].get('bounds')
         return None
 
+    def _get_estimated_num_rows(self, schema, table_name):
+        """Number of rows from pg_class. Tables never analyzed have
+        reltuples -1 (or 0), so None is returned to count them."""
+        query = '''
+            SELECT reltuples::bigint AS count FROM pg_class
+            WHERE oid = '"{schema}"."{table_name}"'::regclass
+        '''.format(schema=schema, table_name=table_name)
+        try:
+            rows = self.execute_query(query, do_post=False).get('rows')
+        except CartoException:
+            return None
+        if rows and rows[0].get('count') is not None and rows[0].get('count') > 0:
+            return rows[0].get('count')
+        return None
+
+    def _get_estimated_bounds(self, schema, table_name):
+        """Bounds from the geometry statistics gathered by ANALYZE. It is None
+        if the table has no statistics."""
+        query = '''
+            SELECT ARRAY[
+                ARRAY[st_xmin(geom_env), st_ymin(geom_env)],
+                ARRAY[st_xmax(geom_env), st_ymax(geom_env)]
+            ] bounds FROM (
+                SELECT ST_EstimatedExtent('{schema}', '{table_name}', 'the_geom') geom_env
+            ) q
+            WHERE geom_env IS NOT NULL
+        '''.format(schema=schema, table_name=table_name)
+        try:
+            rows = self.execute_query(query, do_post=False).get('rows')
+        except CartoException:
+            return None
+        if rows:
+            return rows[0].get('bounds')
+        return None
+
+    def _get_sampled_geom_type(self, schema, table_name):
+        """Geom type from a sample of the table pages. It is None if no
+        geometry is found in the sample (e.g. small tables)."""
+        query = '''
+            SELECT distinct ST_GeometryType(the_geom) AS geom_type
+            FROM "{schema}"."{table_name}" TABLESAMPLE SYSTEM ({percentage})
+            WHERE the_geom IS NOT NULL
+            LIMIT 5
+        '''.format(schema=schema, table_name=table_name, percentage=SAMPLE_PERCENTAGE)
+        try:
+            response = self.execute_query(query, do_post=False)
+        except CartoException:
+            return None
+        return _get_geom_type_from_response(response)
+
     def get_column_names(self, source, schema=None, exclude=None):
         query = self.compute_query(source, schema)
         columns = [c.name for c in self._get_query_columns_info(query)]
@@ -168,7 +438,7 @@ class ContextManager:
     def is_public(self, query):
         # Used to detect public tables in queries in the publication,
         # because privacy only works for tables.
-        public_auth_client = _create_auth_client(self.credentials, public=True)
+        public_auth_client = _create_auth_client(self.credentials, public=True, session=self.session)
         public_sql_client = SQLClient(public_auth_client)
         exists_query = 'EXPLAIN {}'.format(query)
         try:
@@ -177,6 +447,21 @@ class ContextManager:
         except CartoException:
             return False
 
+    def get_updated_at(self, query):
+        """Last update of the tables of the query, from CDB_TableMetadata.
+        It returns None if any of the tables has no metadata."""
+        updated_at_query = '''
+            WITH t AS (SELECT unnest(CDB_QueryTablesText('{}'))::regclass AS tabname)
+            SELECT CASE WHEN count(m.updated_at) = count(*) THEN max(m.updated_at) END AS updated_at
+            FROM t LEFT JOIN CDB_TableMetadata m ON m.tabname = t.tabname
+        '''.format(query.replace("'", "''"))
+        try:
+            result = self.execute_query(updated_at_query)
+        except CartoException:
+            return None
+        rows = result.get('rows')
+        return rows[0].get('updated_at') if rows else None
+
     def get_table_names(self, query):
         # Used to detect tables in queries in the publication.
         query = 'SELECT CDB_QueryTablesText(\'{}\') as tables'.format(query)
@@ -188,12 +473,8 @@ class ContextManager:
         return tables
 
     def _create_table_from_query(self, query, table_name, schema, cartodbfy=True):
-        query = 'BEGIN; {drop}; {create}; {cartodbfy}; COMMIT;'.format(
-            drop=_drop_table_query(table_name),
-            create=_create_table_from_query_query(table_name, query),
-            cartodbfy=_cartodbfy_query(table_name, schema) if cartodbfy else ''
-        )
-        self.execute_long_running_query(query)
+        self.execute_long_running_query(_create_table_from_query_job(query, table_name, schema, cartodbfy))
+        self.invalidate_metadata()
 
     def _create_table_from_columns(self, table_name, columns, schema, cartodbfy=True):
         query = 'BEGIN; {drop}; {create}; {cartodbfy}; COMMIT;'.format(
@@ -202,6 +483,7 @@ class ContextManager:
             cartodbfy=_cartodbfy_query(table_name, schema) if cartodbfy else ''
         )
         self.execute_long_running_query(query)
+        self.invalidate_metadata()
 
     def compute_query(self, source, schema=None):
         if is_sql_query(source):
@@ -224,18 +506,32 @@ class ContextManager:
             return False
 
     def _get_query_columns_info(self, query):
+        return list(self._get_metadata(('columns', query), lambda: self._fetch_query_columns_info(query)))
+
+    def _fetch_query_columns_info(self, query):
         query = 'SELECT * FROM ({}) _q LIMIT 0'.format(query)
         table_info = self.execute_query(query)
         return Column.from_sql_api_fields(table_info['fields'])
 
-    def _get_copy_query(self, query, columns, limit):
+    def _get_copy_query(self, query, columns, limit, format='csv', where=None, bbox=None):
         query_columns = [
-            column.name for column in columns if (column.name != 'the_geom_webmercator')]
+            binary_column_expression(column) if format == 'binary' else column.name
+            for column in columns if (column.name != 'the_geom_webmercator')]
 
         query = 'SELECT {columns} FROM ({query}) _q'.format(
             query=query,
             columns=','.join(query_columns))
 
+        conditions = []
+        if where is not None:
+            if not isinstance(where, str) or not where.strip():
+                raise ValueError("`where` parameter must a non-empty string")
+            conditions.append('({})'.format(where))
+        if bbox is not None:
+            conditions.append(_bbox_condition(bbox))
+        if conditions:
+            query += ' WHERE {}'.format(' AND '.join(conditions))
+
         if limit is not None:
             if isinstance(limit, int) and (limit >= 0):
                 query += ' LIMIT {limit}'.format(limit=limit)
@@ -244,45 +540,323 @@ class ContextManager:
 
         return query
 
-    def _copy_to(self, query, columns, retry_times):
-        copy_query = 'COPY ({0}) TO stdout WITH (FORMAT csv, HEADER true, NULL \'{1}\')'.format(query, PG_NULL)
+    def _download(self, source, copy_query, columns, limit, retry_times, parallel, format, resume=None,
+                  stats=NULL_STATS):
+        if resume is not None:
+            return self._resumable_copy_to(copy_query, columns, retry_times, format, resume, stats)
+
+        if parallel is not None and parallel > 1 and limit is None:
+            with stats.stage('metadata'):
+                slice_queries = self._get_slice_queries(source, copy_query, columns, parallel)
+            if slice_queries is not None:
+                return self._parallel_copy_to(slice_queries, columns, retry_times, format, stats)
+            log.debug('Parallel downloads need a table with a `{}` column to keep the row order. '
+                      'Downloading it in a single request'.format(Column.INDEX_COLUMN_NAME))
+
+        return self._copy_to(copy_query, columns, retry_times, format=format, stats=stats)
+
+    def _resumable_copy_to(self, query, columns, retry_times, format, resume, stats=NULL_STATS):
+        """Download ordered by RESUME_KEY in chunks of RESUME_CHUNK_SIZE rows.
+        After a failure it continues with the rows after the last chunk received."""
+        last_key = resume.load(resume.get_key(self.credentials, query, format))
+
+        while True:
+            try:
+                resume_query = _resume_query(query, last_key)
+                for df in self._copy_to(resume_query, columns, retry_times, RESUME_CHUNK_SIZE, format, stats):
+                    if len(df) > 0:
+                        last_key = int(df[RESUME_KEY].iloc[-1])
+                        resume.save(df, last_key)
+                break
+            except (CartoException,) + TRANSIENT_ERRORS as err:
+                # The errors of the query would fail again
+                if retry_times <= 0 or not _is_transient_error(err):
+                    raise err
+                retry_times -= 1
+                wait = err.retry_after if isinstance(err, CartoRateLimitException) else DEFAULT_RETRY_WAIT
+                warn('Download interrupted ({0}). Waiting {1} seconds'.format(err, wait))
+                time.sleep(wait)
+                warn('Resuming after {0} {1}'.format(RESUME_KEY, last_key))
+
+        frames = resume.frames
+        resume.clear()
+
+        if not frames:
+            return DataFrame(columns=[column.name for column in columns])
+        return concat(frames, ignore_index=True)
+
+    def _get_slice_queries(self, source, query, columns, parallel):
+        """Split the copy query of a table into disjoint `cartodb_id` ranges, each one
+        ordered by `cartodb_id`, so the concatenated slices keep a defined row order.
+        It returns None for queries and tables without `cartodb_id`."""
+        if is_sql_query(source) or not any(c.name == Column.INDEX_COLUMN_NAME for c in columns):
+            return None
+
+        result = self.execute_query(
+            'SELECT MIN({0}) AS min, MAX({0}) AS max FROM ({1}) _q'.format(Column.INDEX_COLUMN_NAME, query))
+        row = result['rows'][0]
+        if row['min'] is None:
+            return [query]
+        return _range_slice_queries(query, Column.INDEX_COLUMN_NAME, row['min'], row['max'], parallel)
+
+    def _parallel_copy_to(self, queries, columns, retry_times, format='csv', stats=NULL_STATS):
+        with ThreadPoolExecutor(max_workers=len(queries)) as executor:
+            futures = [executor.submit(self._copy_to, query, columns, retry_times, None, format, stats)
+                       for query in queries]
+            dfs = [future.result() for future in futures]
+
+        # Empty slices are skipped to keep the dtypes of the serial download
+        non_empty_dfs = [df for df in dfs if len(df) > 0] or dfs[:1]
+        return concat(non_empty_dfs, ignore_index=True)
+
+    def _copy_to(self, query, columns, retry_times, chunksize=None, format='csv', stats=NULL_STATS):
+        if format == 'binary':
+            copy_query = 'COPY ({0}) TO stdout WITH (FORMAT binary)'.format(query)
+        else:
+            copy_query = 'COPY ({0}) TO stdout WITH (FORMAT csv, HEADER true, NULL \'{1}\')'.format(query, PG_NULL)
 
         try:
-            raw_result = self.copy_client.copyto_stream(copy_query)
+            with stats.stage('network'):
+                if format == 'binary':
+                    raw_result = self.copy_client.copyto(copy_query)
+                else:
+                    raw_result = self.copy_client.copyto_stream(copy_query)
         except CartoRateLimitException as err:
             if retry_times > 0:
                 retry_times -= 1
                 warn('Read call rate limited. Waiting {s} seconds'.format(s=err.retry_after))
                 time.sleep(err.retry_after)
                 warn('Retrying...')
-                return self._copy_to(query, columns, retry_times)
+                return self._copy_to(query, columns, retry_times, chunksize, format, stats)
             else:
                 warn(('Read call was rate-limited. '
                       'This usually happens when there are multiple queries being read at the same time.'))
                 raise err
 
+        if format == 'binary':
+            blocks = stats.timed_iter(raw_result.iter_content(BINARY_BLOCK_SIZE), 'network', 'bytes')
+            if chunksize is not None:
+                return stats.timed_iter(read_binary_copy(blocks, columns, chunksize), 'parse', 'rows')
+            with stats.stage('parse'):
+                df = read_binary_copy(blocks, columns)
+            stats.add_rows(len(df))
+            return df
+
+        dtypes = obtain_dtypes(columns)
+        na_values = obtain_na_values(columns)
         converters = obtain_converters(columns)
         parse_dates = date_columns_names(columns)
-
-        df = read_csv(
-            raw_result,
-            converters=converters,
-            parse_dates=parse_dates)
-
+        object_columns = object_columns_names(columns)
+
+        if stats.measure_converters:
+            converters = {name: stats.timed_function(fn, 'converters') for name, fn in converters.items()}
+
+        with stats.stage('parse'):
+            df = read_csv(
+                stats.timed_reader(raw_result, 'network'),
+                dtype=dtypes,
+                na_values=na_values,
+                keep_default_na=False,
+                true_values=['t'],
+                false_values=['f'],
+                converters=converters,
+                parse_dates=parse_dates,
+                chunksize=chunksize)
+
+        if chunksize is not None:
+            # It returns an iterator of DataFrames
+            return (_set_object_nulls(chunk, object_columns) for chunk in stats.timed_iter(df, 'parse', 'rows'))
+
+        with stats.stage('parse'):
+            df = _set_object_nulls(df, object_columns)
+        stats.add_rows(len(df))
         return df
 
-    def _copy_from(self, dataframe, table_name, columns):
+    def _upload(self, dataframe, table_name, columns, chunksize, workers, retry_times, compress, stats=NULL_STATS):
+        if chunksize is None:
+            self._copy_from(dataframe, table_name, columns, compress, stats)
+        else:
+            self._chunked_copy_from(dataframe, table_name, columns, chunksize, workers or 1, retry_times, compress,
+                                    stats)
+
+    def _bulk_load(self, dataframe, table_name, schema, columns, cartodbfy, index_columns, chunksize, workers,
+                   retry_times, compress, stats=NULL_STATS):
+        """Upload into a bare unlogged staging table, without indexes nor
+        triggers to maintain for each row. Then a single Batch job replaces the
+        table with it, cartodbfies it, builds the indexes and analyzes it."""
+        staging_table_name = _staging_table_name(table_name)
+        log.debug('Uploading to staging table "{}"'.format(staging_table_name))
+        with stats.stage('ddl'):
+            self.execute_query(_create_table_from_columns_query(staging_table_name, columns, unlogged=True))
+
+        if not cartodbfy:
+            # The spatial index is built by CDB_CartodbfyTable otherwise
+            index_columns = [column for column in columns if column.is_geom] + \
+                [column for column in index_columns if not column.is_geom]
+
+        try:
+            self._upload(dataframe, staging_table_name, columns, chunksize, workers, retry_times, compress, stats)
+            queries = [
+                _drop_table_query(table_name),
+                'ALTER TABLE {} SET LOGGED'.format(staging_table_name),
+                _rename_table_query(staging_table_name, table_name).rstrip(';')
+            ]
+            if cartodbfy:
+                queries.append(_cartodbfy_query(table_name, schema))
+            queries.extend(_create_index_query(table_name, column) for column in index_columns)
+            queries.append(_analyze_table_query(table_name))
+            with stats.stage('ddl'):
+                self.execute_long_running_query('BEGIN; {}; COMMIT;'.format('; '.join(queries)))
+        except Exception:
+            self.execute_query(_drop_table_query(staging_table_name))
+            raise
+        finally:
+            self.invalidate_metadata()
+
+    def _upsert(self, dataframe, table_name, columns, key_columns, chunksize, workers, retry_times, compress,
+                deleted=None, stats=NULL_STATS):
+        """Upload the dataframe into an unlogged staging table. Then, in a
+        single transaction, update the rows of the table with the same key
+        and insert the rest. The rows with the keys of the `deleted` dataframe
+        are deleted in the same transaction. The staging tables are always dropped."""
+        stages = [(dataframe, columns)]
+        if deleted is not None:
+            stages.append((deleted, key_columns))
+
+        staging_table_names = []
+        try:
+            for stage_dataframe, stage_columns in stages:
+                staging_table_name = _staging_table_name(table_name)
+                log.debug('Uploading to staging table "{}"'.format(staging_table_name))
+                with stats.stage('ddl'):
+                    self.execute_query(
+                        _create_table_from_columns_query(staging_table_name, stage_columns, unlogged=True))
+                staging_table_names.append(staging_table_name)
+                if len(stage_dataframe) > 0:
+                    self._upload(stage_dataframe, staging_table_name, stage_columns, chunksize, workers, retry_times,
+                                 compress, stats)
+
+            queries = []
+            if deleted is not None:
+                queries.append(_delete_query(table_name, staging_table_names[1], key_columns))
+            queries.append(_upsert_query(table_name, staging_table_names[0], columns, key_columns))
+            queries.extend(_drop_table_query(name) for name in staging_table_names)
+            with stats.stage('ddl'):
+                self.execute_long_running_query('BEGIN; {}; COMMIT;'.format('; '.join(queries)))
+        except Exception:
+            for staging_table_name in staging_table_names:
+                self.execute_query(_drop_table_query(staging_table_name))
+            raise
+
+    def _sync(self, dataframe, table_name, schema, columns, key_columns, chunksize, workers, retry_times, compress,
+              stats=NULL_STATS):
+        """Upload only the rows inserted, updated or deleted since the last sync.
+        Each row of the table stores the hash of its values in SYNC_HASH_COLUMN,
+        so only the keys and the hashes of the table are downloaded to compare.
+        Rows without hash (e.g. the first sync of a table) are uploaded again."""
+        with stats.stage('ddl'):
+            self.execute_query(_add_hash_column_query(table_name))
+        self.invalidate_metadata()
+
+        with stats.stage('metadata'):
+            remote_hashes = self._get_remote_hashes(table_name, schema, key_columns, retry_times)
+        changed, deleted = _compute_sync_delta(dataframe, remote_hashes, key_columns)
+        log.debug('Sync "{0}": {1} rows to upsert, {2} rows to delete'.format(table_name, len(changed), len(deleted)))
+
+        if len(changed) > 0 or len(deleted) > 0:
+            self._upsert(changed, table_name, columns, key_columns, chunksize, workers, retry_times, compress,
+                         deleted if len(deleted) > 0 else None, stats)
+
+    def _get_remote_hashes(self, table_name, schema, key_columns, retry_times):
+        query = 'SELECT {columns} FROM "{schema}"."{table_name}"'.format(
+            columns=','.join([column.dbname for column in key_columns] + [SYNC_HASH_COLUMN]),
+            schema=schema,
+            table_name=table_name)
+        return self._copy_to(query, self._get_query_columns_info(query), retry_times)
+
+    def _copy_from(self, dataframe, table_name, columns, compress=True, stats=NULL_STATS):
         query = """
             COPY {table_name}({columns}) FROM stdin WITH (FORMAT csv, DELIMITER '|', NULL '{null}');
         """.format(
             table_name=table_name, null=PG_NULL,
             columns=','.join(column.dbname for column in columns)).strip()
-        data = _compute_copy_data(dataframe, columns)
-        self.copy_client.copyfrom(query, data)
+        data = stats.timed_iter(_compute_copy_data(dataframe, columns, stats=stats), 'encode', 'bytes')
+        # The client gzips each encoded chunk as it is sent
+        with stats.stage('network'):
+            self.copy_client.copyfrom(query, data, **_compression_args(compress))
+        stats.add_rows(len(dataframe))
+
+    def _chunked_copy_from(self, dataframe, table_name, columns, chunksize, workers, retry_times, compress=True,
+                           stats=NULL_STATS):
+        """Upload the dataframe in chunks of `chunksize` rows over `workers` concurrent
+        COPY requests. The chunks are loaded into an unlogged staging table with the
+        number of each chunk in CHUNK_ID_COLUMN, so a chunk retried after a lost
+        response does not duplicate rows. Then the staging table is appended to the
+        table in a single transaction. If any chunk fails, the table is not modified
+        and the staging table is dropped."""
+        starts = range(0, len(dataframe), chunksize)
+        staging_table_name = _staging_table_name(table_name)
+        staging_columns = columns + [ColumnInfo(CHUNK_ID_COLUMN, CHUNK_ID_COLUMN, 'integer', False)]
+
+        with stats.stage('ddl'):
+            self.execute_query(_create_table_from_columns_query(staging_table_name, staging_columns, unlogged=True))
+
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(self._copy_from_chunk, dataframe.iloc[start:start + chunksize],
+                                           chunk_id, staging_table_name, staging_columns, retry_times, compress,
+                                           stats)
+                           for chunk_id, start in enumerate(starts)]
+                errors = []
+                for start, future in zip(starts, futures):
+                    try:
+                        future.result()
+                    except CartoException as err:
+                        errors.append((start, err))
+
+            if errors:
+                raise CartoException('{0} of {1} chunks failed to upload (rows starting at {2}): {3}'.format(
+                    len(errors), len(futures), ', '.join(str(start) for start, _ in errors), errors[0][1]))
+
+            with stats.stage('ddl'):
+                self.execute_long_running_query('BEGIN; {0}; {1}; COMMIT;'.format(
+                    _insert_query(table_name, staging_table_name, columns),
+                    _drop_table_query(staging_table_name)))
+        except Exception:
+            self.execute_query(_drop_table_query(staging_table_name))
+            raise
+
+    def _copy_from_chunk(self, chunk, chunk_id, staging_table_name, staging_columns, retry_times, compress=True,
+                         stats=NULL_STATS, retry=False):
+        """Load a chunk into the staging table. Only the transient errors are
+        retried: the errors of the query or the data would fail again."""
+        try:
+            if retry:
+                # The failed attempt may have loaded the chunk anyway
+                with stats.stage('ddl'):
+                    self.execute_query('DELETE FROM {0} WHERE {1} = {2}'.format(
+                        staging_table_name, CHUNK_ID_COLUMN, chunk_id))
+            # Shallow copy to add the column without copying or modifying the data
+            chunk_with_id = chunk.copy(deep=False)
+            chunk_with_id[CHUNK_ID_COLUMN] = chunk_id
+            self._copy_from(chunk_with_id, staging_table_name, staging_columns, compress, stats)
+        except CartoException as err:
+            if retry_times > 0 and _is_transient_error(err):
+                retry_times -= 1
+                wait = err.retry_after if isinstance(err, CartoRateLimitException) else DEFAULT_RETRY_WAIT
+                warn('Chunk upload failed: {0}. Waiting {1} seconds'.format(err, wait))
+                time.sleep(wait)
+                warn('Retrying...')
+                return self._copy_from_chunk(chunk, chunk_id, staging_table_name, staging_columns, retry_times,
+                                             compress, stats, retry=True)
+            else:
+                raise err
+        log.debug('Uploaded chunk of {} rows'.format(len(chunk)))
 
     def _rename_table(self, table_name, new_table_name):
         query = _rename_table_query(table_name, new_table_name)
         self.execute_query(query)
+        self.invalidate_metadata()
 
     def normalize_table_name(self, table_name):
         norm_table_name = normalize_name(table_name)
@@ -297,18 +871,216 @@ def _drop_table_query(table_name, if_exists=True):
         if_exists='IF EXISTS' if if_exists else '')
 
 
-def _create_table_from_columns_query(table_name, columns):
+def _create_table_from_columns_query(table_name, columns, unlogged=False):
     columns = ['{name} {type}'.format(name=column.dbname, type=column.dbtype) for column in columns]
 
-    return 'CREATE TABLE {table_name} ({columns})'.format(
+    return 'CREATE {unlogged}TABLE {table_name} ({columns})'.format(
+        unlogged='UNLOGGED ' if unlogged else '',
         table_name=table_name,
         columns=', '.join(columns))
 
 
+def _staging_table_name(table_name):
+    return '{0}_staging_{1}'.format(table_name[:40], uuid.uuid4().hex[:8])
+
+
+def _insert_query(table_name, staging_table_name, columns):
+    column_names = ','.join(column.dbname for column in columns)
+    return 'INSERT INTO {table_name} ({columns}) SELECT {columns} FROM {staging_table_name}'.format(
+        table_name=table_name, staging_table_name=staging_table_name, columns=column_names)
+
+
+def _is_transient_error(err):
+    """Rate limits, connection errors and server errors. The client wraps the
+    original error, which keeps the status code of the HTTP errors."""
+    if isinstance(err, (CartoRateLimitException,) + TRANSIENT_ERRORS):
+        return True
+    cause = err.args[0] if err.args else None
+    return isinstance(cause, TRANSIENT_ERRORS) or (getattr(cause, 'status_code', None) or 0) >= 500
+
+
+def _find_columns(columns, names, param):
+    if isinstance(names, str):
+        names = [names]
+    if not names or not isinstance(names, (list, tuple)):
+        raise ValueError("`{}` parameter must a column name or a list of column names".format(param))
+
+    columns_by_name = {column.name: column for column in columns}
+    missing_names = [name for name in names if name not in columns_by_name]
+    if missing_names:
+        raise ValueError('Columns not found in the dataframe: {}'.format(', '.join(missing_names)))
+
+    return [columns_by_name[name] for name in names]
+
+
+def _select_key_columns(dataframe, columns, key):
+    key_columns = _find_columns(columns, key, 'key')
+
+    if dataframe.duplicated(subset=[column.name for column in key_columns]).any():
+        raise ValueError('The `key` columns have duplicated values')
+
+    return key_columns
+
+
+def _select_index_columns(columns, indexes):
+    return _find_columns(columns, indexes, 'indexes')
+
+
+def _create_index_query(table_name, column):
+    return 'CREATE INDEX ON {table_name} USING {method} ({column})'.format(
+        table_name=table_name,
+        method='GIST' if column.is_geom else 'BTREE',
+        column=column.dbname)
+
+
+def _analyze_table_query(table_name):
+    return 'ANALYZE {}'.format(table_name)
+
+
+def _add_hash_column_query(table_name):
+    return 'ALTER TABLE {table_name} ADD COLUMN IF NOT EXISTS {column} bigint'.format(
+        table_name=table_name, column=SYNC_HASH_COLUMN)
+
+
+def _compute_row_hashes(df, columns):
+    """64-bit hash of each row, computed from the values encoded for COPY FROM."""
+    fields = {}
+    for column in columns:
+        values = df[column.name]
+
+        if column.is_geom:
+            values = encode_geometries_ewkb(values)
+
+        fields[column.name] = encode_column(values)
+
+    return hash_pandas_object(DataFrame(fields, index=df.index), index=False).values.view('int64')
+
+
+def _compute_sync_delta(dataframe, remote_hashes, key_columns):
+    """Rows of the dataframe that are new or have a different hash, and keys
+    of the table that are not in the dataframe."""
+    key_names = [column.name for column in key_columns]
+    remote_hashes = remote_hashes.rename(columns=dict(zip(remote_hashes.columns, key_names + ['remote_hash'])))
+    local_hashes = dataframe[key_names].assign(
+        local_hash=dataframe[SYNC_HASH_COLUMN].values,
+        position=range(len(dataframe)))
+
+    merged = local_hashes.merge(remote_hashes, on=key_names, how='left')
+    changed = (merged['local_hash'] != merged['remote_hash']).fillna(True).astype(bool)
+    positions = merged['position'][changed].unique()
+
+    remote_keys = remote_hashes[key_names].merge(dataframe[key_names], on=key_names, how='left', indicator=True)
+    deleted = remote_keys.loc[remote_keys['_merge'] == 'left_only', key_names].reset_index(drop=True)
+
+    return dataframe.iloc[positions], deleted
+
+
+def _key_condition(key_columns):
+    return ' AND '.join('t.{0} = s.{0}'.format(column.dbname) for column in key_columns)
+
+
+def _delete_query(table_name, staging_table_name, key_columns):
+    return 'DELETE FROM {table_name} t USING {staging_table_name} s WHERE {condition}'.format(
+        table_name=table_name,
+        staging_table_name=staging_table_name,
+        condition=_key_condition(key_columns))
+
+
+def _upsert_query(table_name, staging_table_name, columns, key_columns):
+    """UPDATE + INSERT pair. Unlike ON CONFLICT, it does not need a unique
+    constraint on the key columns."""
+    key_names = [column.dbname for column in key_columns]
+    names = [column.dbname for column in columns]
+    key_condition = _key_condition(key_columns)
+
+    update = 'UPDATE {table_name} t SET {values} FROM {staging_table_name} s WHERE {condition}'.format(
+        table_name=table_name,
+        staging_table_name=staging_table_name,
+        values=', '.join('{0} = s.{0}'.format(name) for name in names if name not in key_names),
+        condition=key_condition)
+    insert = '''INSERT INTO {table_name} ({names}) SELECT {names} FROM {staging_table_name} s
+        WHERE NOT EXISTS (SELECT 1 FROM {table_name} t WHERE {condition})'''.format(
+        table_name=table_name,
+        staging_table_name=staging_table_name,
+        names=','.join(names),
+        condition=key_condition)
+
+    if len(names) == len(key_names):
+        return insert
+    return '{0}; {1}'.format(update, insert)
+
+
+def _create_table_from_query_job(query, table_name, schema, cartodbfy=True):
+    return 'BEGIN; {drop}; {create}; {cartodbfy}; COMMIT;'.format(
+        drop=_drop_table_query(table_name),
+        create=_create_table_from_query_query(table_name, query),
+        cartodbfy=_cartodbfy_query(table_name, schema) if cartodbfy else ''
+    )
+
+
 def _create_table_from_query_query(table_name, query):
     return 'CREATE TABLE {table_name} AS ({query})'.format(table_name=table_name, query=query)
 
 
+def _select_columns(columns, names):
+    if names is None:
+        return [c for c in columns if c.name != 'the_geom_webmercator']
+
+    if isinstance(names, str) or not all(isinstance(name, str) for name in names):
+        raise ValueError("`columns` parameter must a list of column names")
+
+    columns_by_name = {c.name: c for c in columns}
+    missing_names = [name for name in names if name not in columns_by_name]
+    if missing_names:
+        raise ValueError('Columns not found in the source: {}'.format(', '.join(missing_names)))
+
+    return [columns_by_name[name] for name in names]
+
+
+def _bbox_condition(bbox):
+    try:
+        west, south, east, north = [float(value) for value in bbox]
+        if not all(isfinite(value) for value in (west, south, east, north)):
+            raise ValueError()
+    except (TypeError, ValueError):
+        raise ValueError("`bbox` parameter must a tuple of numbers (west, south, east, north)")
+
+    return 'the_geom && ST_MakeEnvelope({0}, {1}, {2}, {3}, 4326)'.format(
+        repr(west), repr(south), repr(east), repr(north))
+
+
+def _get_table_from_query(query):
+    """(schema, table_name) if the query is the one computed for a table,
+    None for any other query."""
+    match = TABLE_QUERY_REGEX.match(query)
+    if match:
+        return match.groups()
+    return None
+
+
+def _get_geom_type_from_response(response):
+    if response and response.get('rows') and len(response.get('rows')) > 0:
+        st_geom_type = response.get('rows')[0].get('geom_type')
+        if st_geom_type:
+            return map_geom_type(st_geom_type[3:])
+    return None
+
+
+def _resume_query(query, last_key):
+    condition = '' if last_key is None else ' WHERE {0} > {1}'.format(RESUME_KEY, last_key)
+    return 'SELECT * FROM ({0}) _r{1} ORDER BY {2}'.format(query, condition, RESUME_KEY)
+
+
+def _range_slice_queries(query, key, min_value, max_value, parallel):
+    step = (max_value - min_value) // parallel + 1
+    queries = []
+    for lower in range(min_value, max_value + 1, step):
+        queries.append(
+            'SELECT * FROM ({query}) _s WHERE {key} >= {lower} AND {key} < {upper} ORDER BY {key}'.format(
+                query=query, key=key, lower=lower, upper=lower + step))
+    return queries
+
+
 def _cartodbfy_query(table_name, schema):
     return "SELECT CDB_CartodbfyTable('{schema}', '{table_name}')" \
         .format(schema=schema, table_name=table_name)
@@ -319,28 +1091,64 @@ def _rename_table_query(table_name, new_table_name):
         table_name=table_name, new_table_name=new_table_name)
 
 
-def _create_auth_client(credentials, public=False):
+def _create_session():
+    """Session with keep-alive connections, a pool sized for the concurrent
+    downloads and uploads, and retries of connection errors and gateway errors."""
+    retry = Retry(
+        total=DEFAULT_HTTP_RETRIES,
+        read=0,
+        backoff_factor=0.5,
+        status_forcelist=[502, 503, 504],
+        raise_on_status=False)
+    session = requests.Session()
+    for prefix in ['https://', 'http://']:
+        session.mount(prefix, HTTPAdapter(
+            pool_connections=DEFAULT_POOL_SIZE, pool_maxsize=DEFAULT_POOL_SIZE, max_retries=retry))
+    return session
+
+
+def _compression_args(compress):
+    """Arguments of `CopySQLClient.copyfrom`. True keeps its default gzip level."""
+    if compress is True:
+        return {}
+    if compress is False:
+        return {'compress': False}
+    return {'compress': True, 'compression_level': compress}
+
+
+def _create_auth_client(credentials, public=False, session=None):
+    # Imported here because carto.auth loads pkg_resources, which is slow to import
+    from carto.auth import APIKeyAuthClient
     return APIKeyAuthClient(
         base_url=credentials.base_url,
         api_key='default_public' if public else credentials.api_key,
-        session=credentials.session,
+        session=session or credentials.session,
         client_id='cartoframes_{}'.format(__version__),
         user_agent='cartoframes_{}'.format(__version__)
     )
 
 
-def _compute_copy_data(df, columns):
-    for index, _ in df.iterrows():
-        row_data = []
+def _set_object_nulls(df, object_columns):
+    # Text nulls are parsed as NaN: set them to None
+    for name in object_columns:
+        if name in df:
+            df[name] = df[name].where(df[name].notnull(), None)
+    return df
+
+
+def _compute_copy_data(df, columns, chunk_size=DEFAULT_CHUNK_SIZE, stats=NULL_STATS):
+    for start in range(0, len(df), chunk_size):
+        chunk = df.iloc[start:start + chunk_size]
+        fields = []
         for column in columns:
-            val = df.at[index, column.name]
+            values = chunk[column.name]
 
             if column.is_geom:
-                val = encode_geometry_ewkb(val)
+                with stats.stage('encode_geometry'):
+                    values = encode_geometries_ewkb(values)
 
-            row_data.append(encode_row(val))
+            fields.append(encode_column(values))
 
-        csv_row = b'|'.join(row_data)
-        csv_row += b'\n'
+        rows = fields[0].str.cat(fields[1:], sep='|') if len(fields) > 1 else fields[0]
 
-        yield csv_row
+        yield '{}\n'.format('\n'.join(rows)).encode('utf-8')
@@ -0,0 +1,156 @@
+import copy
+import time
+import threading
+
+from collections import OrderedDict
+from requests.adapters import BaseAdapter
+
+from ...utils.logger import log
+
+LIMIT_HEADER = 'Carto-Rate-Limit-Limit'
+REMAINING_HEADER = 'Carto-Rate-Limit-Remaining'
+RESET_HEADER = 'Carto-Rate-Limit-Reset'
+RETRY_AFTER_HEADER = 'Retry-After'
+
+RATE_DECREASE_FACTOR = 0.5
+MIN_RATE = 0.1
+
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(credentials):
+    """Get the RateLimiter shared by all the sessions of the account."""
+    key = (credentials.base_url, credentials.username)
+    with _rate_limiters_lock:
+        rate_limiter = _rate_limiters.get(key)
+        if rate_limiter is None:
+            rate_limiter = RateLimiter()
+            _rate_limiters[key] = rate_limiter
+        return rate_limiter
+
+
+def clear_rate_limiters():
+    with _rate_limiters_lock:
+        _rate_limiters.clear()
+
+
+class RateLimiter:
+    """Token bucket that paces the requests of an account.
+
+    The bucket mirrors the CARTO rate limits: its capacity, the available
+    tokens and the refill rate are taken from the `Carto-Rate-Limit-*` headers
+    of every response. Until the headers show a partially consumed bucket the
+    refill rate is unknown and requests are not delayed. A 429 response blocks
+    the requests for `Retry-After` seconds and halves the refill rate, which is
+    raised again by the headers of the next successful responses.
+
+    Thread-safe: a token is reserved under the lock and the wait is done
+    outside it, so concurrent requests are spaced by 1 / rate seconds.
+
+    """
+    def __init__(self):
+        self.capacity = None
+        self.tokens = None
+        self.rate = None
+        self.blocked_until = 0
+        self._updated_at = time.time()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Wait until a request can be sent. Returns the seconds waited."""
+        with self._lock:
+            now = time.time()
+            wait = max(self.blocked_until - now, 0)
+            if self.rate is not None:
+                self._refill(now)
+                self.tokens -= 1
+                if self.tokens < 0:
+                    wait = max(wait, -self.tokens / self.rate)
+
+        if wait > 0:
+            log.debug('Rate limit: waiting {:.2f} s'.format(wait))
+            time.sleep(wait)
+        return wait
+
+    def update(self, response):
+        """Read the rate limit headers of a response."""
+        headers = response.headers
+        with self._lock:
+            now = time.time()
+            if response.status_code == 429:
+                retry_after = _parse_number(headers.get(RETRY_AFTER_HEADER)) or 1
+                self.blocked_until = max(self.blocked_until, now + retry_after)
+                if self.rate is not None:
+                    self.rate = max(self.rate * RATE_DECREASE_FACTOR, MIN_RATE)
+                    self.tokens = min(self.tokens, 0)
+
+            limit = _parse_number(headers.get(LIMIT_HEADER))
+            remaining = _parse_number(headers.get(REMAINING_HEADER))
+            reset = _parse_number(headers.get(RESET_HEADER))
+            if limit is None or remaining is None or limit <= 0:
+                return
+
+            self.capacity = limit
+            if reset and remaining < limit:
+                # Reset is the time to refill the bucket completely
+                rate = (limit - remaining) / reset
+                if response.status_code != 429 or self.rate is None:
+                    self.rate = max(rate, MIN_RATE)
+
+            # Tokens reserved by the requests still in flight are kept
+            self._updated_at = now
+            self.tokens = remaining if self.tokens is None else min(self.tokens, remaining)
+
+    def _refill(self, now):
+        self.tokens = min(self.tokens + (now - self._updated_at) * self.rate, self.capacity)
+        self._updated_at = now
+
+    def __deepcopy__(self, memo):
+        # Copies of a session keep pacing the requests of the account with the same limiter
+        return self
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+class RateLimitedAdapter(BaseAdapter):
+    """Transport adapter that sends every request of another adapter through a RateLimiter."""
+
+    def __init__(self, rate_limiter, adapter):
+        self.rate_limiter = rate_limiter
+        self.adapter = adapter
+        super(RateLimitedAdapter, self).__init__()
+
+    def send(self, request, **kwargs):
+        self.rate_limiter.acquire()
+        response = self.adapter.send(request, **kwargs)
+        self.rate_limiter.update(response)
+        return response
+
+    def close(self):
+        self.adapter.close()
+
+
+def rate_limited_session(session, rate_limiter, base_url):
+    """Copy of a session that paces the requests to `base_url` with the rate limiter.
+    The session is not modified: the copy shares its settings and its adapters, and
+    the adapter of `base_url`, e.g. with custom retries, is wrapped in the copy only."""
+    limited_session = copy.copy(session)
+    limited_session.adapters = OrderedDict(session.adapters)
+    prefix = base_url.rstrip('/') + '/'
+    limited_session.mount(prefix, RateLimitedAdapter(rate_limiter, session.get_adapter(prefix)))
+    return limited_session
+
+
+def _parse_number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
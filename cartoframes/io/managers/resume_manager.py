@@ -0,0 +1,100 @@
+import os
+import json
+import shutil
+import hashlib
+
+from pandas import read_parquet
+
+from ...utils.logger import log
+from ...utils.utils import check_package
+
+STATE_FILENAME = 'state.json'
+PART_FILENAME = 'part-{:05d}.parquet'
+
+
+class ResumeManager:
+    """Progress of the resumable downloads of `read_carto`.
+
+    The rows received are kept as a list of DataFrames together with the last
+    `cartodb_id`, so an interrupted download continues with the next rows. If a
+    `path` is set, each DataFrame is also stored there as a Parquet file and a
+    new process downloading the same query continues from the stored progress.
+    The stored progress is removed when the download finishes.
+
+    Args:
+        path (str, optional): directory to store the progress. Default is memory only.
+
+    """
+
+    def __init__(self, path=None):
+        if path is not None:
+            check_package('pyarrow', is_optional=True)
+
+        self.path = path
+        self.key = None
+        self.frames = []
+        self.last_key = None
+
+    def get_key(self, credentials, query, format='csv'):
+        content = json.dumps([format, credentials.base_url, credentials.username, query])
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def load(self, key):
+        """Start the download `key`, with the progress stored by a previous
+        process if any. Returns the last `cartodb_id` received."""
+        self.key = key
+        self.frames = []
+        self.last_key = None
+
+        state = self._read_state()
+        if state is None:
+            return None
+
+        try:
+            self.frames = [read_parquet(self._part_path(i)) for i in range(state['parts'])]
+            self.last_key = state['last_key']
+            log.debug('Resuming download "{0}" after {1}'.format(key, self.last_key))
+        except Exception as e:
+            log.debug('Download progress "{0}" can not be read: {1}'.format(key, e))
+            self.clear()
+            self.frames = []
+
+        return self.last_key
+
+    def save(self, df, last_key):
+        self.frames.append(df)
+        self.last_key = last_key
+
+        if self.path is None:
+            return
+
+        entry_path = os.path.join(self.path, self.key)
+        if not os.path.exists(entry_path):
+            os.makedirs(entry_path)
+
+        parts = len(self.frames)
+        df.to_parquet(self._part_path(parts - 1), index=False)
+
+        # The state is replaced atomically once the part is written
+        state_path = os.path.join(entry_path, STATE_FILENAME)
+        tmp_path = '{0}.{1}.tmp'.format(state_path, os.getpid())
+        with open(tmp_path, 'w') as f:
+            json.dump({'parts': parts, 'last_key': last_key}, f)
+        os.replace(tmp_path, state_path)
+
+    def clear(self):
+        """Remove the stored progress of the current download."""
+        if self.path is not None and self.key is not None:
+            shutil.rmtree(os.path.join(self.path, self.key), ignore_errors=True)
+
+    def _part_path(self, index):
+        return os.path.join(self.path, self.key, PART_FILENAME.format(index))
+
+    def _read_state(self):
+        if self.path is None:
+            return None
+        try:
+            with open(os.path.join(self.path, self.key, STATE_FILENAME), 'r') as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
@@ -0,0 +1,233 @@
+import time
+import threading
+
+from ...utils.logger import log
+
+STAGES = [
+    'metadata', 'cache', 'ddl', 'network', 'parse', 'converters', 'decode_geometry', 'encode', 'encode_geometry'
+]
+
+
+class TransferStats:
+    """Timings and volume of a `read_carto` or `to_carto` call.
+
+    The time of each stage is measured in seconds and is exclusive: the time
+    of a stage nested in another one (e.g. "network" while "parse" reads the
+    response) is only counted in the inner stage. The stages are:
+
+    - metadata: queries for the schema, columns, table existence and row hashes.
+    - cache: reading the local cache of `read_carto`.
+    - ddl: table creation, cartodbfy, indexes and the queries merging staging tables.
+    - network: waiting for the COPY streams, including the gzip (de)compression.
+    - parse: decoding the downloaded CSV or binary data into DataFrames.
+    - converters: the column converters of the CSV download, included only if
+      `measure_converters` is True, as it adds a small cost per value.
+    - decode_geometry: geometries of the downloaded data or of the `geom_col` to upload.
+    - encode: encoding the DataFrame rows as CSV for the upload.
+    - encode_geometry: encoding the geometries to upload as EWKB.
+
+    Concurrent downloads and uploads (`parallel`, `workers`) measure each thread,
+    so the sum of the stages can be greater than the `total` time.
+
+    Args:
+        callback (function, optional): function called with this object when the transfer finishes.
+        measure_converters (bool, optional): measure the "converters" stage. Default is False.
+
+    Example:
+        >>> stats = TransferStats()
+        >>> gdf = read_carto('table_name', stats=stats)
+        >>> stats.to_dict()
+        {'operation': 'read', 'rows': 1000, 'bytes': 52000, 'total': 0.8, 'stages': {...}}
+
+    """
+    def __init__(self, callback=None, measure_converters=False):
+        self.callback = callback
+        self.measure_converters = measure_converters
+        self.operation = None
+        self.rows = 0
+        self.bytes = 0
+        self.total = None
+        self.stages = {}
+        self._started_at = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.total if self.total else None
+
+    @property
+    def bytes_per_second(self):
+        return self.bytes / self.total if self.total else None
+
+    def start(self, operation):
+        self.operation = operation
+        self._started_at = time.time()
+
+    def finish(self):
+        self.total = time.time() - self._started_at
+        log.debug('Transfer stats: {}'.format(self.to_dict()))
+        if self.callback is not None:
+            self.callback(self)
+
+    def add_rows(self, rows):
+        with self._lock:
+            self.rows += rows
+
+    def add_bytes(self, size):
+        with self._lock:
+            self.bytes += size
+
+    def stage(self, name):
+        """Context manager that adds the time spent in it to the stage `name`."""
+        return _Stage(self, name)
+
+    def timed_iter(self, iterable, name, counter=None):
+        """Iterate adding the time of each step to the stage `name`. The length
+        of each item is added to `counter`: "bytes" or "rows"."""
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            if counter == 'bytes':
+                self.add_bytes(len(item))
+            elif counter == 'rows':
+                self.add_rows(len(item))
+            yield item
+
+    def timed_reader(self, stream, name):
+        """File-like wrapper of `stream` that adds the time of its reads to the stage `name`."""
+        return _TimedReader(self, stream, name)
+
+    def timed_function(self, function, name):
+        """Wrap `function` to add the time of its calls to the stage `name`."""
+        def fn(*args, **kwargs):
+            with self.stage(name):
+                return function(*args, **kwargs)
+        return fn
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'operation': self.operation,
+                'rows': self.rows,
+                'bytes': self.bytes,
+                'total': self.total,
+                'stages': {name: self.stages[name] for name in STAGES if name in self.stages}
+            }
+
+    def _add_time(self, name, seconds):
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0) + seconds
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def __repr__(self):
+        return 'TransferStats({})'.format(self.to_dict())
+
+
+class NullTransferStats(TransferStats):
+    """TransferStats that measures nothing, used when no stats are requested."""
+
+    def start(self, operation):
+        pass
+
+    def finish(self):
+        pass
+
+    def add_rows(self, rows):
+        pass
+
+    def add_bytes(self, size):
+        pass
+
+    def stage(self, name):
+        return _NULL_STAGE
+
+    def timed_iter(self, iterable, name, counter=None):
+        return iterable
+
+    def timed_reader(self, stream, name):
+        return stream
+
+    def timed_function(self, function, name):
+        return function
+
+
+NULL_STATS = NullTransferStats()
+
+
+def get_transfer_stats(stats):
+    """TransferStats for the `stats` parameter: a TransferStats, a callback or None."""
+    if stats is None:
+        return NULL_STATS
+    if isinstance(stats, TransferStats):
+        return stats
+    if callable(stats):
+        return TransferStats(callback=stats)
+    raise ValueError('`stats` parameter must a TransferStats instance or a function')
+
+
+class _Stage:
+
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        # [start time, time of the nested stages]
+        self.stats._stack().append([time.time(), 0])
+        return self
+
+    def __exit__(self, *args):
+        stack = self.stats._stack()
+        started_at, nested = stack.pop()
+        elapsed = time.time() - started_at
+        self.stats._add_time(self.name, elapsed - nested)
+        if stack:
+            stack[-1][1] += elapsed
+
+
+class _NullStage:
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _TimedReader:
+
+    def __init__(self, stats, stream, name):
+        self._stats = stats
+        self._stream = stream
+        self._name = name
+
+    def read(self, *args):
+        with self._stats.stage(self._name):
+            data = self._stream.read(*args)
+        self._stats.add_bytes(len(data))
+        return data
+
+    def readline(self, *args):
+        with self._stats.stage(self._name):
+            data = self._stream.readline(*args)
+        self._stats.add_bytes(len(data))
+        return data
+
+    def __iter__(self):
+        return self._stats.timed_iter(self._stream, self._name, 'bytes')
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
@@ -0,0 +1,279 @@
+"""Parser of the PostgreSQL binary COPY format"""
+
+import struct
+import numpy as np
+
+from collections import OrderedDict
+
+from pandas import DataFrame, Series, RangeIndex, concat
+
+from .columns import Column, NULLABLE_DTYPES
+
+BINARY_SIGNATURE = b'PGCOPY\n\xff\r\n\x00'
+BINARY_HEADER_LENGTH = len(BINARY_SIGNATURE) + 8
+BINARY_BATCH_SIZE = 100000
+
+PG_EPOCH = np.datetime64('2000-01-01T00:00:00', 'us')
+PG_EPOCH_DATE = np.datetime64('2000-01-01', 'D')
+
+# Types sent by the server in their binary representation.
+# Geometries are sent as EWKB bytes by PostGIS.
+BINARY_PGTYPES = [
+    'smallint', 'int2', 'integer', 'int4', 'int', 'bigint', 'int8',
+    'real', 'float4', 'double precision', 'float8',
+    'boolean', 'bool',
+    'date', 'timestamp', 'timestamp without time zone', 'timestamptz', 'timestamp with time zone',
+    'text', 'varchar', 'character varying', 'geometry'
+]
+
+FIXED_WIDTH_DTYPES = {
+    'int16': '>i2',
+    'int32': '>i4',
+    'int64': '>i8',
+    'float32': '>f4',
+    'float64': '>f8',
+    'bool': '?',
+    'datetime64[D]': '>i4',
+    'datetime64[ns]': '>i8'
+}
+
+_int32 = struct.Struct('>i')
+
+TEXT_PGTYPES = ['text', 'varchar', 'character varying']
+# Timestamps sent as UTC microseconds, parsed as UTC by `read_csv` in the CSV format
+UTC_PGTYPES = ['timestamptz', 'timestamp with time zone']
+
+
+def binary_column_expression(column):
+    """Select expression of a column for a binary COPY. The types without a
+    binary decoder are cast to text in the server (numeric to float8)."""
+    if _has_binary_decoder(column):
+        return column.name
+    if column.dtype in Column.FLOAT_DTYPES:
+        return '{0}::float8 AS {0}'.format(column.name)
+    return '{0}::text AS {0}'.format(column.name)
+
+
+def read_binary_copy(blocks, columns, chunksize=None):
+    """Parse a binary COPY stream into a DataFrame.
+
+    Args:
+        blocks (iterable): bytes blocks of the COPY TO response.
+        columns (list): list of :py:class:`Column <cartoframes.utils.columns.Column>`
+            in the same order as the COPY query.
+        chunksize (int, optional): if set, an iterator of DataFrames with `chunksize`
+            rows is returned.
+
+    """
+    frames = _iter_binary_frames(blocks, columns, chunksize or BINARY_BATCH_SIZE)
+
+    if chunksize is not None:
+        return frames
+
+    dfs = list(frames)
+    if len(dfs) == 1:
+        return dfs[0]
+
+    return concat(dfs)
+
+
+def _has_binary_decoder(column):
+    if column.pgtype not in BINARY_PGTYPES:
+        return False
+    # The dtype must match the binary representation, e.g. timestamptz is mapped to object
+    return column.pgtype == 'geometry' or column.pgtype in TEXT_PGTYPES or column.dtype in FIXED_WIDTH_DTYPES
+
+
+def _iter_binary_frames(blocks, columns, batch_size):
+    pending = []
+    pending_rows = 0
+    buffer = b''
+    header = False
+    finished = False
+    start = 0
+
+    for block in blocks:
+        if finished:
+            break
+
+        buffer += block
+
+        if not header:
+            if len(buffer) < BINARY_HEADER_LENGTH:
+                continue
+            buffer = buffer[_parse_header(buffer):]
+            header = True
+
+        offset, finished, starts, lengths = _parse_tuples(buffer, len(columns))
+        if len(starts) > 0:
+            pending.append(_build_dataframe(buffer, starts, lengths, columns))
+            pending_rows += len(starts)
+        buffer = buffer[offset:]
+
+        while pending_rows >= batch_size:
+            df = pending[0] if len(pending) == 1 else concat(pending)
+            yield _set_index(df.iloc[:batch_size], start)
+            pending = [df.iloc[batch_size:]] if len(df) > batch_size else []
+            pending_rows -= batch_size
+            start += batch_size
+
+    if not finished:
+        raise ValueError('Incomplete binary COPY stream.')
+
+    if pending_rows > 0:
+        yield _set_index(pending[0] if len(pending) == 1 else concat(pending), start)
+    elif start == 0:
+        empty = np.zeros((0, len(columns)), dtype=np.int64)
+        yield _build_dataframe(b'', empty, empty, columns)
+
+
+def _parse_header(buffer):
+    if not buffer.startswith(BINARY_SIGNATURE):
+        raise ValueError('Wrong binary COPY signature.')
+    extension_length = _int32.unpack_from(buffer, len(BINARY_SIGNATURE) + 4)[0]
+    return BINARY_HEADER_LENGTH + extension_length
+
+
+def _parse_tuples(buffer, field_count):
+    """Locate the complete tuples of the buffer. It returns the offset of the
+    first incomplete tuple, whether the trailer has been reached, and the data
+    offsets and lengths (-1 for nulls) of the fields, with a row per tuple.
+
+    Every tuple starts with its int16 field count, so the offsets holding those
+    two bytes are candidate tuples. Their fields are located with numpy, a field
+    of all the candidates at a time, and only the walk from a tuple to the next
+    one is done in Python."""
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    end = len(buffer)
+
+    count_bytes = struct.pack('>h', field_count)
+    candidates = np.flatnonzero((data[:-1] == count_bytes[0]) & (data[1:] == count_bytes[1]))
+    offsets, lengths, tuple_ends = _locate_fields(data, candidates + 2, field_count)
+
+    candidate_index = np.full(end, -1, dtype=np.int64)
+    candidate_index[candidates] = np.arange(len(candidates))
+    candidate_index = memoryview(candidate_index)
+    tuple_ends = tuple_ends.tolist()
+
+    rows = []
+    offset = 0
+    finished = False
+    while offset + 2 <= end:
+        # A field count of -1 is the trailer
+        if buffer[offset] == 0xff:
+            finished = True
+            offset += 2
+            break
+        index = candidate_index[offset]
+        if index < 0 or tuple_ends[index] < 0:
+            break
+        rows.append(index)
+        offset = tuple_ends[index]
+
+    return offset, finished, offsets[rows], lengths[rows]
+
+
+def _locate_fields(data, offsets, field_count):
+    """Data offsets and lengths of the fields following each offset, and the end
+    of the last one. The end is -1 if the fields do not fit in the data."""
+    end = len(data)
+    field_offsets = np.zeros((len(offsets), field_count), dtype=np.int64)
+    field_lengths = np.zeros((len(offsets), field_count), dtype=np.int64)
+    complete = np.ones(len(offsets), dtype=bool)
+
+    for i in range(field_count):
+        complete &= offsets + 4 <= end
+        offsets = np.where(complete, offsets, 0)
+        lengths = _read_int32(data, offsets)
+        field_offsets[:, i] = offsets + 4
+        field_lengths[:, i] = lengths
+        offsets = offsets + 4 + np.maximum(lengths, 0)
+
+    complete &= offsets <= end
+    return field_offsets, field_lengths, np.where(complete, offsets, -1)
+
+
+def _read_int32(data, offsets):
+    if len(data) < 4:
+        return np.zeros(len(offsets), dtype=np.int64)
+    indices = offsets[:, np.newaxis] + np.arange(4)
+    return data[indices].view('>i4').ravel().astype(np.int64)
+
+
+def _build_dataframe(buffer, starts, lengths, columns):
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    # Passing `columns` would reindex the Series through object arrays, which is slow for datetimes
+    return DataFrame(OrderedDict(
+        (column.name, _decode_column(column, data, buffer, starts[:, i], lengths[:, i]))
+        for i, column in enumerate(columns)
+    ))
+
+
+def _set_index(df, start):
+    df.index = RangeIndex(start, start + len(df))
+    return df
+
+
+def _decode_column(column, data, buffer, starts, lengths):
+    null_mask = lengths < 0
+    if column.dtype in Column.FLOAT_DTYPES or (column.dtype in FIXED_WIDTH_DTYPES and _has_binary_decoder(column)):
+        series = _decode_fixed_width(column.dtype, data, starts, null_mask)
+        return series.dt.tz_localize('UTC') if column.pgtype in UTC_PGTYPES else series
+    elif column.pgtype == 'geometry':
+        return Series([None if length < 0 else buffer[start:start + length]
+                       for start, length in zip(starts.tolist(), lengths.tolist())], dtype=object)
+    else:
+        return _decode_text(data, starts, lengths, null_mask)
+
+
+def _decode_text(data, starts, lengths, null_mask):
+    """Decode all the values of a column at once. They are joined with NUL
+    bytes as separators, which can not be part of a PostgreSQL text."""
+    sizes = np.maximum(lengths, 0)
+    total = int(sizes.sum())
+    value_offsets = np.cumsum(sizes) - sizes
+    source = np.repeat(starts - value_offsets, sizes) + np.arange(total)
+    target = np.repeat(np.arange(len(sizes)), sizes) + np.arange(total)
+
+    joined = np.zeros(total + len(sizes), dtype=np.uint8)
+    joined[target] = data[source]
+    values = np.array(joined.tobytes().decode('utf-8').split('\x00')[:-1], dtype=object)
+    values[null_mask] = None
+    return Series(values, dtype=object)
+
+
+def _decode_fixed_width(dtype, data, starts, null_mask):
+    binary_dtype = np.dtype(FIXED_WIDTH_DTYPES[dtype])
+    # The null fields have no data: they read the first bytes of the buffer
+    indices = np.where(null_mask, 0, starts)[:, np.newaxis] + np.arange(binary_dtype.itemsize)
+    values = data[indices].view(binary_dtype).ravel() if len(data) > 0 else np.zeros(0, dtype=binary_dtype)
+
+    if dtype == 'datetime64[ns]':
+        # Microseconds since 2000-01-01. Infinite timestamps are mapped to NaT
+        null_mask |= (values == np.iinfo(np.int64).max) | (values == np.iinfo(np.int64).min)
+        values = (PG_EPOCH + np.where(null_mask, 0, values).astype('timedelta64[us]')).astype('datetime64[ns]')
+        values[null_mask] = np.datetime64('NaT')
+        return Series(values)
+
+    if dtype == 'datetime64[D]':
+        # Days since 2000-01-01
+        null_mask |= (values == np.iinfo(np.int32).max) | (values == np.iinfo(np.int32).min)
+        values = (PG_EPOCH_DATE + np.where(null_mask, 0, values).astype('timedelta64[D]')).astype('datetime64[ns]')
+        values[null_mask] = np.datetime64('NaT')
+        return Series(values)
+
+    values = values.astype(binary_dtype.newbyteorder('='))
+
+    if dtype in Column.FLOAT_DTYPES:
+        values[null_mask] = np.nan
+        return Series(values)
+
+    if dtype in NULLABLE_DTYPES:
+        series = Series(values).astype(NULLABLE_DTYPES[dtype])
+    else:
+        series = Series(values, dtype=object)
+
+    if null_mask.any():
+        series[null_mask] = None
+
+    return series
@@ -3,7 +3,10 @@
 import re
 
 from unidecode import unidecode
+from io import StringIO
 from collections import namedtuple
+from pandas import read_csv
+from pandas.api.types import pandas_dtype
 
 from .utils import dtypes2pg, pg2dtypes, PG_NULL
 from .geom_utils import decode_geometry_item, detect_encoding_type
@@ -90,6 +93,35 @@ class Column(object):
 ColumnInfo = namedtuple('ColumnInfo', ['name', 'dbname', 'dbtype', 'is_geom'])
 
 
+def _is_available_dtype(dtype):
+    try:
+        pandas_dtype(dtype)
+        return True
+    except TypeError:
+        return False
+
+
+def _can_parse_nullable_bool():
+    """The "boolean" dtype exists from pandas 1.0, but `read_csv` only
+    applies `true_values` and `false_values` to it in later versions."""
+    if not _is_available_dtype('boolean'):
+        return False
+    try:
+        df = read_csv(StringIO('x\nt\nf\n'), dtype={'x': 'boolean'}, true_values=['t'], false_values=['f'])
+        return df['x'].tolist() == [True, False]
+    except (TypeError, ValueError):
+        return False
+
+
+# Nullable extension dtypes: integers from pandas 0.24 and booleans when `read_csv` can parse them
+NULLABLE_DTYPES = {dtype: nullable_dtype for dtype, nullable_dtype in [
+    ('int16', 'Int16'), ('int32', 'Int32'), ('int64', 'Int64')
+] if _is_available_dtype(nullable_dtype)}
+
+if _can_parse_nullable_bool():
+    NULLABLE_DTYPES['bool'] = 'boolean'
+
+
 def _extract_pgtype(fields):
     if 'pgtype' in fields:
         return fields['pgtype']
@@ -181,20 +213,37 @@ def normalize_name(column_name):
     return normalize_names([column_name])[0]
 
 
-def obtain_converters(columns):
-    converters = {}
+def obtain_dtypes(columns):
+    """Get the dtypes to parse the columns with the C engine. Integer and boolean
+    columns use the nullable extension dtypes when they are available."""
+    dtypes = {}
 
-    for int_column_name in int_columns_names(columns):
-        converters[int_column_name] = _convert_int
+    for column in columns:
+        if column.dtype in Column.FLOAT_DTYPES or column.dtype == Column.OBJECT_DTYPE:
+            dtypes[column.name] = column.dtype
+        elif column.dtype in NULLABLE_DTYPES:
+            dtypes[column.name] = NULLABLE_DTYPES[column.dtype]
 
-    for float_column_name in float_columns_names(columns):
-        converters[float_column_name] = _convert_float
+    return dtypes
 
-    for bool_column_name in bool_columns_names(columns):
-        converters[bool_column_name] = _convert_bool
 
-    for object_column_name in object_columns_names(columns):
-        converters[object_column_name] = _convert_object
+def obtain_na_values(columns):
+    """Get the null values of every column. Floats also receive `NaN` because
+    the default NA values are disabled to keep empty strings in text columns."""
+    return {x.name: [PG_NULL, 'NaN'] if x.dtype in Column.FLOAT_DTYPES else [PG_NULL] for x in columns}
+
+
+def obtain_converters(columns):
+    """Get the converters of the columns without an available nullable dtype"""
+    converters = {}
+
+    for column in columns:
+        if column.dtype in NULLABLE_DTYPES:
+            continue
+        if column.dtype in Column.INT_DTYPES:
+            converters[column.name] = _convert_int
+        elif column.dtype == Column.BOOL_DTYPE:
+            converters[column.name] = _convert_bool
 
     return converters
 
@@ -225,12 +274,6 @@ def _convert_int(x):
     return int(x)
 
 
-def _convert_float(x):
-    if _is_none_null(x):
-        return None
-    return float(x)
-
-
 def _convert_bool(x):
     if _is_none_null(x):
         return None
@@ -241,12 +284,6 @@ def _convert_bool(x):
     return bool(x)
 
 
-def _convert_object(x):
-    if _is_none_null(x):
-        return None
-    return x
-
-
 def _is_none_null(x):
     return x is None or x == PG_NULL
 
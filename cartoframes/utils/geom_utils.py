@@ -1,16 +1,25 @@
 import re
 import json
 import shapely
+import numpy as np
 import binascii as ba
 
+from pandas import Series
 from geopandas import GeoSeries, GeoDataFrame, points_from_xy
 
+try:
+    # Vectorized geometry functions (shapely>=2.0)
+    from shapely import from_wkb, from_wkt, to_wkb, set_srid, is_geometry
+except ImportError:
+    from_wkb = from_wkt = to_wkb = set_srid = is_geometry = None
+
 ENC_SHAPELY = 'shapely'
 ENC_WKB = 'wkb'
 ENC_WKB_HEX = 'wkb-hex'
 ENC_WKB_BHEX = 'wkb-bhex'
 ENC_WKT = 'wkt'
 ENC_EWKT = 'ewkt'
+VECTORIZED_ENC_TYPES = [ENC_SHAPELY, ENC_WKB, ENC_WKB_HEX, ENC_WKB_BHEX, ENC_WKT, ENC_EWKT]
 SPHERICAL_TOLERANCE = 0.0001
 SIMPLIFY_TOLERANCE = 0.001
 
@@ -132,11 +141,40 @@ def decode_geometry(geom_col):
         if any(geom_col):
             first_geom = next(item for item in geom_col if item is not None)
             enc_type = detect_encoding_type(first_geom)
+        if from_wkb is not None and enc_type in VECTORIZED_ENC_TYPES:
+            return _decode_geometry_array(geom_col, enc_type)
         return GeoSeries(geom_col.apply(lambda g: decode_geometry_item(g, enc_type)))
     else:
         return geom_col
 
 
+def _decode_geometry_array(geom_col, enc_type):
+    """Decode the whole column in a single vectorized call.
+    Null and empty items are masked and replaced by empty geometries."""
+    values = Series(np.asarray(geom_col, dtype=object), index=geom_col.index)
+    null_mask = (values.isnull() | ~values.astype(bool)).values
+    values = values.where(~null_mask, None)
+
+    if enc_type == ENC_SHAPELY:
+        geoms = values.values.copy()
+    elif enc_type in (ENC_WKB_HEX, ENC_WKB_BHEX):
+        # Unhexlify before loading: the GEOS hex reader is much slower than the binary one
+        geoms = from_wkb(np.array([None if g is None else ba.unhexlify(g) for g in values], dtype=object))
+    elif enc_type == ENC_EWKT:
+        parts = values.str.extract(r'^SRID=(\d+);(.*)$')
+        geoms = from_wkt(parts[1].where(parts[1].notnull(), values).values)
+        geoms = set_srid(geoms, parts[0].fillna(0).astype(int).values)
+    elif enc_type == ENC_WKT:
+        geoms = from_wkt(values.values)
+    else:  # ENC_WKB
+        geoms = from_wkb(values.values)
+
+    if null_mask.any():
+        geoms[null_mask] = decode_geometry_item(None, enc_type)
+
+    return GeoSeries(geoms, index=geom_col.index)
+
+
 def detect_encoding_type(input_geom):
     """
     Detect geometry encoding type:
@@ -241,8 +279,19 @@ def encode_geometry_ewkt(geom, srid=4326):
 
 def encode_geometry_ewkb(geom, srid=4326):
     if isinstance(geom, shapely.geometry.base.BaseGeometry):
-        shapely.geos.lgeos.GEOSSetSRID(geom._geom, srid)
-        return shapely.wkb.dumps(geom, hex=True, include_srid=True)
+        # The SRID is set in a copy of the geometry
+        return shapely.wkb.dumps(geom, hex=True, srid=srid)
+
+
+def encode_geometries_ewkb(geom_col, srid=4326):
+    """Encode a column of shapely geometries into EWKB hexadecimal strings.
+    Items that are not geometries are encoded as None. The input geometries are not modified."""
+    if to_wkb is None:
+        return geom_col.map(lambda g: encode_geometry_ewkb(g, srid))
+
+    values = np.asarray(geom_col, dtype=object)
+    geoms = np.where(is_geometry(values), values, None)
+    return Series(to_wkb(set_srid(geoms, srid), hex=True, include_srid=True), index=geom_col.index)
 
 
 def to_geojson(geom, buffer_simplify=True):
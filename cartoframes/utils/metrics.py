@@ -1,7 +1,10 @@
 import os
 import uuid
+import queue
+import atexit
 import requests
 import functools
+import threading
 
 from .logger import log
 from .utils import default_config_path, read_from_config, save_in_config, \
@@ -15,8 +18,16 @@ EVENT_SOURCE = 'cartoframes'
 UUID_KEY = 'uuid'
 ENABLED_KEY = 'enabled'
 METRICS_FILENAME = 'metrics.json'
+METRICS_URL = 'https://carto.com/api/metrics'
+METRICS_TIMEOUT = 2
+METRICS_FLUSH_INTERVAL = 5
+METRICS_QUEUE_SIZE = 100
 
 _metrics_config = None
+_metrics_queue = queue.Queue(maxsize=METRICS_QUEUE_SIZE)
+_metrics_stop = threading.Event()
+_metrics_lock = threading.Lock()
+_metrics_thread = None
 
 
 def setup_metrics(enabled):
@@ -28,6 +39,7 @@ def setup_metrics(enabled):
     '''
     global _metrics_config
 
+    init_metrics_config()
     _metrics_config[ENABLED_KEY] = enabled
 
     save_in_config(_metrics_config, filename=METRICS_FILENAME)
@@ -35,6 +47,8 @@ def setup_metrics(enabled):
 
 @silent_fail
 def init_metrics_config():
+    """Load the metrics configuration. It is called on the first use instead
+    of at import time."""
     global _metrics_config
 
     filepath = default_config_path(METRICS_FILENAME)
@@ -56,11 +70,13 @@ def create_metrics_config():
 
 
 def get_metrics_uuid():
+    init_metrics_config()
     if _metrics_config is not None:
         return _metrics_config.get(UUID_KEY)
 
 
 def get_metrics_enabled():
+    init_metrics_config()
     if _metrics_config is not None:
         return _metrics_config.get(ENABLED_KEY)
 
@@ -87,11 +103,11 @@ def build_metrics_data(event_name, extra_metrics_data):
 
 
 @silent_fail
-def post_metrics(event_name, extra_metrics_data):
-    if get_metrics_enabled():
-        json_data = build_metrics_data(event_name, extra_metrics_data)
-        result = requests.post('https://carto.com/api/metrics', json=json_data, timeout=2)
-        log.debug('Metrics sent! {0} {1}'.format(result.status_code, json_data))
+def post_metrics(metrics_data, credentials=None, session=requests):
+    if credentials is not None and credentials.user_id:
+        metrics_data['user_id'] = credentials.user_id
+    result = session.post(METRICS_URL, json=metrics_data, timeout=METRICS_TIMEOUT)
+    log.debug('Metrics sent! {0} {1}'.format(result.status_code, metrics_data))
 
 
 def send_metrics(event_name):
@@ -100,24 +116,70 @@ def send_metrics(event_name):
         def wrapper_func(*args, **kwargs):
             result = func(*args, **kwargs)
 
-            extra_metrics_data = build_extra_metrics_data(func, *args, **kwargs)
-            post_metrics(event_name, extra_metrics_data)
+            credentials = get_metrics_credentials(func, *args, **kwargs)
+            enqueue_metrics(event_name, credentials)
 
             return result
         return wrapper_func
     return decorator_func
 
 
-def build_extra_metrics_data(decorated_function, *args, **kwargs):
+@silent_fail
+def enqueue_metrics(event_name, credentials=None):
+    """Queue the event to be sent by the metrics thread. It never blocks:
+    the event is dropped if the queue is full."""
+    if get_metrics_enabled():
+        metrics_data = build_metrics_data(event_name, None)
+        try:
+            _metrics_queue.put_nowait((metrics_data, credentials))
+        except queue.Full:
+            log.debug('Metrics queue full. Event dropped: {}'.format(event_name))
+            return
+        start_metrics_thread()
+
+
+def start_metrics_thread():
+    global _metrics_thread
+
+    with _metrics_lock:
+        if _metrics_thread is None or not _metrics_thread.is_alive():
+            # A previous flush stopped the last thread
+            _metrics_stop.clear()
+            _metrics_thread = threading.Thread(target=_metrics_worker, name='cartoframes-metrics', daemon=True)
+            _metrics_thread.start()
+
+
+def _flush_metrics(timeout=METRICS_TIMEOUT):
+    """Send the queued events and stop the metrics thread. It waits at most
+    `timeout` seconds. Called at exit."""
+    _metrics_stop.set()
+    if _metrics_thread is not None:
+        _metrics_thread.join(timeout)
+
+
+def _metrics_worker():
+    session = requests.Session()
+    while True:
+        # The queue is sent once more after the thread is stopped
+        stopped = _metrics_stop.wait(METRICS_FLUSH_INTERVAL)
+        while True:
+            try:
+                metrics_data, credentials = _metrics_queue.get_nowait()
+            except queue.Empty:
+                break
+            post_metrics(metrics_data, credentials, session)
+        if stopped:
+            break
+
+
+def get_metrics_credentials(decorated_function, *args, **kwargs):
     try:
         credentials = get_parameter_from_decorator(
             'credentials', decorated_function, *args, **kwargs)
-        credentials = get_credentials(credentials)
-        return {'user_id': credentials.user_id} if credentials and credentials.user_id else {}
+        return get_credentials(credentials)
 
     except ValueError:  # When the decorated function doesn't contain `credentials`
-        return {}
+        return None
 
 
-# Run this once
-init_metrics_config()
+atexit.register(_flush_metrics)
@@ -13,14 +13,14 @@ import inspect
 import requests
 import geopandas
 import numpy as np
-import pkg_resources
 import semantic_version
 
 from functools import wraps
 from datetime import datetime, timezone
 from warnings import catch_warnings, filterwarnings
+from pandas import Series
 from pyrestcli.exceptions import ServerErrorException
-from pandas.api.types import is_datetime64_any_dtype as is_datetime
+from pandas.api.types import CategoricalDtype, infer_dtype, is_datetime64_any_dtype as is_datetime
 
 from .logger import log
 from ..exceptions import DOError
@@ -115,10 +115,17 @@ def dtypes2pg(dtype):
         'int16': 'smallint',
         'int32': 'integer',
         'int64': 'bigint',
+        'Int16': 'smallint',
+        'Int32': 'integer',
+        'Int64': 'bigint',
         'float32': 'real',
         'float64': 'double precision',
+        'Float32': 'real',
+        'Float64': 'double precision',
         'object': 'text',
+        'string': 'text',
         'bool': 'boolean',
+        'boolean': 'boolean',
         'datetime64[ns]': 'timestamp',
         'datetime64[ns, UTC]': 'timestamp',
     }
@@ -393,6 +400,51 @@ def encode_row(row):
     return '{}'.format(row).encode('utf-8')
 
 
+def encode_column(series):
+    """Encode a whole Series into a Series of CSV fields for COPY FROM.
+
+    It applies the same rules as `encode_row` column-wise: floats map the special
+    values to `Infinity`, `-Infinity` and `NaN`, bytestrings are decoded, and the
+    text fields with special keys are quoted. Missing values of non-float columns
+    (None, NaN, NaT) are mapped to `PG_NULL`.
+    """
+    if isinstance(series.dtype, CategoricalDtype):
+        # Encoded as the values, a Categorical can not hold the new strings
+        series = series.astype(object)
+
+    dtype = series.dtype
+    kind = dtype.kind if isinstance(dtype, np.dtype) else None
+
+    if kind == 'f':
+        values = series.values
+        encoded = values.astype(str).astype(object)
+        encoded[np.isnan(values)] = 'NaN'
+        encoded[np.isposinf(values)] = 'Infinity'
+        encoded[np.isneginf(values)] = '-Infinity'
+        return Series(encoded, index=series.index)
+
+    if kind in ('i', 'u'):
+        return Series(series.values.astype(str).astype(object), index=series.index)
+
+    if kind == 'b':
+        return Series(np.where(series.values, 'True', 'False').astype(object), index=series.index)
+
+    null_mask = series.isnull()
+
+    if kind == 'M' or is_datetime(series):
+        encoded = series.astype(str)
+    elif infer_dtype(series, skipna=True) in ('string', 'empty'):
+        encoded = series.astype(str)
+        quote_mask = encoded.str.contains(r'["|\n]', regex=True)
+        if quote_mask.any():
+            encoded[quote_mask] = '"' + encoded[quote_mask].str.replace('"', '""', regex=False) + '"'
+    else:
+        encoded = series.map(lambda value: encode_row(value).decode('utf-8'))
+
+    encoded[null_mask] = PG_NULL
+    return encoded
+
+
 def create_hash(value):
     return hashlib.md5(str(value).encode()).hexdigest()
 
@@ -433,15 +485,34 @@ def timelogger(method):
     return fn
 
 
-def check_package(pkg_name, spec='*', is_optional=False):
+def get_package_version(pkg_name):
+    """Installed version of the package, or None if it is not installed.
+    It uses importlib.metadata, much faster to load than pkg_resources."""
+    try:
+        from importlib import metadata
+    except ImportError:  # Python < 3.8
+        import pkg_resources
+        try:
+            return pkg_resources.get_distribution(pkg_name).version
+        except pkg_resources.DistributionNotFound:
+            return None
+
     try:
+        return metadata.version(pkg_name)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def check_package(pkg_name, spec='*', is_optional=False):
+    pkg_version = get_package_version(pkg_name)
+
+    if pkg_version is not None:
         spec_pattern = semantic_version.SimpleSpec(spec)
-        pkg_version = pkg_resources.get_distribution(pkg_name).version
         version = semantic_version.Version(pkg_version)
         if not spec_pattern.match(version):
             raise Exception('Package "{0}" version ({1}) does not match "{2}" '.format(pkg_name, version, spec) +
                             'Please run: pip install -U {0}'.format(pkg_name))
-    except pkg_resources.DistributionNotFound:
+    else:
         if is_optional:
             raise Exception('Optional package "{0}" is not installed. '.format(pkg_name) +
                             'Please run: pip install {0}'.format(pkg_name))
@@ -1,11 +1,11 @@
-from jinja2 import Environment, PackageLoader
-
 from .. import constants
 from . import utils
 
 
 class HTMLLayout(object):
     def __init__(self, template_path='templates/viz/layout.html.j2'):
+        from jinja2 import Environment, PackageLoader
+
         self.srcdoc = None
         self._env = Environment(
             loader=PackageLoader('cartoframes', 'assets'),
@@ -1,7 +1,5 @@
 from warnings import warn
 
-from jinja2 import Environment, PackageLoader
-
 from .. import constants
 from ..basemaps import Basemaps
 from . import utils
@@ -9,6 +7,8 @@ from . import utils
 
 class HTMLMap(object):
     def __init__(self, template_path='templates/viz/basic.html.j2'):
+        from jinja2 import Environment, PackageLoader
+
         self.width = None
         self.height = None
         self.srcdoc = None
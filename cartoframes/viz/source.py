@@ -39,6 +39,9 @@ class Source:
             south], [east, north]]. If not provided the bounds will be automatically
             calculated to fit all features.
         geom_col (str, optional): string indicating the geometry column name in the source `DataFrame`.
+        approximate (bool, optional): estimate the bounds of a table from its statistics and
+            its geometry type from a sample, instead of scanning the whole table. It has no effect
+            on SQL queries. Default False.
 
     Example:
 
@@ -62,11 +65,16 @@ class Source:
 
         >>> Source('table_name', credentials)
 
+        Large table, with estimated bounds.
+
+        >>> Source('table_name', approximate=True)
+
     """
-    def __init__(self, source, credentials=None, geom_col=None, encode_data=True):
+    def __init__(self, source, credentials=None, geom_col=None, encode_data=True, approximate=False):
         self.credentials = None
         self.datetime_column_names = None
         self.encode_data = encode_data
+        self.approximate = approximate
 
         if isinstance(source, str):
             # Table, SQL query
@@ -123,14 +131,14 @@ class Source:
 
     def get_geom_type(self):
         if self.type == SourceType.QUERY:
-            return self.manager.get_geom_type(self.query) or 'point'
+            return self.manager.get_geom_type(self.query, self.approximate) or 'point'
         elif self.type == SourceType.GEOJSON:
             return get_geodataframe_geom_type(self.gdf)
 
     def compute_metadata(self, columns=None):
         if self.type == SourceType.QUERY:
             self.data = self.query
-            self.bounds = self.manager.get_bounds(self.query)
+            self.bounds = self.manager.get_bounds(self.query, self.approximate)
         elif self.type == SourceType.GEOJSON:
             if columns is not None:
                 columns += [self.gdf.geometry.name]
@@ -0,0 +1,94 @@
+"""Benchmark of the gzip compression of the COPY streams
+
+The upload data is encoded by `_compute_copy_data` and compressed chunk by
+chunk, as the CARTO client does in `CopySQLClient.copyfrom`. The download is
+simulated by decompressing the compressed stream in blocks. The transfer time
+is estimated for a link of the given bandwidth (in Mbit/s, first argument).
+"""
+
+import sys
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from cartoframes.io.managers.context_manager import _compute_copy_data, BINARY_BLOCK_SIZE
+from cartoframes.utils.columns import get_dataframe_columns_info
+
+DEFAULT_NUM_ROWS = 200000
+DEFAULT_BANDWIDTH = 100
+COMPRESSION_LEVELS = [None, 1, 6, 9]
+
+
+def build_frames(num_rows):
+    rand = np.random.RandomState(0)
+    categories = np.array(['residential', 'commercial', 'industrial', 'park'])
+    return {
+        'friendly': pd.DataFrame({
+            'a': np.arange(num_rows),
+            'b': categories[rand.randint(0, len(categories), num_rows)],
+            'c': pd.date_range('2020-01-01', periods=num_rows, freq='min'),
+            'd': np.round(rand.rand(num_rows) * 10) / 10
+        }),
+        'hostile': pd.DataFrame({
+            'a': rand.randint(0, 2 ** 62, num_rows),
+            'b': [rand.bytes(16).hex() for _ in range(num_rows)],
+            'c': rand.rand(num_rows),
+            'd': rand.randn(num_rows)
+        })
+    }
+
+
+def compress_chunks(chunks, level):
+    # Same gzip stream as the CARTO client
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed_chunk = compressor.compress(chunk)
+        if compressed_chunk:
+            yield compressed_chunk
+    yield compressor.flush()
+
+
+def decompress_blocks(data):
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    for start in range(0, len(data), BINARY_BLOCK_SIZE):
+        yield decompressor.decompress(data[start:start + BINARY_BLOCK_SIZE])
+    yield decompressor.flush()
+
+
+def measure(df, columns, level):
+    start = time.time()
+    chunks = _compute_copy_data(df, columns)
+    if level is not None:
+        chunks = compress_chunks(chunks, level)
+    data = b''.join(chunks)
+    encode_time = time.time() - start
+
+    start = time.time()
+    if level is not None:
+        sum(len(block) for block in decompress_blocks(data))
+    decode_time = time.time() - start
+
+    return len(data), encode_time, decode_time
+
+
+def main(bandwidth=DEFAULT_BANDWIDTH, num_rows=DEFAULT_NUM_ROWS):
+    bytes_per_second = bandwidth * 1e6 / 8
+    print('{:<9} {:>6} {:>9} {:>7} {:>13} {:>13} {:>11}'.format(
+        'frame', 'level', 'MB', 'ratio', 'encode MB/s', 'decode MB/s', 'upload s'))
+    for name, df in build_frames(num_rows).items():
+        columns = get_dataframe_columns_info(df)
+        raw_size = None
+        for level in COMPRESSION_LEVELS:
+            size, encode_time, decode_time = measure(df, columns, level)
+            raw_size = raw_size or size
+            upload_time = encode_time + size / bytes_per_second
+            print('{:<9} {:>6} {:>9.2f} {:>7.2f} {:>13.1f} {:>13} {:>11.2f}'.format(
+                name, level or '-', size / 1e6, raw_size / size, raw_size / 1e6 / encode_time,
+                '{:.1f}'.format(raw_size / 1e6 / decode_time) if level else '-', upload_time))
+
+
+if __name__ == '__main__':
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_BANDWIDTH,
+         int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_NUM_ROWS)
@@ -0,0 +1,73 @@
+"""Benchmark of the COPY FROM encoder used by `to_carto`"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from geopandas import GeoDataFrame, points_from_xy
+
+from cartoframes.io.managers.context_manager import _compute_copy_data
+from cartoframes.utils.columns import get_dataframe_columns_info
+from cartoframes.utils.geom_utils import encode_geometry_ewkb
+from cartoframes.utils.utils import encode_row
+
+DEFAULT_NUM_ROWS = 100000
+
+
+def legacy_compute_copy_data(df, columns):
+    """Row by row encoder previously used by `ContextManager._copy_from`"""
+    for index, _ in df.iterrows():
+        row_data = []
+        for column in columns:
+            val = df.at[index, column.name]
+
+            if column.is_geom:
+                val = encode_geometry_ewkb(val)
+
+            row_data.append(encode_row(val))
+
+        yield b'|'.join(row_data) + b'\n'
+
+
+def build_frames(num_rows):
+    rand = np.random.RandomState(0)
+    return {
+        'numeric': pd.DataFrame({
+            'a': rand.randint(0, 1000, num_rows),
+            'b': rand.rand(num_rows),
+            'c': rand.rand(num_rows) > 0.5
+        }),
+        'text': pd.DataFrame({
+            'a': ['name {}'.format(i) for i in range(num_rows)],
+            'b': ['quoted "value" | {}'.format(i) for i in range(num_rows)]
+        }),
+        'datetime': pd.DataFrame({
+            'a': pd.date_range('2020-01-01', periods=num_rows, freq='s')
+        }),
+        'geometry': GeoDataFrame({
+            'a': np.arange(num_rows),
+            'the_geom': points_from_xy(rand.rand(num_rows), rand.rand(num_rows))
+        }, geometry='the_geom')
+    }
+
+
+def measure(encoder, df, columns):
+    start = time.time()
+    num_bytes = sum(len(chunk) for chunk in encoder(df, columns))
+    return time.time() - start, num_bytes
+
+
+def main(num_rows=DEFAULT_NUM_ROWS):
+    print('{:<10} {:>15} {:>15} {:>10}'.format('frame', 'legacy rows/s', 'vector rows/s', 'speedup'))
+    for name, df in build_frames(num_rows).items():
+        columns = get_dataframe_columns_info(df)
+        legacy_time, _ = measure(legacy_compute_copy_data, df, columns)
+        vector_time, _ = measure(_compute_copy_data, df, columns)
+        print('{:<10} {:>15,.0f} {:>15,.0f} {:>9.1f}x'.format(
+            name, num_rows / legacy_time, num_rows / vector_time, legacy_time / vector_time))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_NUM_ROWS)
@@ -0,0 +1,51 @@
+"""Benchmark of the geometry decoding used by `read_carto`"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from shapely.geometry import Polygon
+
+from cartoframes.utils.geom_utils import decode_geometry, decode_geometry_item, detect_encoding_type
+
+DEFAULT_NUM_ROWS = 1000000
+
+
+def legacy_decode_geometry(geom_col):
+    """Item by item decoder previously used by `decode_geometry`"""
+    enc_type = detect_encoding_type(geom_col.dropna().iloc[0])
+    return geom_col.apply(lambda g: decode_geometry_item(g, enc_type))
+
+
+def build_polygons(num_rows):
+    rand = np.random.RandomState(0)
+    polygons = [
+        Polygon([(x, y), (x + 1, y), (x + 1, y + 1), (x, y + 1)]).wkb_hex
+        for x, y in rand.rand(1000, 2) * 100
+    ]
+    geoms = pd.Series(np.resize(np.array(polygons, dtype=object), num_rows))
+    # 1% of null geometries
+    geoms[::100] = None
+    return geoms
+
+
+def measure(decoder, geom_col):
+    start = time.time()
+    decoder(geom_col)
+    return time.time() - start
+
+
+def main(num_rows=DEFAULT_NUM_ROWS):
+    geom_col = build_polygons(num_rows)
+    legacy_time = measure(legacy_decode_geometry, geom_col)
+    vector_time = measure(decode_geometry, geom_col)
+    print('{:,} polygons (WKB hex)'.format(num_rows))
+    print('legacy: {:.2f} s ({:,.0f} rows/s)'.format(legacy_time, num_rows / legacy_time))
+    print('vector: {:.2f} s ({:,.0f} rows/s)'.format(vector_time, num_rows / vector_time))
+    print('speedup: {:.1f}x'.format(legacy_time / vector_time))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_NUM_ROWS)
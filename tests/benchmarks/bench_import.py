@@ -0,0 +1,80 @@
+"""Benchmark of the time of `import cartoframes`
+
+Each run imports the package in a new interpreter. The baseline is the time to
+import its third-party dependencies alone, also in a new interpreter, so the
+difference is the time spent in the modules of cartoframes. It exits with an
+error if that difference is over the limit (in seconds, first argument) or if
+any of the lazy modules is loaded by the import.
+"""
+
+import sys
+import json
+import subprocess
+
+DEFAULT_NUM_RUNS = 7
+DEFAULT_MAX_SECONDS = 0.15
+
+DEPENDENCIES = [
+    'numpy',
+    'pandas',
+    'geopandas',
+    'requests',
+    'appdirs',
+    'semantic_version',
+    'unidecode',
+    'carto.exceptions',
+    'carto.sql',
+    'carto.datasets'
+]
+
+LAZY_MODULES = [
+    'cartoframes.viz',
+    'cartoframes.data',
+    'cartoframes.analysis',
+    'google.cloud.bigquery',
+    'jinja2',
+    'pkg_resources'
+]
+
+IMPORT_SCRIPT = '''
+import sys, json, time
+start = time.time()
+{0}
+print(json.dumps({{'time': time.time() - start, 'modules': [m for m in {1} if m in sys.modules]}}))
+'''
+
+
+def measure(imports):
+    script = IMPORT_SCRIPT.format('\n'.join('import ' + name for name in imports), LAZY_MODULES)
+    output = subprocess.check_output([sys.executable, '-c', script])
+    return json.loads(output.decode('utf-8').strip().splitlines()[-1])
+
+
+def median(values):
+    return sorted(values)[len(values) // 2]
+
+
+def main(max_seconds=DEFAULT_MAX_SECONDS, num_runs=DEFAULT_NUM_RUNS):
+    # Interleaved runs, so both measures see the same state of the machine
+    baseline_results = []
+    results = []
+    for _ in range(num_runs):
+        baseline_results.append(measure(DEPENDENCIES))
+        results.append(measure(['cartoframes']))
+
+    baseline = median([result['time'] for result in baseline_results])
+    total = median([result['time'] for result in results])
+    overhead = median([result['time'] - baseline_result['time']
+                       for result, baseline_result in zip(results, baseline_results)])
+    loaded_modules = results[0]['modules']
+
+    print('import dependencies: median {:.3f} s ({} runs)'.format(baseline, num_runs))
+    print('import cartoframes: median {:.3f} s, {:.3f} s over the dependencies'.format(total, overhead))
+    print('lazy modules loaded: {}'.format(', '.join(loaded_modules) or 'none'))
+
+    if overhead > max_seconds or loaded_modules:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_MAX_SECONDS)
@@ -0,0 +1,91 @@
+"""Benchmark of the CSV and binary COPY TO parsers used by `read_carto`"""
+
+import io
+import struct
+import sys
+import time
+
+import numpy as np
+
+from pandas import read_csv
+
+from cartoframes.io.managers.context_manager import BINARY_BLOCK_SIZE, _set_object_nulls
+from cartoframes.utils.binary_copy import BINARY_SIGNATURE, read_binary_copy
+from cartoframes.utils.columns import Column, date_columns_names, obtain_converters, obtain_dtypes, \
+    obtain_na_values, object_columns_names
+
+DEFAULT_NUM_ROWS = 200000
+
+COLUMNS = [
+    Column('a', pgtype='integer'),
+    Column('b', pgtype='double precision'),
+    Column('c', pgtype='boolean'),
+    Column('d', pgtype='timestamp'),
+    Column('e', pgtype='text')
+]
+
+
+def build_rows(num_rows):
+    rand = np.random.RandomState(0)
+    return list(zip(
+        rand.randint(0, 1000000, num_rows).tolist(),
+        rand.rand(num_rows).tolist(),
+        (rand.rand(num_rows) > 0.5).tolist(),
+        (rand.randint(0, 10 ** 9, num_rows) * 1000000).tolist(),
+        ['name {}'.format(i) for i in range(num_rows)]
+    ))
+
+
+def build_csv(rows):
+    lines = ['a,b,c,d,e']
+    for a, b, c, d, e in rows:
+        timestamp = np.datetime64('2000-01-01T00:00:00', 'us') + np.timedelta64(d, 'us')
+        lines.append('{},{!r},{},{},{}'.format(a, b, 't' if c else 'f', str(timestamp).replace('T', ' '), e))
+    return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def build_binary(rows):
+    data = [BINARY_SIGNATURE, struct.pack('>ii', 0, 0)]
+    for a, b, c, d, e in rows:
+        text = e.encode('utf-8')
+        data.append(struct.pack('>hiiidi?iqi', 5, 4, a, 8, b, 1, c, 8, d, len(text)) + text)
+    data.append(struct.pack('>h', -1))
+    return b''.join(data)
+
+
+def parse_csv(data):
+    """Same parsing as `ContextManager._copy_to` with the CSV format"""
+    df = read_csv(
+        io.BytesIO(data),
+        dtype=obtain_dtypes(COLUMNS),
+        na_values=obtain_na_values(COLUMNS),
+        keep_default_na=False,
+        true_values=['t'],
+        false_values=['f'],
+        converters=obtain_converters(COLUMNS),
+        parse_dates=date_columns_names(COLUMNS))
+    return _set_object_nulls(df, object_columns_names(COLUMNS))
+
+
+def parse_binary(data):
+    blocks = (data[i:i + BINARY_BLOCK_SIZE] for i in range(0, len(data), BINARY_BLOCK_SIZE))
+    return read_binary_copy(blocks, COLUMNS)
+
+
+def measure(parser, data):
+    start = time.time()
+    df = parser(data)
+    return time.time() - start, df
+
+
+def main(num_rows=DEFAULT_NUM_ROWS):
+    rows = build_rows(num_rows)
+    print('{:<8} {:>12} {:>10} {:>15}'.format('format', 'bytes', 'seconds', 'rows/s'))
+    for name, data, parser in [('csv', build_csv(rows), parse_csv), ('binary', build_binary(rows), parse_binary)]:
+        seconds, df = measure(parser, data)
+        assert len(df) == num_rows
+        print('{:<8} {:>12,} {:>10.3f} {:>15,.0f}'.format(name, len(data), seconds, num_rows / seconds))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_NUM_ROWS)
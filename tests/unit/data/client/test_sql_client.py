@@ -1,7 +1,9 @@
 """Unit tests for cartoframes.client.SQLClient"""
 
+from concurrent.futures import Future
+
 from cartoframes.auth import Credentials
-from cartoframes.io.managers.context_manager import ContextManager
+from cartoframes.io.managers.context_manager import ContextManager, get_context_manager
 from cartoframes.data.clients import SQLClient
 
 SQL_SELECT_RESPONSE = {
@@ -104,6 +106,37 @@ class TestSQLClient(object):
         assert output == SQL_BATCH_RESPONSE
         mock.assert_called_once_with('query')
 
+    def test_execute_no_wait(self, mocker):
+        """client.SQLClient.execute"""
+        future = Future()
+        mock = mocker.patch.object(ContextManager, 'submit_long_running_query', return_value=future)
+        invalidate_mock = mocker.patch.object(ContextManager, 'invalidate_metadata')
+        output = SQLClient(self.credentials).execute('query', wait=False)
+
+        assert output is future
+        mock.assert_called_once_with('query', None)
+        invalidate_mock.assert_not_called()
+        future.set_result(SQL_BATCH_RESPONSE)
+        invalidate_mock.assert_called_once_with()
+
+    def test_shared_context_manager(self):
+        """client.SQLClient shares the context manager of the credentials"""
+        client = SQLClient(self.credentials)
+
+        assert client._context_manager is get_context_manager(self.credentials)
+
+    def test_query_invalidates_metadata(self, mocker):
+        """client.SQLClient.query invalidates the metadata after DDL"""
+        mocker.patch.object(ContextManager, 'execute_query', return_value=SQL_SELECT_RESPONSE)
+        invalidate_mock = mocker.patch.object(ContextManager, 'invalidate_metadata')
+        client = SQLClient(self.credentials)
+
+        client.query('SELECT * FROM table_name')
+        invalidate_mock.assert_not_called()
+
+        client.query('ALTER TABLE table_name ADD COLUMN a text')
+        invalidate_mock.assert_called_once_with()
+
     def test_distinct(self, mocker):
         """client.SQLClient.distinct"""
         mock = mocker.patch.object(ContextManager, 'execute_query', return_value=SQL_DISTINCT_RESPONSE)
@@ -257,8 +290,10 @@ class TestSQLClient(object):
     def test_drop_table(self, mocker):
         """client.SQLClient.drop_table"""
         mock = mocker.patch.object(ContextManager, 'execute_long_running_query')
+        invalidate_mock = mocker.patch.object(ContextManager, 'invalidate_metadata')
         SQLClient(self.credentials).drop_table('table_name')
 
         mock.assert_called_once_with('''
             DROP TABLE IF EXISTS table_name;
         '''.strip())
+        invalidate_mock.assert_called_once_with()
@@ -1,12 +1,19 @@
 import pytest
+import numpy as np
 
-from pandas import Index
+from concurrent.futures import Future
+
+from carto.exceptions import CartoException
+
+from pandas import DataFrame, Index
 from geopandas import GeoDataFrame
 from shapely.geometry import Point
 
 from cartoframes.auth import Credentials
 from cartoframes.io.managers.context_manager import ContextManager
-from cartoframes.io.carto import read_carto, to_carto, copy_table, create_table_from_query
+from cartoframes.io.managers.resume_manager import ResumeManager
+from cartoframes.io.managers.transfer_stats import NULL_STATS, TransferStats
+from cartoframes.io.carto import read_carto, to_carto, copy_table, create_table_from_query, describe_table, has_table
 
 
 CREDENTIALS = Credentials('fake_user', 'fake_api_key')
@@ -36,7 +43,8 @@ def test_read_carto(mocker):
     gdf = read_carto('__source__', CREDENTIALS)
 
     # Then
-    cm_mock.assert_called_once_with('__source__', None, None, 3)
+    cm_mock.assert_called_once_with(
+        '__source__', None, None, 3, None, None, 'csv', None, None, None, None, None, NULL_STATS)
     assert expected.equals(gdf)
     assert gdf.crs == 'epsg:4326'
 
@@ -69,7 +77,8 @@ def test_read_carto_limit(mocker):
     read_carto('__source__', CREDENTIALS, limit=1)
 
     # Then
-    cm_mock.assert_called_once_with('__source__', None, 1, 3)
+    cm_mock.assert_called_once_with(
+        '__source__', None, 1, 3, None, None, 'csv', None, None, None, None, None, NULL_STATS)
 
 
 def test_read_carto_retry_times(mocker):
@@ -81,7 +90,8 @@ def test_read_carto_retry_times(mocker):
     read_carto('__source__', CREDENTIALS, retry_times=1)
 
     # Then
-    cm_mock.assert_called_once_with('__source__', None, None, 1)
+    cm_mock.assert_called_once_with(
+        '__source__', None, None, 1, None, None, 'csv', None, None, None, None, None, NULL_STATS)
 
 
 def test_read_carto_schema(mocker):
@@ -93,7 +103,137 @@ def test_read_carto_schema(mocker):
     read_carto('__source__', CREDENTIALS, schema='__schema__')
 
     # Then
-    cm_mock.assert_called_once_with('__source__', '__schema__', None, 3)
+    cm_mock.assert_called_once_with(
+        '__source__', '__schema__', None, 3, None, None, 'csv', None, None, None, None, None, NULL_STATS)
+
+
+def test_read_carto_parallel(mocker):
+    # Given
+    mocker.patch('cartoframes.utils.geom_utils.set_geometry')
+    cm_mock = mocker.patch.object(ContextManager, 'copy_to')
+
+    # When
+    read_carto('__source__', CREDENTIALS, parallel=4)
+
+    # Then
+    cm_mock.assert_called_once_with(
+        '__source__', None, None, 3, 4, None, 'csv', None, None, None, None, None, NULL_STATS)
+
+
+def test_read_carto_binary(mocker):
+    # Given
+    mocker.patch('cartoframes.utils.geom_utils.set_geometry')
+    cm_mock = mocker.patch.object(ContextManager, 'copy_to')
+
+    # When
+    read_carto('__source__', CREDENTIALS, format='binary')
+
+    # Then
+    cm_mock.assert_called_once_with(
+        '__source__', None, None, 3, None, None, 'binary', None, None, None, None, None, NULL_STATS)
+
+
+def test_read_carto_filters(mocker):
+    # Given
+    mocker.patch('cartoframes.utils.geom_utils.set_geometry')
+    cm_mock = mocker.patch.object(ContextManager, 'copy_to')
+
+    # When
+    read_carto('__source__', CREDENTIALS, columns=['a'], where='a > 1', bbox=(0, 0, 1, 1))
+
+    # Then
+    cm_mock.assert_called_once_with(
+        '__source__', None, None, 3, None, None, 'csv', None, ['a'], 'a > 1', (0, 0, 1, 1), None, NULL_STATS)
+
+
+def test_read_carto_chunksize(mocker):
+    # Given
+    cm_mock = mocker.patch.object(ContextManager, 'copy_to')
+    cm_mock.return_value = iter([
+        GeoDataFrame({
+            'cartodb_id': [1, 2],
+            'the_geom': [
+                '010100000000000000000000000000000000000000',
+                '010100000000000000000024400000000000002e40'
+            ]
+        }),
+        GeoDataFrame({
+            'cartodb_id': [3],
+            'the_geom': [
+                '010100000000000000000034400000000000003e40'
+            ]
+        }, index=[2])
+    ])
+    expected = [
+        GeoDataFrame({
+            'cartodb_id': [1, 2],
+            'the_geom': [
+                Point([0, 0]),
+                Point([10, 15])
+            ]
+        }, geometry='the_geom'),
+        GeoDataFrame({
+            'cartodb_id': [3],
+            'the_geom': [
+                Point([20, 30])
+            ]
+        }, geometry='the_geom', index=[2])
+    ]
+
+    # When
+    gdfs = list(read_carto('__source__', CREDENTIALS, chunksize=2))
+
+    # Then
+    cm_mock.assert_called_once_with(
+        '__source__', None, None, 3, None, 2, 'csv', None, None, None, None, None, NULL_STATS)
+    assert len(gdfs) == 2
+    assert expected[0].equals(gdfs[0])
+    assert expected[1].equals(gdfs[1])
+
+
+def test_read_carto_chunksize_parallel(mocker):
+    # When
+    with pytest.raises(ValueError) as e:
+        read_carto('__source__', CREDENTIALS, parallel=2, chunksize=2)
+
+    # Then
+    assert str(e.value) == 'The `parallel` and `chunksize` parameters can not be used together.'
+
+
+def test_read_carto_resume(mocker):
+    # Given
+    mocker.patch('cartoframes.utils.geom_utils.set_geometry')
+    cm_mock = mocker.patch.object(ContextManager, 'copy_to')
+
+    # When
+    read_carto('__source__', CREDENTIALS, resume=True)
+
+    # Then
+    assert isinstance(cm_mock.call_args[0][11], ResumeManager)
+    assert cm_mock.call_args[0][11].path is None
+
+
+def test_read_carto_resume_chunksize(mocker):
+    # When
+    with pytest.raises(ValueError) as e:
+        read_carto('__source__', CREDENTIALS, resume=True, chunksize=2)
+
+    # Then
+    assert str(e.value) == 'The `resume` and `chunksize` parameters can not be used together.'
+
+
+def test_read_carto_stats(mocker):
+    # Given
+    cm_mock = mocker.patch.object(ContextManager, 'copy_to', return_value=DataFrame({'a': [1, 2]}))
+    stats = TransferStats()
+
+    # When
+    read_carto('__source__', CREDENTIALS, stats=stats)
+
+    # Then
+    assert cm_mock.call_args[0][12] is stats
+    assert stats.operation == 'read'
+    assert stats.total >= 0
 
 
 def test_read_carto_index_col_exists(mocker):
@@ -190,6 +330,50 @@ def test_to_carto(mocker):
     assert cm_mock.call_args[0][3] is True
 
 
+def test_to_carto_chunksize(mocker):
+    # Given
+    cm_mock = mocker.patch.object(ContextManager, 'copy_from')
+    df = GeoDataFrame({'geometry': [Point([0, 0])]})
+
+    # When
+    to_carto(df, '__table_name__', CREDENTIALS, chunksize=1000, workers=4)
+
+    # Then
+    assert cm_mock.call_args[0][4] == 1000
+    assert cm_mock.call_args[0][5] == 4
+    assert cm_mock.call_args[0][6] == 3
+    assert cm_mock.call_args[0][7] is True
+
+
+def test_to_carto_bulk_load(mocker):
+    # Given
+    cm_mock = mocker.patch.object(ContextManager, 'copy_from')
+    df = GeoDataFrame({'geometry': [Point([0, 0])]})
+
+    # When
+    to_carto(df, '__table_name__', CREDENTIALS, bulk_load=True, indexes=['the_geom'])
+
+    # Then
+    assert cm_mock.call_args[0][9] is True
+    assert cm_mock.call_args[0][10] == ['the_geom']
+
+
+def test_to_carto_stats(mocker):
+    # Given
+    cm_mock = mocker.patch.object(ContextManager, 'copy_from')
+    callback = mocker.Mock()
+    df = GeoDataFrame({'geometry': [Point([0, 0])]})
+
+    # When
+    to_carto(df, '__table_name__', CREDENTIALS, stats=callback)
+
+    # Then
+    stats = cm_mock.call_args[0][11]
+    callback.assert_called_once_with(stats)
+    assert stats.operation == 'upload'
+    assert stats.total >= 0
+
+
 def test_to_carto_wrong_dataframe(mocker):
     # When
     with pytest.raises(ValueError) as e:
@@ -233,7 +417,20 @@ def test_to_carto_wrong_if_exists(mocker):
         to_carto(df, '__table_name__', if_exists='keep_calm')
 
     # Then
-    assert str(e.value) == 'Wrong option for the `if_exists` param. You should provide: fail, replace, append.'
+    assert str(e.value) == 'Wrong option for the `if_exists` param. ' + \
+                           'You should provide: fail, replace, append, upsert, sync.'
+
+
+def test_to_carto_upsert_without_key(mocker):
+    # Given
+    df = GeoDataFrame({'geometry': [Point([0, 0])]})
+
+    # When
+    with pytest.raises(ValueError) as e:
+        to_carto(df, '__table_name__', if_exists='upsert')
+
+    # Then
+    assert str(e.value) == 'The `key` parameter is required with if_exists="upsert".'
 
 
 def test_to_carto_if_exists_replace(mocker):
@@ -272,6 +469,37 @@ def test_to_carto_replace_geometry(mocker):
     assert str(cm_mock.call_args[0][0]).strip() == 'the_geom\n0  POINT (1.00000 1.00000)'
 
 
+def test_to_carto_shares_data(mocker):
+    # Given
+    cm_mock = mocker.patch.object(ContextManager, 'copy_from')
+    df = DataFrame({'a': [1, 2], 'b': [0.5, 1.5], 'geom': ['POINT(0 0)', 'POINT(1 1)']},
+                   index=Index([7, 8], name='c'))
+    expected = df.copy()
+
+    # When
+    to_carto(df, '__table_name__', CREDENTIALS, geom_col='geom', index=True)
+
+    # Then
+    gdf = cm_mock.call_args[0][0]
+    assert list(gdf.columns) == ['a', 'b', 'c', 'the_geom']
+    assert np.shares_memory(gdf['a'].values, df['a'].values)
+    assert np.shares_memory(gdf['b'].values, df['b'].values)
+    assert df.equals(expected)
+
+
+def test_create_table_from_query_no_wait(mocker):
+    # Given
+    future = Future()
+    cm_mock = mocker.patch.object(ContextManager, 'create_table_from_query', return_value=('table_name', future))
+
+    # When
+    result = create_table_from_query('SELECT 1', 'table_name', credentials=CREDENTIALS, wait=False)
+
+    # Then
+    assert result is future
+    cm_mock.assert_called_once_with('SELECT 1', 'table_name', 'fail', wait=False, depends_on=None)
+
+
 def test_copy_table_wrong_table_name(mocker):
     # When
     with pytest.raises(ValueError) as e:
@@ -344,3 +572,33 @@ def test_create_table_from_query_wrong_if_exists(mocker):
 
     # Then
     assert str(e.value) == 'Wrong option for the `if_exists` param. You should provide: fail, replace, append.'
+
+
+def test_describe_table(mocker):
+    # Given
+    mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+    mocker.patch.object(ContextManager, 'compute_query', return_value='__query__')
+    mocker.patch.object(ContextManager, 'get_privacy', side_effect=CartoException())
+    num_rows_mock = mocker.patch.object(ContextManager, 'get_num_rows', return_value=10)
+    geom_type_mock = mocker.patch.object(ContextManager, 'get_geom_type', return_value='point')
+
+    # When
+    info = describe_table('table_name', CREDENTIALS, approximate=True)
+
+    # Then
+    assert info == {'privacy': '', 'num_rows': 10, 'geom_type': 'point'}
+    num_rows_mock.assert_called_once_with('__query__', True)
+    geom_type_mock.assert_called_once_with('__query__', True)
+
+
+def test_has_table_not_cached(mocker):
+    # Given
+    mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+    has_table_mock = mocker.patch.object(ContextManager, 'has_table', return_value=True)
+
+    # When
+    result = has_table('table_name', CREDENTIALS)
+
+    # Then
+    assert result is True
+    has_table_mock.assert_called_once_with('table_name', None, cached=False)
@@ -0,0 +1,109 @@
+import threading
+
+import pytest
+
+from carto.exceptions import CartoException
+
+from cartoframes.io.managers.batch_pipeline import BatchJobPipeline
+
+
+class FakeBatchSQLClient(object):
+    """Batch API where each job is done after `polls` reads."""
+
+    def __init__(self, polls=2, failed_queries=()):
+        self.polls = polls
+        self.failed_queries = failed_queries
+        self.created = []
+        self.reads = {}
+        self.max_running = 0
+        self._running = set()
+        self._lock = threading.Lock()
+
+    def create(self, query):
+        with self._lock:
+            job_id = str(len(self.created))
+            self.created.append(query)
+            self.reads[job_id] = 0
+            self._running.add(job_id)
+            self.max_running = max(self.max_running, len(self._running))
+        return {'job_id': job_id, 'query': query, 'status': 'pending'}
+
+    def read(self, job_id):
+        with self._lock:
+            self.reads[job_id] += 1
+            query = self.created[int(job_id)]
+            if self.reads[job_id] < self.polls:
+                return {'job_id': job_id, 'query': query, 'status': 'running'}
+            self._running.discard(job_id)
+            status = 'failed' if query in self.failed_queries else 'done'
+            return {'job_id': job_id, 'query': query, 'status': status}
+
+
+class TestBatchJobPipeline(object):
+
+    def test_submit(self):
+        # Given
+        client = FakeBatchSQLClient()
+        pipeline = BatchJobPipeline(client, max_jobs=3, poll_interval=0.001)
+
+        # When
+        futures = [pipeline.submit('SELECT {}'.format(i)) for i in range(10)]
+        pipeline.wait()
+
+        # Then
+        assert [future.result()['query'] for future in futures] == ['SELECT {}'.format(i) for i in range(10)]
+        assert all(future.result()['status'] == 'done' for future in futures)
+        assert client.max_running <= 3
+
+    def test_submit_failed(self):
+        # Given
+        client = FakeBatchSQLClient(failed_queries=['SELECT 1'])
+        pipeline = BatchJobPipeline(client, poll_interval=0.001)
+
+        # When
+        future = pipeline.submit('SELECT 1')
+
+        # Then
+        with pytest.raises(CartoException) as e:
+            future.result(timeout=5)
+        assert str(e.value).startswith('Batch SQL job failed with result: ')
+
+    def test_submit_depends_on(self):
+        # Given
+        client = FakeBatchSQLClient()
+        pipeline = BatchJobPipeline(client, poll_interval=0.001)
+
+        # When
+        create = pipeline.submit('CREATE TABLE a')
+        inserts = [pipeline.submit('INSERT INTO a {}'.format(i), depends_on=create) for i in range(3)]
+        drop = pipeline.submit('DROP TABLE a', depends_on=inserts)
+        drop.result(timeout=5)
+
+        # Then
+        assert client.created[0] == 'CREATE TABLE a'
+        assert client.created[-1] == 'DROP TABLE a'
+        assert all(insert.done() for insert in inserts)
+
+    def test_submit_depends_on_failed(self):
+        # Given
+        client = FakeBatchSQLClient(failed_queries=['CREATE TABLE a'])
+        pipeline = BatchJobPipeline(client, poll_interval=0.001)
+
+        # When
+        create = pipeline.submit('CREATE TABLE a')
+        insert = pipeline.submit('INSERT INTO a', depends_on=create)
+        pipeline.wait([create, insert], timeout=5)
+
+        # Then
+        with pytest.raises(CartoException) as e:
+            insert.result()
+        assert str(e.value) == 'Batch SQL job not submitted: a dependency failed'
+        assert client.created == ['CREATE TABLE a']
+
+    def test_wrong_max_jobs(self):
+        # When
+        with pytest.raises(ValueError) as e:
+            BatchJobPipeline(FakeBatchSQLClient(), max_jobs=0)
+
+        # Then
+        assert str(e.value) == '`max_jobs` parameter must an integer >= 1'
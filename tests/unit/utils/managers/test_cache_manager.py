@@ -0,0 +1,109 @@
+import time
+import pytest
+
+from pandas import DataFrame
+
+from cartoframes.auth import Credentials
+from cartoframes.io.managers.cache_manager import CacheManager, _normalize_query
+from cartoframes.utils.columns import Column
+
+pytest.importorskip('pyarrow')
+
+
+class TestCacheManager(object):
+
+    def setup_method(self):
+        self.credentials = Credentials('fake_user', 'fake_api')
+        self.columns = [Column('cartodb_id', pgtype='integer'), Column('a', pgtype='text')]
+        self.df = DataFrame({'cartodb_id': [1, 2], 'a': ['x', None]})
+
+    def test_get_key(self):
+        # Given
+        cache = CacheManager()
+
+        # When
+        key = cache.get_key(self.credentials, 'SELECT  *\n FROM table_name;', self.columns)
+
+        # Then
+        assert key == cache.get_key(self.credentials, 'SELECT * FROM table_name', self.columns)
+        assert key != cache.get_key(self.credentials, 'SELECT * FROM table_name', self.columns[:1])
+        assert key != cache.get_key(Credentials('fake_user', 'other_api'), 'SELECT * FROM table_name', self.columns)
+        assert key != cache.get_key(self.credentials, 'SELECT * FROM table_name', self.columns, 'binary')
+
+    def test_normalize_query(self):
+        assert _normalize_query(' SELECT  *  FROM t WHERE a = \'x  y\';\n') == 'SELECT * FROM t WHERE a = \'x  y\''
+
+    def test_put_get(self, tmpdir):
+        # Given
+        cache = CacheManager(str(tmpdir))
+
+        # When
+        cache.put('key', self.df, '2020-01-01T00:00:00Z')
+
+        # Then
+        assert cache.get('key', '2020-01-01T00:00:00Z').equals(self.df)
+        assert cache.get('other_key', '2020-01-01T00:00:00Z') is None
+
+    def test_get_updated(self, tmpdir):
+        # Given
+        cache = CacheManager(str(tmpdir))
+        cache.put('key', self.df, '2020-01-01T00:00:00Z')
+
+        # When
+        df = cache.get('key', '2020-01-02T00:00:00Z')
+
+        # Then
+        assert df is None
+        assert cache.get('key', '2020-01-01T00:00:00Z') is None
+
+    def test_get_ttl(self, tmpdir):
+        # Given
+        cache = CacheManager(str(tmpdir), ttl=60)
+        cache.put('key', self.df)
+
+        # When
+        df = cache.get('key')
+
+        # Then
+        assert df.equals(self.df)
+
+        # When
+        cache.ttl = 0
+        time.sleep(0.01)
+        df = cache.get('key')
+
+        # Then
+        assert df is None
+
+    def test_put_without_updated_at(self, tmpdir):
+        # Given
+        cache = CacheManager(str(tmpdir))
+
+        # When
+        cache.put('key', self.df)
+
+        # Then
+        assert tmpdir.listdir() == []
+
+    def test_evict(self, tmpdir):
+        # Given
+        cache = CacheManager(str(tmpdir))
+        cache.put('key_1', self.df, 'updated_at')
+        cache.put('key_2', self.df, 'updated_at')
+        cache.get('key_1', 'updated_at')
+
+        # When
+        cache.max_size = 1 + sum(f.size() for f in tmpdir.visit('*.parquet')) // 2
+        cache.evict()
+
+        # Then
+        assert [path.basename for path in tmpdir.listdir()] == ['key_1']
+
+    def test_wrong_params(self):
+        with pytest.raises(ValueError) as e:
+            CacheManager(max_size=-1)
+        assert str(e.value) == '`max_size` parameter must an integer >= 0'
+
+        with pytest.raises(ValueError) as e:
+            CacheManager(ttl='1')
+        assert str(e.value) == '`ttl` parameter must a number >= 0'
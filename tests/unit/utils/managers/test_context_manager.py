@@ -1,12 +1,26 @@
+import copy
+import pickle
 import pytest
+import requests
+import numpy as np
+import pandas as pd
 
+from io import StringIO
+from concurrent.futures import Future
+
+from carto.exceptions import CartoException
 from carto.sql import SQLClient, BatchSQLClient, CopySQLClient
 
+from requests.exceptions import ChunkedEncodingError
 from pandas import DataFrame
 from geopandas import GeoDataFrame
 from cartoframes.auth import Credentials
-from cartoframes.io.managers.context_manager import ContextManager
-from cartoframes.utils.columns import ColumnInfo
+from cartoframes.io.managers.context_manager import ContextManager, get_context_manager, clear_context_managers, \
+    _compute_copy_data, _compute_row_hashes, _create_session
+from cartoframes.io.managers.rate_limiter import get_rate_limiter
+from cartoframes.io.managers.resume_manager import ResumeManager
+from cartoframes.io.managers.transfer_stats import NULL_STATS, TransferStats
+from cartoframes.utils.columns import Column, ColumnInfo, get_dataframe_columns_info, NULLABLE_DTYPES
 
 
 class TestContextManager(object):
@@ -14,6 +28,57 @@ class TestContextManager(object):
     def setup_method(self):
         self.credentials = Credentials('fake_user', 'fake_api')
 
+    def test_get_context_manager(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        clear_context_managers()
+
+        # When
+        cm_1 = get_context_manager(self.credentials)
+        cm_2 = get_context_manager(Credentials('fake_user', 'fake_api'))
+        cm_3 = get_context_manager(Credentials('fake_user', 'other_api'))
+
+        # Then
+        assert cm_1 is cm_2
+        assert cm_1 is not cm_3
+        clear_context_managers()
+
+    def test_create_session(self):
+        # When
+        session = _create_session()
+
+        # Then
+        adapter = session.get_adapter('https://fake_user.carto.com')
+        assert adapter._pool_maxsize == 16
+        assert adapter.max_retries.total == 3
+        assert adapter.max_retries.status_forcelist == [502, 503, 504]
+        assert session.get_adapter('http://localhost')._pool_maxsize == 16
+
+    def test_session_rate_limited(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        user_session = requests.Session()
+        user_adapters = dict(user_session.adapters)
+        credentials = Credentials('fake_user', 'fake_api', session=user_session)
+        other_credentials = Credentials('other_user', 'fake_api', session=user_session)
+
+        # When
+        cm = ContextManager(self.credentials)
+        user_cm = ContextManager(credentials)
+        other_cm = ContextManager(other_credentials)
+
+        # Then
+        for session in [cm.session, user_cm.session]:
+            assert session.get_adapter('https://fake_user.carto.com/api').rate_limiter is \
+                get_rate_limiter(self.credentials)
+            assert not hasattr(session.get_adapter('https://other.host.com'), 'rate_limiter')
+        assert other_cm.session.get_adapter('https://other_user.carto.com/api').rate_limiter is \
+            get_rate_limiter(other_credentials)
+        assert not hasattr(other_cm.session.get_adapter('https://fake_user.carto.com/api'), 'rate_limiter')
+        # The session of the user is not modified
+        assert user_cm.session is not user_session
+        assert dict(user_session.adapters) == user_adapters
+
     def test_execute_query(self, mocker):
         # Given
         mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
@@ -38,10 +103,176 @@ class TestContextManager(object):
         # Then
         mock.assert_called_once_with('query')
 
+    def test_get_schema_cached(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mock = mocker.patch.object(ContextManager, 'execute_query', return_value={
+            'rows': [{'current_schema': 'schema'}]})
+
+        # When
+        cm = ContextManager(self.credentials)
+        schemas = [cm.get_schema(), cm.get_schema()]
+
+        # Then
+        assert schemas == ['schema', 'schema']
+        assert mock.call_count == 1
+
+    def test_metadata_cached(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        exists_mock = mocker.patch.object(ContextManager, '_check_exists', return_value=True)
+        columns_mock = mocker.patch.object(ContextManager, 'execute_query', return_value={
+            'fields': {'a': {'type': 'string', 'pgtype': 'text'}}})
+
+        # When
+        cm = ContextManager(self.credentials)
+        cm.has_table('table_name', 'schema')
+        cm.has_table('table_name', 'schema')
+        cm._get_query_columns_info('SELECT * FROM table_name')
+        columns = cm._get_query_columns_info('SELECT * FROM table_name')
+
+        # Then
+        assert exists_mock.call_count == 1
+        assert columns_mock.call_count == 1
+        assert [c.name for c in columns] == ['a']
+
+    def test_metadata_invalidated(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mocker.patch.object(ContextManager, 'execute_query', return_value={})
+        exists_mock = mocker.patch.object(ContextManager, '_check_exists', side_effect=[True, False])
+
+        # When
+        cm = ContextManager(self.credentials)
+        before = cm.has_table('table_name', 'schema')
+        cm.delete_table('table_name')
+        after = cm.has_table('table_name', 'schema')
+
+        # Then
+        assert before is True and after is False
+        assert exists_mock.call_count == 2
+
+    def test_has_table_not_cached(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        exists_mock = mocker.patch.object(ContextManager, '_check_exists', side_effect=[False, True])
+
+        # When
+        cm = ContextManager(self.credentials)
+        before = cm.has_table('table_name', 'schema')
+        after = cm.has_table('table_name', 'schema', cached=False)
+
+        # Then
+        assert before is False and after is True
+        assert exists_mock.call_count == 2
+        assert cm.has_table('table_name', 'schema') is True
+
+    def test_copy_from_checks_table_not_cached(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mocker.patch.object(ContextManager, 'get_schema', return_value='schema')
+        mock = mocker.patch.object(ContextManager, 'has_table', return_value=True)
+
+        # When
+        with pytest.raises(Exception):
+            cm = ContextManager(self.credentials)
+            cm.copy_from(DataFrame({'A': [1]}), 'table_name', 'fail')
+
+        # Then
+        mock.assert_called_once_with('table_name', 'schema', cached=False)
+
+    def test_copy_and_pickle(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        cm = ContextManager(self.credentials)
+
+        # When
+        cm_copy = copy.deepcopy(cm)
+        cm_pickled = pickle.loads(pickle.dumps(cm))
+
+        # Then
+        assert cm_copy is cm
+        assert cm_pickled.credentials == cm.credentials
+        assert cm_pickled.rate_limiter is cm.rate_limiter
+        assert cm_pickled.batch_pipeline is not cm.batch_pipeline
+
+    def test_get_num_rows_approximate(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mock = mocker.patch.object(ContextManager, 'execute_query', return_value={'rows': [{'count': 1000}]})
+
+        # When
+        cm = ContextManager(self.credentials)
+        num_rows = cm.get_num_rows('SELECT * FROM "schema"."table_name"', approximate=True)
+
+        # Then
+        assert num_rows == 1000
+        assert mock.call_count == 1
+        assert 'pg_class' in mock.call_args[0][0]
+
+    def test_get_num_rows_approximate_fallback(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mock = mocker.patch.object(ContextManager, 'execute_query', side_effect=[
+            {'rows': [{'count': -1}]}, {'rows': [{'count': 10}]}])
+
+        # When
+        cm = ContextManager(self.credentials)
+        num_rows = cm.get_num_rows('SELECT * FROM "schema"."table_name"', approximate=True)
+
+        # Then
+        assert num_rows == 10
+        assert 'COUNT(*)' in mock.call_args[0][0]
+
+    def test_get_num_rows_approximate_query(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mock = mocker.patch.object(ContextManager, 'execute_query', return_value={'rows': [{'count': 10}]})
+
+        # When
+        cm = ContextManager(self.credentials)
+        num_rows = cm.get_num_rows('SELECT * FROM table_name WHERE a > 1', approximate=True)
+
+        # Then
+        assert num_rows == 10
+        assert mock.call_count == 1
+        assert 'COUNT(*)' in mock.call_args[0][0]
+
+    def test_get_bounds_approximate(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mock = mocker.patch.object(ContextManager, 'execute_query', return_value={
+            'rows': [{'bounds': [[-1, -1], [1, 1]]}]})
+
+        # When
+        cm = ContextManager(self.credentials)
+        bounds = cm.get_bounds('SELECT * FROM "schema"."table_name"', approximate=True)
+
+        # Then
+        assert bounds == [[-1, -1], [1, 1]]
+        assert "ST_EstimatedExtent('schema', 'table_name', 'the_geom')" in mock.call_args[0][0]
+
+    def test_get_geom_type_approximate(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mock = mocker.patch.object(ContextManager, 'execute_query', side_effect=[
+            {'rows': []}, {'rows': [{'geom_type': 'ST_Point'}]}])
+
+        # When
+        cm = ContextManager(self.credentials)
+        geom_type = cm.get_geom_type('SELECT * FROM "schema"."table_name"', approximate=True)
+
+        # Then
+        assert geom_type == 'point'
+        assert 'TABLESAMPLE SYSTEM' in mock.call_args_list[0][0][0]
+        assert 'TABLESAMPLE' not in mock.call_args_list[1][0][0]
+
     def test_copy_from(self, mocker):
         # Given
         mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mocker.patch.object(ContextManager, 'get_schema', return_value='schema')
         mocker.patch.object(ContextManager, 'has_table', return_value=False)
+        create_mock = mocker.patch.object(ContextManager, '_create_table_from_columns')
         mock = mocker.patch.object(ContextManager, '_copy_from')
         df = DataFrame({'A': [1]})
         columns = [ColumnInfo('A', 'a', 'bigint', False)]
@@ -51,7 +282,66 @@ class TestContextManager(object):
         cm.copy_from(df, 'TABLE NAME')
 
         # Then
-        mock.assert_called_once_with(df, 'table_name', columns)
+        create_mock.assert_called_once_with('table_name', columns, 'schema', True)
+        mock.assert_called_once_with(df, 'table_name', columns, True, NULL_STATS)
+
+    def test_copy_from_compress(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mocker.patch.object(ContextManager, 'get_schema', return_value='schema')
+        mocker.patch.object(ContextManager, 'has_table', return_value=True)
+        mock = mocker.patch.object(ContextManager, '_copy_from')
+        df = DataFrame({'A': [1]})
+        columns = [ColumnInfo('A', 'a', 'bigint', False)]
+
+        # When
+        cm = ContextManager(self.credentials)
+        cm.copy_from(df, 'table_name', 'append', compress=6)
+
+        # Then
+        mock.assert_called_once_with(df, 'table_name', columns, 6, NULL_STATS)
+
+    def test_create_table_from_query_no_wait(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mocker.patch.object(ContextManager, 'has_table', return_value=False)
+        mocker.patch.object(ContextManager, 'get_schema', return_value='schema')
+        invalidate_mock = mocker.patch.object(ContextManager, 'invalidate_metadata')
+        future = Future()
+        submit_mock = mocker.patch.object(ContextManager, 'submit_long_running_query', return_value=future)
+        dependency = Future()
+
+        # When
+        cm = ContextManager(self.credentials)
+        result = cm.create_table_from_query('SELECT 1', 'TABLE NAME', 'fail', False, wait=False,
+                                            depends_on=dependency)
+
+        # Then
+        assert result == ('table_name', future)
+        submit_mock.assert_called_once_with(
+            'BEGIN; DROP TABLE IF EXISTS table_name; CREATE TABLE table_name AS (SELECT 1); ; COMMIT;', dependency)
+        assert not invalidate_mock.called
+        future.set_result({'status': 'done'})
+        assert invalidate_mock.called
+
+    def test_copy_from_stats(self, mocker):
+        # Given
+        from shapely.geometry import Point
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mocker.patch.object(ContextManager, 'has_table', return_value=True)
+        mocker.patch.object(ContextManager, 'get_schema', return_value='schema')
+        mocker.patch.object(CopySQLClient, 'copyfrom', side_effect=lambda query, data, **kwargs: list(data))
+        gdf = GeoDataFrame({'a': [1, 2], 'the_geom': [Point(0, 0), Point(1, 1)]}, geometry='the_geom')
+        stats = TransferStats()
+
+        # When
+        cm = ContextManager(self.credentials)
+        cm.copy_from(gdf, 'table_name', 'append', stats=stats)
+
+        # Then
+        assert stats.rows == 2
+        assert stats.bytes == len(b''.join(_compute_copy_data(gdf, get_dataframe_columns_info(gdf))))
+        assert sorted(stats.stages) == ['encode', 'encode_geometry', 'metadata', 'network']
 
     def test_copy_from_exists_fail(self, mocker):
         # Given
@@ -86,6 +376,197 @@ class TestContextManager(object):
         # Then
         mock.assert_called_once_with('table_name', columns, 'schema', True)
 
+    def test_copy_from_exists_upsert(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mocker.patch('cartoframes.io.managers.context_manager._staging_table_name', return_value='table_name_staging')
+        mocker.patch.object(ContextManager, 'has_table', return_value=True)
+        mocker.patch.object(ContextManager, 'get_schema', return_value='schema')
+        query_mock = mocker.patch.object(ContextManager, 'execute_query')
+        batch_mock = mocker.patch.object(ContextManager, 'execute_long_running_query')
+        copy_mock = mocker.patch.object(ContextManager, '_copy_from')
+        df = DataFrame({'id': [1, 2], 'a': ['x', 'y']})
+
+        # When
+        cm = ContextManager(self.credentials)
+        cm.copy_from(df, 'table_name', 'upsert', key='id')
+
+        # Then
+        query_mock.assert_called_once_with('CREATE UNLOGGED TABLE table_name_staging (id bigint, a text)')
+        assert copy_mock.call_args[0][1] == 'table_name_staging'
+        batch_mock.assert_called_once_with(
+            'BEGIN; UPDATE table_name t SET a = s.a FROM table_name_staging s WHERE t.id = s.id; '
+            'INSERT INTO table_name (id,a) SELECT id,a FROM table_name_staging s\n'
+            '        WHERE NOT EXISTS (SELECT 1 FROM table_name t WHERE t.id = s.id); '
+            'DROP TABLE IF EXISTS table_name_staging; COMMIT;')
+
+    def test_copy_from_exists_upsert_fail(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mocker.patch('cartoframes.io.managers.context_manager._staging_table_name', return_value='table_name_staging')
+        mocker.patch.object(ContextManager, 'has_table', return_value=True)
+        mocker.patch.object(ContextManager, 'get_schema', return_value='schema')
+        query_mock = mocker.patch.object(ContextManager, 'execute_query')
+        mocker.patch.object(ContextManager, '_copy_from', side_effect=CartoException('Connection aborted'))
+        df = DataFrame({'id': [1, 2], 'a': ['x', 'y']})
+
+        # When
+        with pytest.raises(CartoException):
+            cm = ContextManager(self.credentials)
+            cm.copy_from(df, 'table_name', 'upsert', key=['id'])
+
+        # Then
+        assert query_mock.call_args[0][0] == 'DROP TABLE IF EXISTS table_name_staging'
+
+    def test_copy_from_exists_sync(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mocker.patch.object(ContextManager, 'has_table', return_value=True)
+        mocker.patch.object(ContextManager, 'get_schema', return_value='schema')
+        mocker.patch.object(ContextManager, '_get_query_columns_info')
+        query_mock = mocker.patch.object(ContextManager, 'execute_query')
+        upsert_mock = mocker.patch.object(ContextManager, '_upsert')
+        df = DataFrame({'id': [1, 2, 4], 'a': ['x', 'y', 'z']})
+        hashes = _compute_row_hashes(DataFrame({'id': [1, 2], 'a': ['x', 'old']}), get_dataframe_columns_info(df))
+        mocker.patch.object(ContextManager, '_copy_to', return_value=DataFrame({
+            'id': [1, 2, 3], 'cartoframes_hash': pd.array(list(hashes) + [None], dtype='Int64')}))
+
+        # When
+        cm = ContextManager(self.credentials)
+        cm.copy_from(df, 'table_name', 'sync', key='id')
+
+        # Then
+        query_mock.assert_called_once_with('ALTER TABLE table_name ADD COLUMN IF NOT EXISTS cartoframes_hash bigint')
+        assert upsert_mock.call_args[0][0]['id'].tolist() == [2, 4]
+        assert [column.name for column in upsert_mock.call_args[0][2]] == ['id', 'a', 'cartoframes_hash']
+        assert upsert_mock.call_args[0][8].to_dict('list') == {'id': [3]}
+
+    def test_copy_from_exists_sync_unchanged(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mocker.patch.object(ContextManager, 'has_table', return_value=True)
+        mocker.patch.object(ContextManager, 'get_schema', return_value='schema')
+        mocker.patch.object(ContextManager, '_get_query_columns_info')
+        mocker.patch.object(ContextManager, 'execute_query')
+        upsert_mock = mocker.patch.object(ContextManager, '_upsert')
+        df = DataFrame({'id': [1, 2], 'a': ['x', 'y']})
+        hashes = _compute_row_hashes(df, get_dataframe_columns_info(df))
+        mocker.patch.object(ContextManager, '_copy_to', return_value=DataFrame({
+            'id': [1, 2], 'cartoframes_hash': hashes}))
+
+        # When
+        cm = ContextManager(self.credentials)
+        cm.copy_from(df, 'table_name', 'sync', key='id')
+
+        # Then
+        assert not upsert_mock.called
+
+    def test_copy_from_bulk_load(self, mocker):
+        # Given
+        from shapely.geometry import Point
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mocker.patch('cartoframes.io.managers.context_manager._staging_table_name', return_value='table_name_staging')
+        mocker.patch.object(ContextManager, 'has_table', return_value=False)
+        mocker.patch.object(ContextManager, 'get_schema', return_value='schema')
+        mocker.patch.object(ContextManager, 'invalidate_metadata')
+        query_mock = mocker.patch.object(ContextManager, 'execute_query')
+        batch_mock = mocker.patch.object(ContextManager, 'execute_long_running_query')
+        copy_mock = mocker.patch.object(ContextManager, '_copy_from')
+        gdf = GeoDataFrame({'id': [1, 2], 'the_geom': [Point(0, 0), Point(1, 1)]}, geometry='the_geom')
+
+        # When
+        cm = ContextManager(self.credentials)
+        cm.copy_from(gdf, 'table_name', 'fail', False, bulk_load=True, indexes='id')
+
+        # Then
+        query_mock.assert_called_once_with(
+            'CREATE UNLOGGED TABLE table_name_staging (id bigint, the_geom geometry(Point, 4326))')
+        assert copy_mock.call_args[0][1] == 'table_name_staging'
+        batch_mock.assert_called_once_with(
+            'BEGIN; DROP TABLE IF EXISTS table_name; ALTER TABLE table_name_staging SET LOGGED; '
+            'ALTER TABLE table_name_staging RENAME TO table_name; '
+            'CREATE INDEX ON table_name USING GIST (the_geom); CREATE INDEX ON table_name USING BTREE (id); '
+            'ANALYZE table_name; COMMIT;')
+
+    def test_copy_from_bulk_load_fail(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mocker.patch('cartoframes.io.managers.context_manager._staging_table_name', return_value='table_name_staging')
+        mocker.patch.object(ContextManager, 'get_schema', return_value='schema')
+        mocker.patch.object(ContextManager, 'invalidate_metadata')
+        query_mock = mocker.patch.object(ContextManager, 'execute_query')
+        batch_mock = mocker.patch.object(ContextManager, 'execute_long_running_query')
+        mocker.patch.object(ContextManager, '_copy_from', side_effect=CartoException('Connection aborted'))
+        df = DataFrame({'id': [1, 2]})
+
+        # When
+        with pytest.raises(CartoException):
+            cm = ContextManager(self.credentials)
+            cm.copy_from(df, 'table_name', 'replace', bulk_load=True)
+
+        # Then
+        assert query_mock.call_args[0][0] == 'DROP TABLE IF EXISTS table_name_staging'
+        assert not batch_mock.called
+
+    def test_copy_from_indexes(self, mocker):
+        # Given
+        from shapely.geometry import Point
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mocker.patch.object(ContextManager, 'has_table', return_value=False)
+        mocker.patch.object(ContextManager, 'get_schema', return_value='schema')
+        mocker.patch.object(ContextManager, '_create_table_from_columns')
+        mocker.patch.object(ContextManager, '_copy_from')
+        batch_mock = mocker.patch.object(ContextManager, 'execute_long_running_query')
+        gdf = GeoDataFrame({'id': [1, 2], 'the_geom': [Point(0, 0), Point(1, 1)]}, geometry='the_geom')
+
+        # When
+        cm = ContextManager(self.credentials)
+        cm.copy_from(gdf, 'table_name', indexes=['the_geom', 'id'])
+
+        # Then
+        batch_mock.assert_called_once_with(
+            'BEGIN; CREATE INDEX ON table_name USING BTREE (id); ANALYZE table_name; COMMIT;')
+
+        # When
+        with pytest.raises(ValueError) as e:
+            cm.copy_from(gdf, 'table_name', indexes=['b'])
+
+        # Then
+        assert str(e.value) == 'Columns not found in the dataframe: b'
+
+    def test_compute_row_hashes(self):
+        # Given
+        from shapely.geometry import Point
+        gdf = GeoDataFrame({'a': [1, 1, 1], 'b': [Point(0, 0), Point(0, 0), Point(0, 1)]}, geometry='b')
+        columns = get_dataframe_columns_info(gdf)
+
+        # When
+        hashes = _compute_row_hashes(gdf, columns)
+
+        # Then
+        assert str(hashes.dtype) == 'int64'
+        assert hashes[0] == hashes[1] and hashes[0] != hashes[2]
+
+    def test_copy_from_upsert_wrong_key(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mocker.patch.object(ContextManager, 'get_schema', return_value='schema')
+        cm = ContextManager(self.credentials)
+
+        # When
+        with pytest.raises(ValueError) as e:
+            cm.copy_from(DataFrame({'id': [1, 2]}), 'table_name', 'upsert', key=['b'])
+
+        # Then
+        assert str(e.value) == 'Columns not found in the dataframe: b'
+
+        # When
+        with pytest.raises(ValueError) as e:
+            cm.copy_from(DataFrame({'id': [1, 1]}), 'table_name', 'upsert', key='id')
+
+        # Then
+        assert str(e.value) == 'The `key` columns have duplicated values'
+
     def test_internal_copy_from(self, mocker):
         # Given
         from shapely.geometry import Point
@@ -106,10 +587,439 @@ class TestContextManager(object):
             COPY table_name(a,b) FROM stdin WITH (FORMAT csv, DELIMITER '|', NULL '__null');
         '''.strip()
         assert list(mock.call_args[0][1]) == [
-            b'1|0101000020E610000000000000000000000000000000000000\n',
+            b'1|0101000020E610000000000000000000000000000000000000\n'
             b'2|0101000020E6100000000000000000F03F000000000000F03F\n'
         ]
 
+    def test_internal_copy_from_compress(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mock = mocker.patch.object(CopySQLClient, 'copyfrom')
+        df = DataFrame({'A': [1, 2]})
+        columns = [ColumnInfo('A', 'a', 'bigint', False)]
+        cm = ContextManager(self.credentials)
+
+        # When
+        cm._copy_from(df, 'table_name', columns, False)
+
+        # Then
+        assert mock.call_args[1] == {'compress': False}
+
+        # When
+        cm._copy_from(df, 'table_name', columns, 6)
+
+        # Then
+        assert mock.call_args[1] == {'compress': True, 'compression_level': 6}
+
+    def test_copy_from_wrong_compress(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        cm = ContextManager(self.credentials)
+
+        # When
+        with pytest.raises(ValueError) as e:
+            cm.copy_from(DataFrame({'A': [1]}), 'table_name', compress=10)
+
+        # Then
+        assert str(e.value) == '`compress` parameter must a boolean or an integer between 1 and 9'
+
+    def test_chunked_copy_from(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mocker.patch('cartoframes.io.managers.context_manager.time.sleep')
+        mocker.patch('cartoframes.io.managers.context_manager._staging_table_name', return_value='staging')
+        execute_mock = mocker.patch.object(ContextManager, 'execute_query')
+        long_running_mock = mocker.patch.object(ContextManager, 'execute_long_running_query')
+        calls = []
+
+        def copyfrom(query, data):
+            data = b''.join(data)
+            calls.append((query.split('FROM')[0].strip(), data))
+            if data == b'3|1\n4|1\n' and len([call for call in calls if call[1] == data]) == 1:
+                raise CartoException(ChunkedEncodingError('Connection aborted'))
+        mocker.patch.object(CopySQLClient, 'copyfrom', side_effect=copyfrom)
+        df = DataFrame({'A': [1, 2, 3, 4, 5]})
+        columns = [ColumnInfo('A', 'a', 'bigint', False)]
+
+        # When
+        cm = ContextManager(self.credentials)
+        cm._chunked_copy_from(df, 'table_name', columns, 2, 2, 1)
+
+        # Then
+        assert sorted(calls) == [
+            ('COPY staging(a,cartoframes_chunk_id)', b'1|0\n2|0\n'),
+            ('COPY staging(a,cartoframes_chunk_id)', b'3|1\n4|1\n'),
+            ('COPY staging(a,cartoframes_chunk_id)', b'3|1\n4|1\n'),
+            ('COPY staging(a,cartoframes_chunk_id)', b'5|2\n')
+        ]
+        # The retried chunk deletes the rows of the failed attempt
+        assert execute_mock.call_args_list == [
+            mocker.call('CREATE UNLOGGED TABLE staging (a bigint, cartoframes_chunk_id integer)'),
+            mocker.call('DELETE FROM staging WHERE cartoframes_chunk_id = 1')
+        ]
+        long_running_mock.assert_called_once_with(
+            'BEGIN; INSERT INTO table_name (a) SELECT a FROM staging; DROP TABLE IF EXISTS staging; COMMIT;')
+        assert list(df.columns) == ['A']
+
+    def test_chunked_copy_from_many_chunks(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mocker.patch('cartoframes.io.managers.context_manager._staging_table_name', return_value='staging')
+        mocker.patch.object(ContextManager, 'execute_query')
+        long_running_mock = mocker.patch.object(ContextManager, 'execute_long_running_query')
+        mocker.patch.object(CopySQLClient, 'copyfrom')
+        df = DataFrame({'col_{}'.format(i): range(1000) for i in range(11)})
+        columns = [ColumnInfo(name, name, 'bigint', False) for name in df.columns]
+
+        # When
+        cm = ContextManager(self.credentials)
+        cm._chunked_copy_from(df, 'table_name', columns, 10, 4, 0)
+
+        # Then
+        assert CopySQLClient.copyfrom.call_count == 100
+        # The merge query does not grow with the number of chunks
+        query = long_running_mock.call_args[0][0]
+        assert query.count('INSERT') == 1
+        assert len(query) < 1000
+
+    def test_chunked_copy_from_fail(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mocker.patch('cartoframes.io.managers.context_manager.time.sleep')
+        mocker.patch('cartoframes.io.managers.context_manager._staging_table_name', return_value='staging')
+        execute_mock = mocker.patch.object(ContextManager, 'execute_query')
+        long_running_mock = mocker.patch.object(ContextManager, 'execute_long_running_query')
+        mocker.patch.object(CopySQLClient, 'copyfrom',
+                            side_effect=CartoException(ChunkedEncodingError('Connection aborted')))
+        df = DataFrame({'A': [1, 2, 3]})
+        columns = [ColumnInfo('A', 'a', 'bigint', False)]
+
+        # When
+        with pytest.raises(CartoException) as e:
+            cm = ContextManager(self.credentials)
+            cm._chunked_copy_from(df, 'table_name', columns, 2, 2, 0)
+
+        # Then
+        assert str(e.value) == '2 of 2 chunks failed to upload (rows starting at 0, 2): Connection aborted'
+        long_running_mock.assert_not_called()
+        execute_mock.assert_called_with('DROP TABLE IF EXISTS staging')
+
+    def test_chunked_copy_from_data_error(self, mocker):
+        # Given
+        class BadRequestException(Exception):
+            status_code = 400
+
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mocker.patch('cartoframes.io.managers.context_manager.time.sleep')
+        mocker.patch.object(ContextManager, 'execute_query')
+        mocker.patch.object(ContextManager, 'execute_long_running_query')
+        copyfrom_mock = mocker.patch.object(CopySQLClient, 'copyfrom', side_effect=CartoException(
+            BadRequestException('invalid byte sequence for encoding "UTF8"')))
+        df = DataFrame({'A': [1, 2]})
+        columns = [ColumnInfo('A', 'a', 'bigint', False)]
+
+        # When
+        with pytest.raises(CartoException) as e:
+            cm = ContextManager(self.credentials)
+            cm._chunked_copy_from(df, 'table_name', columns, 2, 1, 3)
+
+        # Then
+        assert str(e.value) == '1 of 1 chunks failed to upload (rows starting at 0): ' \
+            'invalid byte sequence for encoding "UTF8"'
+        assert copyfrom_mock.call_count == 1
+
+    def test_compute_copy_data_chunks(self):
+        # Given
+        df = DataFrame({
+            'A': [1, 2, 3],
+            'B': [0.5, np.nan, np.inf],
+            'C': ['a', 'b|c', None],
+            'D': [True, False, True]
+        })
+        columns = [
+            ColumnInfo('A', 'a', 'bigint', False),
+            ColumnInfo('B', 'b', 'double precision', False),
+            ColumnInfo('C', 'c', 'text', False),
+            ColumnInfo('D', 'd', 'boolean', False)
+        ]
+
+        # When
+        data = list(_compute_copy_data(df, columns, chunk_size=2))
+
+        # Then
+        assert data == [
+            b'1|0.5|a|True\n2|NaN|"b|c"|False\n',
+            b'3|Infinity|__null|True\n'
+        ]
+
+    def test_copy_to_parallel_table(self, mocker):
+        # Given
+        def copy_to(query, columns, retry_times, *args):
+            if 'cartodb_id < 4' in query:
+                return DataFrame({'cartodb_id': [1, 2, 3], 'a': ['x', 'y', 'z']})
+            elif 'cartodb_id < 7' in query:
+                return DataFrame({'cartodb_id': [4, 5], 'a': ['u', 'v']})
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mocker.patch.object(ContextManager, 'get_schema', return_value='schema')
+        mocker.patch.object(ContextManager, '_get_query_columns_info', return_value=[
+            Column('cartodb_id', pgtype='integer'), Column('a', pgtype='text')])
+        mocker.patch.object(ContextManager, 'execute_query', return_value={'rows': [{'min': 1, 'max': 5}]})
+        mock = mocker.patch.object(ContextManager, '_copy_to', side_effect=copy_to)
+
+        # When
+        cm = ContextManager(self.credentials)
+        df = cm.copy_to('table_name', None, parallel=2)
+
+        # Then
+        copy_query = 'SELECT cartodb_id,a FROM (SELECT * FROM "schema"."table_name") _q'
+        assert sorted(call[0][0] for call in mock.call_args_list) == [
+            'SELECT * FROM ({}) _s WHERE cartodb_id >= 1 AND cartodb_id < 4 ORDER BY cartodb_id'.format(copy_query),
+            'SELECT * FROM ({}) _s WHERE cartodb_id >= 4 AND cartodb_id < 7 ORDER BY cartodb_id'.format(copy_query)
+        ]
+        assert df.equals(DataFrame({'cartodb_id': [1, 2, 3, 4, 5], 'a': ['x', 'y', 'z', 'u', 'v']}))
+
+    def test_copy_to_parallel_query(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mocker.patch.object(ContextManager, '_get_query_columns_info', return_value=[Column('a', pgtype='text')])
+        execute_mock = mocker.patch.object(ContextManager, 'execute_query')
+        mock = mocker.patch.object(ContextManager, '_copy_to', return_value=DataFrame({'a': ['x', 'y']}))
+
+        # When
+        cm = ContextManager(self.credentials)
+        df = cm.copy_to('SELECT * FROM table_name', None, parallel=2)
+
+        # Then
+        execute_mock.assert_not_called()
+        mock.assert_called_once_with('SELECT a FROM (SELECT * FROM table_name) _q', mocker.ANY, 3,
+                                     format='csv', stats=mocker.ANY)
+        assert df.equals(DataFrame({'a': ['x', 'y']}))
+
+    def test_copy_to_chunksize(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        columns = [Column('a', pgtype='integer')]
+        mocker.patch.object(ContextManager, '_get_query_columns_info', return_value=columns)
+        mocker.patch.object(CopySQLClient, 'copyto_stream', return_value=StringIO('a\n1\n2\n3\n'))
+
+        # When
+        cm = ContextManager(self.credentials)
+        chunks = list(cm.copy_to('SELECT * FROM table_name', None, chunksize=2))
+
+        # Then
+        assert [chunk['a'].tolist() for chunk in chunks] == [[1, 2], [3]]
+
+    def test_copy_to_stats(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        columns = [Column('a', pgtype='integer'), Column('b', pgtype='boolean')]
+        mocker.patch.object(ContextManager, '_get_query_columns_info', return_value=columns)
+        mocker.patch.object(CopySQLClient, 'copyto_stream', return_value=StringIO('a,b\n1,t\n2,f\n3,t\n'))
+        stats = TransferStats(measure_converters=True)
+
+        # When
+        cm = ContextManager(self.credentials)
+        df = cm.copy_to('SELECT * FROM table_name', None, stats=stats)
+
+        # Then
+        assert df['a'].tolist() == [1, 2, 3]
+        assert stats.rows == 3
+        assert stats.bytes == 16
+        assert all(stats.stages[name] >= 0 for name in ['metadata', 'network', 'parse'])
+
+    def test_copy_to_nullable_dtypes(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        columns = [
+            Column('a', pgtype='integer'),
+            Column('b', pgtype='double precision'),
+            Column('c', pgtype='boolean'),
+            Column('d', pgtype='text'),
+            Column('e', pgtype='timestamp')
+        ]
+        mocker.patch.object(ContextManager, '_get_query_columns_info', return_value=columns)
+        mocker.patch.object(CopySQLClient, 'copyto_stream', return_value=StringIO(
+            'a,b,c,d,e\n'
+            '1,1.5,t,NA,2020-01-01 10:00:00\n'
+            '__null,Infinity,f,,__null\n'
+            '3,NaN,__null,__null,2020-01-02 00:00:00\n'))
+
+        # When
+        cm = ContextManager(self.credentials)
+        df = cm.copy_to('SELECT * FROM table_name', None)
+
+        # Then
+        assert str(df['a'].dtype) == 'Int32'
+        assert df['a'].tolist()[0::2] == [1, 3] and df['a'].isnull().tolist() == [False, True, False]
+        assert str(df['b'].dtype) == 'float64'
+        assert df['b'].tolist()[:2] == [1.5, np.inf] and np.isnan(df['b'][2])
+        assert str(df['c'].dtype) == NULLABLE_DTYPES.get('bool', 'object')
+        assert df['c'].tolist()[:2] == [True, False] and df['c'].isnull().tolist() == [False, False, True]
+        assert df['d'].tolist() == ['NA', '', None]
+        assert str(df['e'].dtype) == 'datetime64[ns]'
+        assert df['e'].isnull().tolist() == [False, True, False]
+
+    def test_copy_to_binary(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        columns = [Column('a', pgtype='integer'), Column('b', pgtype='numeric'), Column('c', pgtype='json')]
+        mocker.patch.object(ContextManager, '_get_query_columns_info', return_value=columns)
+        response = mocker.Mock()
+        response.iter_content.return_value = iter([
+            b'PGCOPY\n\xff\r\n\x00' + b'\x00' * 8 +
+            b'\x00\x03' + b'\x00\x00\x00\x04\x00\x00\x00\x01' +
+            b'\x00\x00\x00\x08?\xf8\x00\x00\x00\x00\x00\x00' + b'\x00\x00\x00\x02{}' +
+            b'\xff\xff'
+        ])
+        mock = mocker.patch.object(CopySQLClient, 'copyto', return_value=response)
+
+        # When
+        cm = ContextManager(self.credentials)
+        df = cm.copy_to('SELECT * FROM table_name', None, format='binary')
+
+        # Then
+        mock.assert_called_once_with(
+            'COPY (SELECT a,b::float8 AS b,c::text AS c FROM (SELECT * FROM table_name) _q) '
+            'TO stdout WITH (FORMAT binary)')
+        assert df.to_dict('list') == {'a': [1], 'b': [1.5], 'c': ['{}']}
+
+    def test_copy_to_resume(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mocker.patch('cartoframes.io.managers.context_manager.warn')
+        sleep_mock = mocker.patch('cartoframes.io.managers.context_manager.time.sleep')
+        columns = [Column('cartodb_id', pgtype='integer'), Column('a', pgtype='text')]
+        mocker.patch.object(ContextManager, '_get_query_columns_info', return_value=columns)
+
+        def interrupted_copy():
+            yield DataFrame({'cartodb_id': [1, 2], 'a': ['x', 'y']})
+            raise ChunkedEncodingError()
+
+        mock = mocker.patch.object(ContextManager, '_copy_to', side_effect=[
+            interrupted_copy(), iter([DataFrame({'cartodb_id': [3], 'a': ['z']})])])
+
+        # When
+        cm = ContextManager(self.credentials)
+        df = cm.copy_to('SELECT * FROM table_name', None, resume=ResumeManager())
+
+        # Then
+        assert df.to_dict('list') == {'cartodb_id': [1, 2, 3], 'a': ['x', 'y', 'z']}
+        assert mock.call_args_list[0][0][0] == \
+            'SELECT * FROM (SELECT cartodb_id,a FROM (SELECT * FROM table_name) _q) _r ORDER BY cartodb_id'
+        assert mock.call_args_list[1][0][0] == \
+            'SELECT * FROM (SELECT cartodb_id,a FROM (SELECT * FROM table_name) _q) _r ' \
+            'WHERE cartodb_id > 2 ORDER BY cartodb_id'
+        sleep_mock.assert_called_once_with(1)
+
+    def test_copy_to_resume_query_error(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        sleep_mock = mocker.patch('cartoframes.io.managers.context_manager.time.sleep')
+        columns = [Column('cartodb_id', pgtype='integer'), Column('a', pgtype='text')]
+        mocker.patch.object(ContextManager, '_get_query_columns_info', return_value=columns)
+        mock = mocker.patch.object(ContextManager, '_copy_to', side_effect=CartoException(
+            'permission denied for relation table_name'))
+
+        # When
+        with pytest.raises(CartoException) as e:
+            cm = ContextManager(self.credentials)
+            cm.copy_to('SELECT * FROM table_name', None, resume=ResumeManager())
+
+        # Then
+        assert str(e.value) == 'permission denied for relation table_name'
+        assert mock.call_count == 1
+        sleep_mock.assert_not_called()
+
+    def test_copy_to_resume_wrong_values(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mocker.patch.object(ContextManager, '_get_query_columns_info', return_value=[Column('a', pgtype='text')])
+        cm = ContextManager(self.credentials)
+
+        # When
+        with pytest.raises(ValueError) as e:
+            cm.copy_to('SELECT * FROM table_name', None, limit=10, resume=ResumeManager())
+
+        # Then
+        assert str(e.value) == '`resume` parameter can not be used with `limit` or `parallel`'
+
+        # When
+        with pytest.raises(ValueError) as e:
+            cm.copy_to('SELECT * FROM table_name', None, resume=ResumeManager())
+
+        # Then
+        assert str(e.value) == '`resume` parameter requires a `cartodb_id` column'
+
+    def test_copy_to_cache(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mocker.patch.object(ContextManager, '_get_query_columns_info', return_value=[Column('a', pgtype='text')])
+        mocker.patch.object(ContextManager, 'get_updated_at', return_value='2020-01-01T00:00:00Z')
+        copy_mock = mocker.patch.object(ContextManager, '_copy_to', return_value=DataFrame({'a': ['x']}))
+        cache = mocker.Mock()
+        cache.get.side_effect = [None, DataFrame({'a': ['x']})]
+
+        # When
+        cm = ContextManager(self.credentials)
+        df_1 = cm.copy_to('SELECT * FROM table_name', None, cache=cache)
+        df_2 = cm.copy_to('SELECT * FROM table_name', None, cache=cache)
+
+        # Then
+        assert copy_mock.call_count == 1
+        cache.put.assert_called_once_with(cache.get_key.return_value, df_1, '2020-01-01T00:00:00Z')
+        assert df_1.equals(df_2)
+
+    def test_copy_to_filters(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mocker.patch.object(ContextManager, '_get_query_columns_info', return_value=[
+            Column('cartodb_id', pgtype='integer'), Column('the_geom', pgtype='geometry'), Column('a', pgtype='text')])
+        mock = mocker.patch.object(ContextManager, '_copy_to')
+
+        # When
+        cm = ContextManager(self.credentials)
+        cm.copy_to('SELECT * FROM table_name', None, limit=10, columns=['a', 'the_geom'], where='a = \'x\'',
+                   bbox=(-10, -5.5, 10, 5.5))
+
+        # Then
+        assert mock.call_args[0][0] == (
+            'SELECT a,the_geom FROM (SELECT * FROM table_name) _q '
+            'WHERE (a = \'x\') AND the_geom && ST_MakeEnvelope(-10.0, -5.5, 10.0, 5.5, 4326) LIMIT 10')
+        assert [c.name for c in mock.call_args[0][1]] == ['a', 'the_geom']
+
+    def test_copy_to_filters_wrong_values(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mocker.patch.object(ContextManager, '_get_query_columns_info', return_value=[Column('a', pgtype='text')])
+        cm = ContextManager(self.credentials)
+
+        # When
+        with pytest.raises(ValueError) as e:
+            cm.copy_to('SELECT * FROM table_name', None, columns=['b'])
+
+        # Then
+        assert str(e.value) == 'Columns not found in the source: b'
+
+        # When
+        with pytest.raises(ValueError) as e:
+            cm.copy_to('SELECT * FROM table_name', None, bbox=(0, 0, 1))
+
+        # Then
+        assert str(e.value) == '`bbox` parameter must a tuple of numbers (west, south, east, north)'
+
+    def test_copy_to_parallel_wrong_value(self, mocker):
+        # Given
+        mocker.patch('cartoframes.io.managers.context_manager._create_auth_client')
+        mocker.patch.object(ContextManager, '_get_query_columns_info', return_value=[Column('a', pgtype='text')])
+
+        # When
+        with pytest.raises(ValueError) as e:
+            cm = ContextManager(self.credentials)
+            cm.copy_to('SELECT * FROM table_name', None, parallel=0)
+
+        # Then
+        assert str(e.value) == '`parallel` parameter must be an integer >= 1'
+
     def test_rename_table(self, mocker):
         # Given
         def has_table(table_name):
@@ -0,0 +1,161 @@
+import copy
+import pickle
+
+from requests import Response, Session
+from requests.adapters import HTTPAdapter
+
+from cartoframes.auth import Credentials
+from cartoframes.io.managers import rate_limiter
+from cartoframes.io.managers.rate_limiter import RateLimiter, RateLimitedAdapter, get_rate_limiter, \
+    clear_rate_limiters, rate_limited_session
+
+
+def build_response(status_code=200, **headers):
+    response = Response()
+    response.status_code = status_code
+    response.headers.update(headers)
+    return response
+
+
+class TestRateLimiter(object):
+
+    def setup_method(self):
+        self.now = 1000.0
+
+    def mock_time(self, mocker):
+        mocker.patch.object(rate_limiter.time, 'time', side_effect=lambda: self.now)
+        return mocker.patch.object(rate_limiter.time, 'sleep')
+
+    def test_get_rate_limiter(self):
+        # Given
+        clear_rate_limiters()
+
+        # When
+        rl_1 = get_rate_limiter(Credentials('fake_user', 'fake_api'))
+        rl_2 = get_rate_limiter(Credentials('fake_user', 'other_api'))
+        rl_3 = get_rate_limiter(Credentials('other_user', 'fake_api'))
+
+        # Then
+        assert rl_1 is rl_2
+        assert rl_1 is not rl_3
+        clear_rate_limiters()
+
+    def test_acquire_without_headers(self, mocker):
+        # Given
+        sleep_mock = self.mock_time(mocker)
+        rl = RateLimiter()
+
+        # When
+        waits = [rl.acquire() for _ in range(10)]
+
+        # Then
+        assert waits == [0] * 10
+        assert not sleep_mock.called
+
+    def test_acquire_paced(self, mocker):
+        # Given
+        sleep_mock = self.mock_time(mocker)
+        rl = RateLimiter()
+        rl.update(build_response(**{
+            'Carto-Rate-Limit-Limit': '10',
+            'Carto-Rate-Limit-Remaining': '2',
+            'Carto-Rate-Limit-Reset': '4'
+        }))
+
+        # When
+        waits = [rl.acquire() for _ in range(4)]
+
+        # Then
+        assert rl.rate == 2
+        assert waits == [0, 0, 0.5, 1]
+        assert sleep_mock.call_count == 2
+
+    def test_acquire_refilled(self, mocker):
+        # Given
+        self.mock_time(mocker)
+        rl = RateLimiter()
+        rl.update(build_response(**{
+            'Carto-Rate-Limit-Limit': '10',
+            'Carto-Rate-Limit-Remaining': '0',
+            'Carto-Rate-Limit-Reset': '5'
+        }))
+
+        # When
+        self.now += 1
+        wait = rl.acquire()
+
+        # Then
+        assert wait == 0
+        assert rl.tokens == 1
+
+    def test_update_429(self, mocker):
+        # Given
+        self.mock_time(mocker)
+        rl = RateLimiter()
+        rl.update(build_response(**{
+            'Carto-Rate-Limit-Limit': '10',
+            'Carto-Rate-Limit-Remaining': '5',
+            'Carto-Rate-Limit-Reset': '1'
+        }))
+
+        # When
+        rl.update(build_response(429, **{'Retry-After': '3'}))
+        wait = rl.acquire()
+
+        # Then
+        assert rl.rate == 2.5
+        assert wait == 3
+
+    def test_adapter(self, mocker):
+        # Given
+        rl = RateLimiter()
+        acquire_mock = mocker.patch.object(rl, 'acquire')
+        update_mock = mocker.patch.object(rl, 'update')
+        response = build_response()
+        adapter = HTTPAdapter()
+        mocker.patch.object(adapter, 'send', return_value=response)
+
+        # When
+        RateLimitedAdapter(rl, adapter).send('request')
+
+        # Then
+        assert acquire_mock.call_count == 1
+        adapter.send.assert_called_once_with('request')
+        update_mock.assert_called_once_with(response)
+
+    def test_rate_limited_session(self):
+        # Given
+        rl = RateLimiter()
+        session = Session()
+        session.headers['X-Custom'] = 'value'
+        adapter = HTTPAdapter(max_retries=5)
+        session.mount('https://user.carto.com', adapter)
+
+        # When
+        limited_session = rate_limited_session(session, rl, 'https://user.carto.com')
+
+        # Then
+        limited_adapter = limited_session.get_adapter('https://user.carto.com/api/v2/sql')
+        assert isinstance(limited_adapter, RateLimitedAdapter)
+        assert limited_adapter.rate_limiter is rl
+        assert limited_adapter.adapter is adapter
+        assert limited_session.get_adapter('https://other.carto.com') is session.get_adapter('https://other.carto.com')
+        assert limited_session.headers['X-Custom'] == 'value'
+        assert session.get_adapter('https://user.carto.com/api/v2/sql') is adapter
+
+    def test_adapter_copy_and_pickle(self):
+        # Given
+        rl = RateLimiter()
+        rl.update(build_response(**{'Carto-Rate-Limit-Limit': '10', 'Carto-Rate-Limit-Remaining': '5',
+                                    'Carto-Rate-Limit-Reset': '10'}))
+        adapter = RateLimitedAdapter(rl, HTTPAdapter(max_retries=5))
+
+        # When
+        adapter_copy = copy.deepcopy(adapter)
+        adapter_pickled = pickle.loads(pickle.dumps(adapter))
+
+        # Then
+        assert adapter_copy.rate_limiter is rl
+        assert adapter_pickled.rate_limiter.rate == 0.5
+        assert adapter_pickled.rate_limiter.acquire() == 0
+        assert adapter_pickled.adapter.max_retries.total == 5
@@ -0,0 +1,70 @@
+import pytest
+
+from pandas import DataFrame
+
+from cartoframes.auth import Credentials
+from cartoframes.io.managers.resume_manager import ResumeManager
+
+pytest.importorskip('pyarrow')
+
+
+class TestResumeManager(object):
+
+    def setup_method(self):
+        self.credentials = Credentials('fake_user', 'fake_api')
+        self.df = DataFrame({'cartodb_id': [1, 2], 'a': ['x', None]})
+
+    def test_get_key(self):
+        # Given
+        resume = ResumeManager()
+
+        # When
+        key = resume.get_key(self.credentials, 'SELECT * FROM table_name')
+
+        # Then
+        assert key == resume.get_key(Credentials('fake_user', 'other_api'), 'SELECT * FROM table_name')
+        assert key != resume.get_key(self.credentials, 'SELECT * FROM other_table')
+        assert key != resume.get_key(self.credentials, 'SELECT * FROM table_name', 'binary')
+
+    def test_load_memory(self):
+        # Given
+        resume = ResumeManager()
+        resume.load('key')
+
+        # When
+        resume.save(self.df, 2)
+
+        # Then
+        assert resume.frames == [self.df]
+        assert resume.last_key == 2
+        assert resume.load('key') is None
+        assert resume.frames == []
+
+    def test_load_stored(self, tmpdir):
+        # Given
+        resume = ResumeManager(str(tmpdir))
+        resume.load('key')
+        resume.save(self.df, 2)
+
+        # When
+        other_resume = ResumeManager(str(tmpdir))
+        last_key = other_resume.load('key')
+
+        # Then
+        assert last_key == 2
+        assert len(other_resume.frames) == 1
+        assert other_resume.frames[0].equals(self.df)
+        assert other_resume.load('other_key') is None
+
+    def test_clear(self, tmpdir):
+        # Given
+        resume = ResumeManager(str(tmpdir))
+        resume.load('key')
+        resume.save(self.df, 2)
+
+        # When
+        resume.clear()
+
+        # Then
+        assert tmpdir.listdir() == []
+        assert ResumeManager(str(tmpdir)).load('key') is None
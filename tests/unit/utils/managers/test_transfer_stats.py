@@ -0,0 +1,93 @@
+import pytest
+
+from io import BytesIO
+
+from cartoframes.io.managers import transfer_stats
+from cartoframes.io.managers.transfer_stats import TransferStats, NULL_STATS, get_transfer_stats
+
+
+class TestTransferStats(object):
+
+    def setup_method(self):
+        self.now = 1000.0
+
+    def mock_time(self, mocker):
+        mocker.patch.object(transfer_stats.time, 'time', side_effect=lambda: self.now)
+
+    def test_get_transfer_stats(self):
+        # Given
+        stats = TransferStats()
+
+        # Then
+        assert get_transfer_stats(None) is NULL_STATS
+        assert get_transfer_stats(stats) is stats
+        assert get_transfer_stats(print).callback is print
+
+        with pytest.raises(ValueError) as e:
+            get_transfer_stats('stats')
+        assert str(e.value) == '`stats` parameter must a TransferStats instance or a function'
+
+    def test_stage_exclusive(self, mocker):
+        # Given
+        self.mock_time(mocker)
+        stats = TransferStats()
+
+        # When
+        with stats.stage('parse'):
+            self.now += 1
+            with stats.stage('network'):
+                self.now += 2
+            self.now += 1
+
+        # Then
+        assert stats.stages == {'parse': 2, 'network': 2}
+
+    def test_timed_iter(self, mocker):
+        # Given
+        self.mock_time(mocker)
+        stats = TransferStats()
+
+        def blocks():
+            for block in [b'ab', b'cde']:
+                self.now += 1
+                yield block
+
+        # When
+        result = list(stats.timed_iter(blocks(), 'network', 'bytes'))
+
+        # Then
+        assert result == [b'ab', b'cde']
+        assert stats.bytes == 5
+        assert stats.stages == {'network': 2}
+
+    def test_timed_reader(self):
+        # Given
+        stats = TransferStats()
+
+        # When
+        reader = stats.timed_reader(BytesIO(b'a,b\n1,2\n'), 'network')
+        lines = [reader.readline(), reader.read()]
+
+        # Then
+        assert lines == [b'a,b\n', b'1,2\n']
+        assert stats.bytes == 8
+        assert 'network' in stats.stages
+
+    def test_finish(self, mocker):
+        # Given
+        self.mock_time(mocker)
+        callback = mocker.Mock()
+        stats = TransferStats(callback)
+        stats.start('read')
+        stats.add_rows(10)
+        stats.add_bytes(100)
+
+        # When
+        self.now += 2
+        stats.finish()
+
+        # Then
+        callback.assert_called_once_with(stats)
+        assert stats.to_dict() == {'operation': 'read', 'rows': 10, 'bytes': 100, 'total': 2, 'stages': {}}
+        assert stats.rows_per_second == 5
+        assert stats.bytes_per_second == 50
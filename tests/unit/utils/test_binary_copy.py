@@ -0,0 +1,164 @@
+# coding=UTF-8
+
+"""Unit tests for cartoframes.utils.binary_copy"""
+
+import struct
+
+import pytest
+
+from io import StringIO
+from pandas import Timestamp, read_csv
+
+from cartoframes.utils.binary_copy import read_binary_copy, binary_column_expression
+from cartoframes.utils.columns import Column, date_columns_names, obtain_converters, obtain_dtypes, \
+    obtain_na_values
+
+HEADER = b'PGCOPY\n\xff\r\n\x00' + struct.pack('>ii', 0, 0)
+TRAILER = struct.pack('>h', -1)
+
+
+def _tuple(*fields):
+    data = struct.pack('>h', len(fields))
+    for field in fields:
+        if field is None:
+            data += struct.pack('>i', -1)
+        else:
+            data += struct.pack('>i', len(field)) + field
+    return data
+
+
+class TestBinaryCopy(object):
+    """Tests for functions in binary_copy module"""
+
+    def setup_method(self):
+        self.columns = [
+            Column('a', pgtype='smallint'),
+            Column('b', pgtype='bigint'),
+            Column('c', pgtype='real'),
+            Column('d', pgtype='double precision'),
+            Column('e', pgtype='boolean'),
+            Column('f', pgtype='timestamp'),
+            Column('g', pgtype='date'),
+            Column('h', pgtype='text'),
+            Column('the_geom', pgtype='geometry')
+        ]
+        self.geom = b'\x01\x01\x00\x00 \xe6\x10\x00\x00' + struct.pack('<dd', 1, 2)
+        self.data = HEADER + _tuple(
+            struct.pack('>h', 1),
+            struct.pack('>q', 2),
+            struct.pack('>f', 0.5),
+            struct.pack('>d', 1.5),
+            b'\x01',
+            struct.pack('>q', 86400 * 1000000 + 1),
+            struct.pack('>i', 1),
+            u'áé'.encode('utf-8'),
+            self.geom
+        ) + _tuple(*[None] * 9) + TRAILER
+
+    def test_read_binary_copy(self):
+        # When
+        df = read_binary_copy([self.data], self.columns)
+
+        # Then
+        assert list(df.columns) == ['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'the_geom']
+        assert str(df['a'].dtype) == 'Int16'
+        assert df['a'][0] == 1 and df['b'][0] == 2
+        assert df['c'][0] == 0.5 and df['d'][0] == 1.5
+        assert df['e'][0] == True  # noqa: E712
+        assert df['f'][0] == Timestamp('2000-01-02 00:00:00.000001')
+        assert df['g'][0] == Timestamp('2000-01-02')
+        assert df['h'][0] == u'áé'
+        assert df['the_geom'][0] == self.geom
+        assert df.iloc[1].isnull().all()
+
+    def test_read_binary_copy_split_blocks(self):
+        # Given
+        blocks = [self.data[i:i + 7] for i in range(0, len(self.data), 7)]
+
+        # When
+        df = read_binary_copy(blocks, self.columns)
+
+        # Then
+        assert df.equals(read_binary_copy([self.data], self.columns))
+
+    def test_read_binary_copy_chunksize(self):
+        # Given
+        columns = [Column('a', pgtype='integer')]
+        data = HEADER + b''.join(_tuple(struct.pack('>i', i)) for i in range(5)) + TRAILER
+
+        # When
+        chunks = list(read_binary_copy([data], columns, chunksize=2))
+
+        # Then
+        assert [chunk['a'].tolist() for chunk in chunks] == [[0, 1], [2, 3], [4]]
+        assert chunks[2].index.tolist() == [4]
+
+    def test_read_binary_copy_empty(self):
+        # When
+        df = read_binary_copy([HEADER + TRAILER], self.columns)
+
+        # Then
+        assert len(df) == 0
+        assert list(df.columns) == ['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'the_geom']
+
+    def test_read_binary_copy_wrong_data(self):
+        # When
+        with pytest.raises(ValueError) as e:
+            read_binary_copy([b'a,b\n1,2\n' * 4], self.columns)
+
+        # Then
+        assert str(e.value) == 'Wrong binary COPY signature.'
+
+        # When
+        with pytest.raises(ValueError) as e:
+            read_binary_copy([self.data[:-2]], self.columns)
+
+        # Then
+        assert str(e.value) == 'Incomplete binary COPY stream.'
+
+    def test_read_binary_copy_text_rows(self):
+        # Given
+        columns = [Column('a', pgtype='integer'), Column('b', pgtype='text')]
+        values = [u'x', None, u'', u'áé', u'a|b']
+        data = HEADER + b''.join(
+            _tuple(struct.pack('>i', i), None if value is None else value.encode('utf-8'))
+            for i, value in enumerate(values)) + TRAILER
+
+        # When
+        chunks = list(read_binary_copy([data[:30], data[30:]], columns, chunksize=3))
+
+        # Then
+        assert [chunk['a'].tolist() for chunk in chunks] == [[0, 1, 2], [3, 4]]
+        assert chunks[0]['b'].tolist() + chunks[1]['b'].tolist() == values
+
+    def test_read_binary_copy_timestamptz(self):
+        # Given
+        columns = [Column('a', pgtype='timestamptz'), Column('b', pgtype='timestamp with time zone')]
+        data = HEADER + _tuple(b'2020-01-01 10:00:00+00', struct.pack('>q', 631188000000000)) + \
+            _tuple(None, None) + TRAILER
+        csv = 'a,b\n2020-01-01 10:00:00+00,2020-01-01 10:00:00+00\n__null,__null\n'
+
+        # When
+        df = read_binary_copy([data], columns)
+        csv_df = read_csv(
+            StringIO(csv),
+            dtype=obtain_dtypes(columns),
+            na_values=obtain_na_values(columns),
+            keep_default_na=False,
+            converters=obtain_converters(columns),
+            parse_dates=date_columns_names(columns))
+
+        # Then
+        assert binary_column_expression(columns[0]) == 'a::text AS a'
+        assert binary_column_expression(columns[1]) == 'b'
+        assert df['a'].tolist() == ['2020-01-01 10:00:00+00', None]
+        assert df['b'].tolist()[0] == Timestamp('2020-01-01 10:00:00', tz='UTC')
+        assert df['b'].isnull().tolist() == [False, True]
+        # Both formats give the same dtypes
+        assert df.dtypes.astype(str).tolist() == csv_df.dtypes.astype(str).tolist()
+
+    def test_binary_column_expression(self):
+        assert binary_column_expression(Column('a', pgtype='integer')) == 'a'
+        assert binary_column_expression(Column('a', pgtype='timestamp with time zone')) == 'a'
+        assert binary_column_expression(Column('a', pgtype='numeric')) == 'a::float8 AS a'
+        assert binary_column_expression(Column('a', pgtype='json')) == 'a::text AS a'
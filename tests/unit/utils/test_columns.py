@@ -2,11 +2,15 @@
 
 """Unit tests for cartoframes.data.columns"""
 
-from pandas import DataFrame
+from io import StringIO
+
+from pandas import DataFrame, read_csv
 from geopandas import GeoDataFrame
 
 from cartoframes.utils.geom_utils import set_geometry
-from cartoframes.utils.columns import Column, ColumnInfo, get_dataframe_columns_info, normalize_names
+from cartoframes.utils.columns import Column, ColumnInfo, get_dataframe_columns_info, normalize_names, \
+    obtain_converters, obtain_dtypes, obtain_na_values, date_columns_names, NULLABLE_DTYPES, _can_parse_nullable_bool, \
+    _convert_bool
 
 
 class TestColumns(object):
@@ -126,3 +130,71 @@ class TestColumns(object):
             ColumnInfo('the_geom', 'the_geom', 'geometry(Point, 4326)', True),
             ColumnInfo('g-e-o-m-e-t-r-y', 'g_e_o_m_e_t_r_y', 'text', False)
         ]
+
+    def test_obtain_dtypes(self, mocker):
+        mocker.patch.dict(NULLABLE_DTYPES, {'bool': 'boolean'})
+        columns = [
+            Column('a', pgtype='integer'),
+            Column('b', pgtype='double precision'),
+            Column('c', pgtype='boolean'),
+            Column('d', pgtype='text'),
+            Column('e', pgtype='timestamp')
+        ]
+
+        assert obtain_dtypes(columns) == {
+            'a': 'Int32',
+            'b': 'float64',
+            'c': 'boolean',
+            'd': 'object'
+        }
+        assert obtain_converters(columns) == {}
+        assert obtain_na_values(columns) == {
+            'a': ['__null'],
+            'b': ['__null', 'NaN'],
+            'c': ['__null'],
+            'd': ['__null'],
+            'e': ['__null']
+        }
+
+    def test_obtain_dtypes_without_nullable_bool(self, mocker):
+        mocker.patch.dict(NULLABLE_DTYPES, {'int32': 'Int32'}, clear=True)
+        columns = [
+            Column('a', pgtype='integer'),
+            Column('c', pgtype='boolean')
+        ]
+
+        assert obtain_dtypes(columns) == {'a': 'Int32'}
+        assert obtain_converters(columns) == {'c': _convert_bool}
+
+    def test_can_parse_nullable_bool_old_pandas(self, mocker):
+        mocker.patch('cartoframes.utils.columns.read_csv', side_effect=ValueError('t cannot be cast to bool'))
+
+        assert _can_parse_nullable_bool() is False
+
+    def test_read_columns_info_round_trip(self):
+        columns = [
+            Column('a', pgtype='smallint'),
+            Column('b', pgtype='integer'),
+            Column('c', pgtype='bigint'),
+            Column('d', pgtype='double precision'),
+            Column('e', pgtype='boolean'),
+            Column('f', pgtype='text'),
+            Column('g', pgtype='timestamp')
+        ]
+        data = 'a,b,c,d,e,f,g\n1,2,3,1.5,t,x,2020-01-01 00:00:00\n__null,__null,__null,__null,__null,__null,__null\n'
+
+        df = read_csv(
+            StringIO(data),
+            dtype=obtain_dtypes(columns),
+            na_values=obtain_na_values(columns),
+            keep_default_na=False,
+            true_values=['t'],
+            false_values=['f'],
+            converters=obtain_converters(columns),
+            parse_dates=date_columns_names(columns))
+
+        # Without the nullable boolean dtype the booleans are parsed as objects
+        bool_dbtype = 'boolean' if 'bool' in NULLABLE_DTYPES else 'text'
+        assert [column.dbtype for column in get_dataframe_columns_info(df)] == [
+            'smallint', 'integer', 'bigint', 'double precision', bool_dbtype, 'text', 'timestamp'
+        ]
@@ -8,7 +8,8 @@ from shapely.geometry import Point, base
 
 from cartoframes.utils.geom_utils import (ENC_EWKT, ENC_SHAPELY, ENC_WKB,
                                           ENC_WKB_BHEX, ENC_WKB_HEX, ENC_WKT,
-                                          decode_geometry, decode_geometry_item, detect_encoding_type)
+                                          decode_geometry, decode_geometry_item, detect_encoding_type,
+                                          encode_geometry_ewkb, encode_geometries_ewkb)
 
 
 class TestGeomUtils(object):
@@ -49,6 +50,22 @@ class TestGeomUtils(object):
         decoded_geom = decode_geometry(geom_none)
         assert str(decoded_geom) == str(expected_decoded_geom)
 
+    def test_decode_geometry_wkb_hex_with_nulls(self):
+        geom = pd.Series(['010100000000000000000000000000000000000000', None, '',
+                          '010100000000000000000024400000000000002e40'])
+        expected_decoded_geom = gpd.GeoSeries([Point([0, 0]), base.BaseGeometry(),
+                                               base.BaseGeometry(), Point([10, 15])])
+
+        decoded_geom = decode_geometry(geom)
+        assert str(decoded_geom) == str(expected_decoded_geom)
+
+    def test_decode_geometry_ewkt_column(self):
+        geom = pd.Series(['SRID=4326;POINT (0 0)', 'SRID=4326;POINT (1 1)'], index=[3, 5])
+        expected_decoded_geom = gpd.GeoSeries([Point([0, 0]), Point([1, 1])], index=[3, 5])
+
+        decoded_geom = decode_geometry(geom)
+        assert str(decoded_geom) == str(expected_decoded_geom)
+
     def test_detect_encoding_type_shapely(self):
         enc_type = detect_encoding_type(Point(1234, 5789))
         assert enc_type == ENC_SHAPELY
@@ -127,3 +144,19 @@ class TestGeomUtils(object):
         geom = decode_geometry_item('SRID=4326;POINT (1234 5789)', ENC_EWKT)  # ext
         assert lgeos.GEOSGetSRID(geom._geom) == 4326
         assert geom.wkt == 'POINT (1234 5789)'
+
+    def test_encode_geometry_ewkb(self):
+        geom = Point(1, 1)
+        assert encode_geometry_ewkb(geom) == '0101000020E6100000000000000000F03F000000000000F03F'
+        assert lgeos.GEOSGetSRID(geom._geom) == 0
+
+    def test_encode_geometries_ewkb(self):
+        geoms = gpd.GeoSeries([Point(0, 0), None, Point(1, 1)], index=[3, 4, 5])
+        encoded = encode_geometries_ewkb(geoms)
+        assert encoded.tolist() == [
+            '0101000020E610000000000000000000000000000000000000',
+            None,
+            '0101000020E6100000000000000000F03F000000000000F03F'
+        ]
+        assert encoded.index.tolist() == [3, 4, 5]
+        assert lgeos.GEOSGetSRID(geoms[3]._geom) == 0
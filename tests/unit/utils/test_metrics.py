@@ -0,0 +1,72 @@
+"""Unit tests for cartoframes.utils.metrics"""
+
+import queue
+
+from cartoframes.utils import metrics
+
+
+class TestMetrics(object):
+
+    def setup_method(self):
+        self.queue = queue.Queue(maxsize=2)
+
+    def test_enqueue_metrics(self, mocker):
+        # Given
+        mocker.patch.object(metrics, '_metrics_queue', self.queue)
+        mocker.patch.object(metrics, 'get_metrics_enabled', return_value=True)
+        mocker.patch.object(metrics, 'start_metrics_thread')
+
+        # When
+        for _ in range(3):
+            metrics.enqueue_metrics('event')
+
+        # Then
+        assert self.queue.qsize() == 2
+        assert self.queue.get_nowait()[0]['event_name'] == 'event'
+
+    def test_enqueue_metrics_disabled(self, mocker):
+        # Given
+        mocker.patch.object(metrics, '_metrics_queue', self.queue)
+        mocker.patch.object(metrics, 'get_metrics_enabled', return_value=False)
+
+        # When
+        metrics.enqueue_metrics('event')
+
+        # Then
+        assert self.queue.empty()
+
+    def test_metrics_worker(self, mocker):
+        # Given
+        stop = mocker.Mock()
+        stop.wait.side_effect = [False, True]
+        mocker.patch.object(metrics, '_metrics_stop', stop)
+        mocker.patch.object(metrics, '_metrics_queue', self.queue)
+        mock = mocker.patch.object(metrics, 'post_metrics')
+        self.queue.put_nowait(({'event_name': 'event_1'}, None))
+        self.queue.put_nowait(({'event_name': 'event_2'}, None))
+
+        # When
+        metrics._metrics_worker()
+
+        # Then
+        assert [call[0][0]['event_name'] for call in mock.call_args_list] == ['event_1', 'event_2']
+        assert self.queue.empty()
+
+    def test_start_metrics_thread_after_flush(self, mocker):
+        # Given
+        stop = metrics.threading.Event()
+        mocker.patch.object(metrics, '_metrics_stop', stop)
+        mocker.patch.object(metrics, '_metrics_thread', None)
+        mocker.patch.object(metrics, '_metrics_queue', self.queue)
+        mock = mocker.patch.object(metrics, 'post_metrics')
+        metrics._flush_metrics()
+        self.queue.put_nowait(({'event_name': 'event'}, None))
+
+        # When
+        metrics.start_metrics_thread()
+        thread = metrics._metrics_thread
+        metrics._flush_metrics()
+
+        # Then
+        assert not thread.is_alive()
+        assert [call[0][0]['event_name'] for call in mock.call_args_list] == ['event']
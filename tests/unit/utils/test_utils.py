@@ -6,10 +6,12 @@ from collections import OrderedDict
 
 import requests
 import numpy as np
+import pandas as pd
 
 from cartoframes.utils.utils import (camel_dictionary, cssify, debug_print, dict_items,
                                      importify_params, snake_to_camel, dtypes2pg, pg2dtypes,
-                                     encode_row, extract_viz_columns, remove_comments)
+                                     encode_row, encode_column, extract_viz_columns, remove_comments,
+                                     get_package_version, check_package)
 
 
 class TestUtils(unittest.TestCase):
@@ -131,10 +133,17 @@ class TestUtils(unittest.TestCase):
             'int16': 'smallint',
             'int32': 'integer',
             'int64': 'bigint',
+            'Int16': 'smallint',
+            'Int32': 'integer',
+            'Int64': 'bigint',
             'float32': 'real',
             'float64': 'double precision',
+            'Float32': 'real',
+            'Float64': 'double precision',
             'object': 'text',
+            'string': 'text',
             'bool': 'boolean',
+            'boolean': 'boolean',
             'datetime64[ns]': 'timestamp',
             'datetime64[ns, UTC]': 'timestamp',
             'unknown_dtype': 'text'
@@ -210,6 +219,33 @@ class TestUtils(unittest.TestCase):
         assert encode_row(-np.inf) == b'-Infinity'
         assert encode_row(np.nan) == b'NaN'
 
+    def test_encode_column(self):
+        assert encode_column(pd.Series([1, 2])).tolist() == ['1', '2']
+        assert encode_column(pd.Series([0.5, np.inf, -np.inf, np.nan])).tolist() == \
+            ['0.5', 'Infinity', '-Infinity', 'NaN']
+        assert encode_column(pd.Series([True, False])).tolist() == ['True', 'False']
+        assert encode_column(pd.Series(['Hello', 'Hello "world"', 'Hello | world', None])).tolist() == \
+            ['Hello', '"Hello ""world"""', '"Hello | world"', '__null']
+        assert encode_column(pd.Series([b'Hello \n world', 1, None])).tolist() == \
+            ['"Hello \n world"', '1', '__null']
+        assert encode_column(pd.Series(pd.to_datetime(['2020-01-01 10:00:00', None]))).tolist() == \
+            ['2020-01-01 10:00:00', '__null']
+        assert encode_column(pd.Series(['a', None, 'b|c', 'a'], dtype='category')).tolist() == \
+            ['a', '__null', '"b|c"', 'a']
+        assert encode_column(pd.Series([1, 2], dtype='category')).tolist() == ['1', '2']
+
+    def test_get_package_version(self):
+        assert get_package_version('pandas') == pd.__version__
+        assert get_package_version('__not_installed__') is None
+
+    def test_check_package(self):
+        check_package('pandas', '>=0.1.0')
+
+        with self.assertRaises(Exception) as e:
+            check_package('__not_installed__', is_optional=True)
+        self.assertEqual(str(e.exception), 'Optional package "__not_installed__" is not installed. '
+                                           'Please run: pip install __not_installed__')
+
     def test_extract_viz_columns(self):
         viz = 'color: $hello + $A_0123'
         assert 'hello' in extract_viz_columns(viz)
@@ -107,6 +107,21 @@ class TestSource(object):
         assert credentials['api_key'] == 'default_public'
         assert credentials['base_url'] == 'https://fakeuser.carto.com'
 
+    def test_source_approximate(self, mocker):
+        """Source should estimate the metadata of a table with approximate"""
+        setup_mocks(mocker)
+        bounds_mock = mocker.patch.object(ContextManager, 'get_bounds', return_value=[[0, 0], [1, 1]])
+        geom_type_mock = mocker.patch.object(ContextManager, 'get_geom_type', return_value='polygon')
+        source = Source('faketable', credentials=Credentials(
+            username='fakeuser', api_key='1234'), approximate=True)
+
+        source.compute_metadata()
+
+        assert source.bounds == [[0, 0], [1, 1]]
+        assert source.get_geom_type() == 'polygon'
+        bounds_mock.assert_called_once_with(source.query, True)
+        geom_type_mock.assert_called_once_with(source.query, True)
+
     def test_source_no_credentials(self):
         """Source should raise an exception if there are no credentials"""
         with pytest.raises(ValueError) as e: